@@ -45,6 +45,34 @@ CODE_MAP={
 
 Z_SCORE = 1.65
 
-STORE_SCHEDULE=[]
+# (r, Q) policy (rq_policy.py): cost per unit backordered, keyed by node name, and the share of demand
+# every node fills from stock
+SHORTAGE_COST = {
+    'DC': 20,
+    'WH1': 25,
+    'WH2': 25,
+    'ST1': 40,
+    'ST2': 40,
+    'ST3': 40
+}
+FILL_RATE = 0.98
+
+# units a node's dock can ship, and separately receive, per day (schedules/schedule_store.py); nodes left out are not checked
+DOCK_CAPACITY = {
+    'DC': 6000,
+    'WH1': 2000,
+    'WH2': 2500,
+}
 
-WAREHOUSE_SCHEDULE=[]
+# planning tables on disk replace the literals above; the dicts are refreshed in place
+from config import parameters_dir,parameters_version,parameters_cache_dir,inventory_policy,rq_objective
+if parameters_dir:
+    from parameter_tables import install,load_parameters
+    PARAMETER_SET = load_parameters(parameters_dir, parameters_version, parameters_cache_dir, z_score_default=Z_SCORE)
+    install(PARAMETER_SET, globals())
+    missing = sorted(set(CODE_MAP.values()) - set(SHORTAGE_COST))
+    if inventory_policy == "rq" and rq_objective == "shortage_cost" and missing:
+        raise ValueError(f"The shortage_cost objective needs a shortage_cost for every node; add one to the nodes or "
+                         f"defaults table for {missing[:10]}")
+else:
+    PARAMETER_SET = None
@@ -1,25 +1,104 @@
-from data_processing.Input_Data import load_file_as_dataframe
-from config import input_path
-from app_function_call import aggregate,calculate_metrics,distribute,schedule,download
-from cost_comparison import eoq_cost,non_eoq_cost
+import logging
+from data_processing.Input_Data import iter_file_chunks
+from data_processing.Data_Aggregate import aggregate_chunks
+from data_processing.Output_Data import write_outputs
+from config import input_path,input_chunk_size,max_workers,chunk_size,item_col,network_edges_path,network_leaf_col,incremental_store_path
+from config import output_format,output_workers,base_output_dir,calculated_metrics_path,schedule_path,write_schedule_loads
+from config import schedule_streaming,demand_stats_path
+from app_function_call import download
+from instrumentation import start_run,trace_stage
+from sku_pipeline import run_multi_sku
+from incremental import run_incremental
+from network.supply_network import SupplyNetwork,load_edges,leaf_monthly_demand,run_network
+from network.safety_stock_placement import place_network_safety_stock
+from config import safety_stock_placement,customer_service_time,supplier_service_time
+from checkpoint_cache import code_version,file_key
+from pipeline_graph import CACHE
+from schedules.schedule_store import schedule_loads
+from schedules.schedule_stream import clear_stream
+from demand_stats import update_demand_stats
+from Preassumptions import LEAD_TIME
 
 
+def load_input(path, cache=CACHE):
+    # the weekly totals of an unchanged input file come straight from the checkpoint cache
+    if cache is None:
+        return aggregate_chunks(iter_file_chunks(path, chunk_size=input_chunk_size))
+    key = cache.stage_key("load_input", code_version(iter_file_chunks) + code_version(aggregate_chunks), [file_key(path)])
+    cached = cache.get(key, ["weekly"])
+    if cached is not None:
+        return cached["weekly"]
+    df = aggregate_chunks(iter_file_chunks(path, chunk_size=input_chunk_size))
+    cache.put(key, "load_input", {"weekly": df})
+    return df
 
-df = load_file_as_dataframe(input_path, date_col="Time.[Week]")
 
-store_df,warehouse_df,dc_df=aggregate(df)
+def write_loads(schedule_frames, lead_time=LEAD_TIME):
+    # per-node daily dock load and the days over DOCK_CAPACITY, next to the order schedules
+    if not write_schedule_loads:
+        return []
+    loads = schedule_loads(schedule_frames, lead_time=lead_time)
+    return write_outputs({name: (frame, schedule_path) for name, frame in loads.items()}, output_format, output_workers,
+                         workbook_path=base_output_dir/"schedule_loads.xlsx")
 
-store_demand_df,warehouse_demand_df,dc_demand_df=calculate_metrics(store_df,warehouse_df,dc_df)
 
-warehouse_store_distribution,dc_warehouse_distribution=distribute(dc_demand_df,warehouse_demand_df,store_demand_df)
+def main():
+    if schedule_streaming and incremental_store_path and not network_edges_path:
+        raise ValueError("schedule_streaming does not combine with incremental_store_path")
+    start_run()
+    # stream the typed input and keep only node/item/week totals in memory
+    with trace_stage("load_input") as record:
+        df = load_input(input_path)
+        record["rows_out"] = len(df)
 
-store_schedule_df,warehouse_schedule_df=schedule(store_demand_df,warehouse_demand_df)
+    monthly_stats = None
+    if demand_stats_path:
+        # only the weeks after the previous run reach the stored accumulators, whose node-month
+        # statistics then stand in for the rescan in the monthly tables
+        with trace_stage("update_demand_stats", rows_in=len(df)) as record:
+            demand_stats, monthly_stats = update_demand_stats(df, demand_stats_path, item_col=item_col)
+            record["rows_out"] = len(demand_stats)
+        write_outputs({"demand_stats": (demand_stats, calculated_metrics_path)}, output_format, output_workers,
+                      workbook_path=base_output_dir/"demand_stats.xlsx")
 
+    if network_edges_path:
+        # every level of the edge-table network is processed as one batch, all items together
+        network = SupplyNetwork(load_edges(network_edges_path))
+        item = item_col if item_col in df.columns else None
+        demand = leaf_monthly_demand(df, leaf_col=network_leaf_col, item_col=item)
+        metrics_df, schedule_df = run_network(network, demand, item_col=item)
+        if safety_stock_placement:
+            metrics_df = place_network_safety_stock(network, metrics_df, item_col=item, customer_service_time=customer_service_time,
+                                                    supplier_service_time=supplier_service_time)
 
-eoq_cost_df = eoq_cost.eoq_cost_function(store_schedule_df,store_demand_df)
-non_eoq_cost_df = non_eoq_cost.non_eoq_cost_function(warehouse_store_distribution)
+        write_outputs({
+            "network_monthly_metrics": (metrics_df, calculated_metrics_path),
+            "network_order_schedule": (schedule_df, schedule_path),
+        }, output_format, output_workers, workbook_path=base_output_dir/"network_outputs.xlsx")
+        write_loads([schedule_df], network.lead_time)
+    elif incremental_store_path:
+        # only the DC-months touched by new or changed weeks are recomputed
+        results = run_incremental(df, incremental_store_path, max_workers=max_workers, chunk_size=chunk_size,
+                                  demand_stats=monthly_stats)
 
+        download(**results)
+        write_loads([results["store_schedule_df"], results["warehouse_schedule_df"]])
+    else:
+        # aggregate -> calculate_metrics -> distribute -> schedule -> cost, once per item, across a process pool
+        if schedule_streaming:
+            clear_stream(schedule_path)
+        results = run_multi_sku(df, max_workers=max_workers, chunk_size=chunk_size, demand_stats=monthly_stats)
 
-download(store_df,warehouse_df,dc_df,store_demand_df,warehouse_demand_df,dc_demand_df,warehouse_store_distribution,dc_warehouse_distribution,store_schedule_df,warehouse_schedule_df,eoq_cost_df,non_eoq_cost_df)
+        download(**results)
+        # streamed schedules are never held whole, so they get no load calendar
+        if not schedule_streaming:
+            write_loads([results["store_schedule_df"], results["warehouse_schedule_df"]])
 
+    if CACHE is not None:
+        CACHE.evict()
 
+
+if __name__ == "__main__":
+    # one line per record, so messages from stage threads and worker processes do not interleave
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(threadName)s %(name)s: %(message)s")
+    main()
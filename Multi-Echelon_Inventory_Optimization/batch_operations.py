@@ -0,0 +1,59 @@
+import numpy as np
+from inventory_common.eoq import EOQ,cycle_time,cycle_time_in_hr,effective_lead_time,full_cycle_in_lead_time,reorder_point
+from Preassumptions import Z_SCORE
+
+# Array-in/array-out counterparts of the scalar formulas in operations.py; the EOQ and cycle formulas
+# are the shared ones in inventory_common.eoq. Every argument may be a scalar or a NumPy array.
+
+METRIC_COLUMNS = [
+    "monthly_eoq",
+    "cycle_time",
+    "cycle_time_in_days",
+    "cycle_time_in_hr",
+    "full_cycles_in_lead_time",
+    "effective_lead_time",
+    "reorder_point",
+    "safety_stock",
+    "total_stock",
+]
+
+
+def cycle_time_month_to_days(cycle_time, days_in_month=30):
+    # pass the real month lengths (inventory_common.resampling.days_in_month) for calendar days
+    return np.asarray(cycle_time, dtype=float) * days_in_month
+
+
+# hours from a cycle time in days, as for the single-echelon daily metrics
+cycle_time_days_to_hrs = cycle_time_in_hr
+
+
+def safety_stock(z_score, lead_time, std_demand):
+    return z_score * np.sqrt(np.asarray(lead_time, dtype=float)) * std_demand
+
+
+def cycle_metrics(eoq, demand, lead_time, days_in_month=30):
+    # the METRIC_COLUMNS that follow from an order quantity, up to the reorder point
+    ct = cycle_time(eoq, demand)
+    ct_days = cycle_time_month_to_days(ct, days_in_month)
+    full_cycles = full_cycle_in_lead_time(lead_time, ct)
+    elt = effective_lead_time(lead_time, full_cycles, ct)
+
+    return {
+        "monthly_eoq": eoq,
+        "cycle_time": ct,
+        "cycle_time_in_days": ct_days,
+        "cycle_time_in_hr": cycle_time_days_to_hrs(ct_days),
+        "full_cycles_in_lead_time": full_cycles,
+        "effective_lead_time": elt,
+        "reorder_point": reorder_point(demand, elt),
+    }
+
+
+def eoq_metrics(demand, ordering_cost, holding_cost, lead_time, std_demand=None, z_score=Z_SCORE, days_in_month=30):
+    demand = np.asarray(demand, dtype=float)
+    metrics = cycle_metrics(EOQ(ordering_cost, holding_cost, demand), demand, lead_time, days_in_month)
+    if std_demand is not None:
+        ss = safety_stock(z_score, lead_time, np.asarray(std_demand, dtype=float))
+        metrics["safety_stock"] = np.broadcast_to(ss, demand.shape).astype(float)
+        metrics["total_stock"] = metrics["safety_stock"] + demand
+    return metrics
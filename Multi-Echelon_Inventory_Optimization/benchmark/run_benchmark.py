@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+PACKAGE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PACKAGE_DIR))
+
+# name -> generate_network arguments
+SCALES = {
+    "small": dict(n_dcs=1, n_warehouses=2, n_stores=6, n_skus=1, n_weeks=52),
+    "medium": dict(n_dcs=1, n_warehouses=10, n_stores=100, n_skus=4, n_weeks=104),
+    "large": dict(n_dcs=1, n_warehouses=50, n_stores=1000, n_skus=8, n_weeks=156),
+}
+
+
+def _rows(result):
+    frames = result if isinstance(result, tuple) else (result,)
+    return int(sum(len(frame) for frame in frames if isinstance(frame, pd.DataFrame)))
+
+
+def _measure(stage, func, args, repeats, memory):
+    # best-of-N wall time; the tracemalloc pass runs separately so it does not skew the timings
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        func(*args)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    return result, {
+        "stage": stage,
+        "seconds": min(timings),
+        "mean_seconds": sum(timings) / len(timings),
+        "peak_mb": peak_mb,
+        "rows_out": _rows(result),
+    }
+
+
+def run_scale(name, params, work_dir, repeats=3, memory=True, output_format="parquet", seed=0):
+    # pipeline modules bind the Preassumptions dicts at import, so the tables are swapped in place
+    from data_processing.Input_Data import load_file_as_dataframe
+    from app_function_call import aggregate, calculate_metrics, distribute, schedule, download
+    from cost_comparison import cost_engine
+    from sku_pipeline import run_multi_sku
+    from network.safety_stock_placement import place_safety_stock
+    from pipeline_graph import run_pipeline
+    from checkpoint_cache import CheckpointCache
+    from schedules.schedule_store import schedule_loads
+    from schedules.schedule_stream import clear_stream,stream_schedule
+    from rq_policy import rq_metrics
+    import Preassumptions
+    from benchmark.synthetic_data import apply_parameters, generate_network, write_network
+
+    df, parameters = generate_network(**params, seed=seed)
+    csv_path = work_dir / f"{name}.csv"
+    write_network(df, parameters, csv_path, work_dir / f"{name}_parameters.json")
+    previous = apply_parameters(parameters)
+    try:
+        ordering_cost, holding_cost, lead_time = Preassumptions.ORDERING_COST, Preassumptions.HOLDING_COST, Preassumptions.LEAD_TIME
+
+        stages = []
+
+        def stage(label, func, *args):
+            result, record = _measure(label, func, args, repeats, memory)
+            stages.append(record)
+            return result
+
+        loaded = stage("load_file_as_dataframe", load_file_as_dataframe, str(csv_path), "Time.[Week]")
+        store_df, warehouse_df, dc_df = stage("aggregate", aggregate, loaded)
+        # calculate_metrics adds columns to its inputs, so every call gets fresh copies
+        store_demand_df, warehouse_demand_df, dc_demand_df = stage(
+            "calculate_metrics", lambda: calculate_metrics(store_df.copy(), warehouse_df.copy(), dc_df.copy(), ordering_cost, holding_cost))
+        stage("place_safety_stock", lambda: place_safety_stock(
+            store_demand_df.copy(), warehouse_demand_df.copy(), dc_demand_df.copy(), holding_cost, lead_time))
+        # (r, Q) policy for every node-month of the three tables in one solve, against the EOQ metrics above
+        rq_rows = pd.concat([frame[[node_col, demand_col, "std_demand"]].set_axis(["node", "demand", "std_demand"], axis=1)
+                             for frame, node_col, demand_col in ((store_df, "Store", "Store_Monthly_Demand"),
+                                                                 (warehouse_df, "Warehouse", "Warehouse_Monthly_Demand"),
+                                                                 (dc_df, "DC", "DC_Monthly_Demand"))], ignore_index=True)
+        rq_nodes = rq_rows["node"].map(Preassumptions.CODE_MAP)
+        stage("rq_policy", lambda: pd.DataFrame(rq_metrics(
+            rq_rows["demand"].to_numpy(dtype=float), rq_nodes.map(ordering_cost).to_numpy(dtype=float),
+            rq_nodes.map(holding_cost).to_numpy(dtype=float), rq_nodes.map(lead_time).to_numpy(dtype=float),
+            rq_rows["std_demand"].to_numpy(dtype=float))))
+        warehouse_store_distribution, dc_warehouse_distribution = stage(
+            "distribute", distribute, dc_demand_df, warehouse_demand_df, store_demand_df)
+        store_schedule_df, warehouse_schedule_df = stage("schedule", schedule, store_demand_df, warehouse_demand_df)
+        eoq_cost_df, non_eoq_cost_df, cost_savings_df = stage(
+            "costs", cost_engine.compare_costs, store_demand_df, warehouse_demand_df, dc_demand_df, store_schedule_df,
+            warehouse_schedule_df, warehouse_store_distribution, dc_warehouse_distribution, ordering_cost, holding_cost)
+        # schedules written batch by batch with their EOQ costs folded in, against schedule + costs above
+        stream_dir = work_dir / "schedule_stream"
+        stage("stream_schedules", lambda: [stream_schedule(demand_df, ordering_cost, holding_cost, echelon=echelon, directory=stream_dir)
+                                           for echelon, demand_df in (("Store", store_demand_df), ("Warehouse", warehouse_demand_df),
+                                                                      ("DC", dc_demand_df))])
+        clear_stream(stream_dir)
+        stage("schedule_loads", schedule_loads, [store_schedule_df, warehouse_schedule_df], {}, lead_time)
+        stage("download", lambda: download(
+            store_df, warehouse_df, dc_df, store_demand_df, warehouse_demand_df, dc_demand_df,
+            warehouse_store_distribution, dc_warehouse_distribution, store_schedule_df, warehouse_schedule_df,
+            eoq_cost_df, non_eoq_cost_df, cost_savings_df, output_format=output_format))
+        # the per-item stage graph up to the cost tables, in order and then with independent stages on threads
+        # (without the checkpoint cache, which would turn every repeat into a cache read)
+        stage("run_pipeline", lambda: run_pipeline(loaded, ordering_cost, holding_cost, lead_time, max_workers=1, cache=None))
+        stage("run_pipeline_concurrent", lambda: run_pipeline(loaded, ordering_cost, holding_cost, lead_time, max_workers=4, cache=None))
+        cache = CheckpointCache(work_dir / "checkpoints")
+        run_pipeline(loaded, ordering_cost, holding_cost, lead_time, max_workers=1, cache=cache)
+        stage("run_pipeline_cached", lambda: run_pipeline(loaded, ordering_cost, holding_cost, lead_time, max_workers=1, cache=cache))
+        if params.get("n_skus", 1) > 1:
+            # the per-item path app.py takes, serially so the figure is comparable across machines
+            stage("run_multi_sku", run_multi_sku, loaded, 1)
+    finally:
+        # the caller's network, as the shared tables held it before this scale
+        apply_parameters(previous)
+
+    return {
+        "scale": name,
+        "params": params,
+        "input_rows": len(df),
+        "nodes": len(parameters["CODE_MAP"]),
+        "stages": stages,
+        "total_seconds": sum(record["seconds"] for record in stages),
+    }
+
+
+def run_benchmark(scales, repeats=3, memory=True, output_format="parquet", seed=0, work_dir=None):
+    # resolved before the chdir below, which a relative path would otherwise be taken from twice
+    work_dir = Path(work_dir or tempfile.mkdtemp(prefix="meio_benchmark_")).resolve()
+    work_dir.mkdir(parents=True, exist_ok=True)
+    # config creates the output folders relative to the cwd at import; keep them out of the repo
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        # a caller that imported config first had them created under its own cwd
+        import config
+        for path in [config.monthly_demand_path, config.calculated_metrics_path, config.distribution_path,
+                     config.schedule_path, config.cost_path]:
+            path.mkdir(parents=True, exist_ok=True)
+        results = [run_scale(name, SCALES[name], work_dir, repeats, memory, output_format, seed) for name in scales]
+    finally:
+        os.chdir(cwd)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "repeats": repeats,
+        "output_format": output_format,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time and memory-profile each pipeline stage on synthetic networks")
+    parser.add_argument("--scales", default="small,medium", help=f"comma separated, from {', '.join(SCALES)}")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output-format", default="parquet", choices=["parquet", "csv", "xlsx"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=None, help="where the synthetic inputs and outputs are written")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+
+    output = Path(args.output).resolve()
+    report = run_benchmark(args.scales.split(","), args.repeats, not args.no_memory, args.output_format, args.seed, args.work_dir)
+    output.write_text(json.dumps(report, indent=2))
+
+    for result in report["results"]:
+        print(f"{result['scale']}: {result['input_rows']} rows, {result['nodes']} nodes")
+        for record in result["stages"]:
+            peak = "" if record["peak_mb"] is None else f"  {record['peak_mb']:.1f} MB"
+            print(f"  {record['stage']:<24}{record['seconds']:>9.3f} s{peak}")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
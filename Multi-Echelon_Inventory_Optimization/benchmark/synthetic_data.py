@@ -0,0 +1,96 @@
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import Preassumptions
+
+RAW_COLUMNS = ["Version.[Version Name]", "DC", "Warehouse", "Store", "Time.[Week]", "Item.[Stat Item]", "Actual"]
+
+
+def generate_network(n_dcs=1, n_warehouses=2, n_stores=3, n_skus=1, n_weeks=52, fill_rate=0.7,
+                     start="2022-01-03", seed=0):
+    # a DC -> Warehouse -> Store tree in the Sample_2.csv layout plus matching Preassumptions tables
+    rng = np.random.default_rng(seed)
+
+    dc_codes = 100000 + np.arange(n_dcs)
+    warehouse_codes = 200000 + np.arange(n_warehouses)
+    store_codes = 300000 + np.arange(n_stores)
+    warehouse_dc = dc_codes[np.arange(n_warehouses) % n_dcs]
+    store_warehouse = warehouse_codes[np.arange(n_stores) % n_warehouses]
+
+    names = {code: f"DC{i + 1}" for i, code in enumerate(dc_codes)}
+    names.update({code: f"WH{i + 1}" for i, code in enumerate(warehouse_codes)})
+    names.update({code: f"ST{i + 1}" for i, code in enumerate(store_codes)})
+    parameters = {
+        "CODE_MAP": {int(code): name for code, name in names.items()},
+        "ORDERING_COST": {},
+        "HOLDING_COST": {},
+        "LEAD_TIME": {},
+    }
+    for code, name in names.items():
+        if name.startswith("DC"):
+            ordering, holding, lead = 200, 0.5, 2
+        elif name.startswith("WH"):
+            ordering, holding, lead = 50, 0.7, int(rng.integers(2, 5))
+        else:
+            ordering, holding, lead = 10, 1.0, int(rng.integers(1, 4))
+        parameters["ORDERING_COST"][name] = ordering
+        parameters["HOLDING_COST"][name] = holding
+        parameters["LEAD_TIME"][name] = lead
+
+    weeks = pd.date_range(start, periods=n_weeks, freq="7D")
+    items = np.array([f"{10160 + i:06d}" for i in range(n_skus)])
+
+    # every (store, item, week) combination, thinned so not every week has actuals
+    store_idx, item_idx, week_idx = np.meshgrid(np.arange(n_stores), np.arange(n_skus), np.arange(n_weeks), indexing="ij")
+    store_idx, item_idx, week_idx = store_idx.ravel(), item_idx.ravel(), week_idx.ravel()
+    keep = rng.random(store_idx.size) < fill_rate
+    store_idx, item_idx, week_idx = store_idx[keep], item_idx[keep], week_idx[keep]
+
+    base_level = rng.lognormal(mean=6.5, sigma=0.6, size=(n_stores, n_skus))
+    actual = base_level[store_idx, item_idx] * rng.gamma(shape=4.0, scale=0.25, size=store_idx.size)
+
+    stores = store_codes[store_idx]
+    warehouses = store_warehouse[store_idx]
+    df = pd.DataFrame({
+        "Version.[Version Name]": "CurrentWorkingView",
+        "DC": warehouse_dc[np.searchsorted(warehouse_codes, warehouses)],
+        "Warehouse": warehouses,
+        "Store": stores,
+        "Time.[Week]": weeks[week_idx].strftime("%d-%b-%y"),
+        "Item.[Stat Item]": items[item_idx],
+        "Actual": np.round(actual * 4) / 4,
+    })
+    return df[RAW_COLUMNS], parameters
+
+
+def write_network(df, parameters, csv_path, parameters_path=None):
+    df.to_csv(csv_path, index=False)
+    if parameters_path:
+        with open(parameters_path, "w") as f:
+            json.dump(parameters, f, indent=2)
+
+
+def write_parameter_tables(parameters, directory):
+    # the same network as a nodes table for parameter_tables.load_parameters
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    code_map = parameters["CODE_MAP"]
+    nodes = pd.DataFrame({"code": list(code_map), "name": list(code_map.values())})
+    nodes["echelon"] = nodes["name"].str[:2].map({"DC": "DC", "WH": "Warehouse", "ST": "Store"})
+    for col, table in (("ordering_cost", "ORDERING_COST"), ("holding_cost", "HOLDING_COST"), ("lead_time", "LEAD_TIME")):
+        nodes[col] = nodes["name"].map(parameters[table])
+    nodes.to_csv(directory / "nodes.csv", index=False)
+    return directory
+
+
+def apply_parameters(parameters):
+    # update the Preassumptions dicts in place so every module that imported them sees the new network;
+    # returns the replaced tables, which apply_parameters(previous) puts back
+    previous = {}
+    for name, values in parameters.items():
+        table = getattr(Preassumptions, name)
+        previous[name] = dict(table)
+        table.clear()
+        table.update(values)
+    return previous
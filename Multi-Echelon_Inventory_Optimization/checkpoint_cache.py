@@ -0,0 +1,166 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Stage outputs kept on disk as uncompressed Arrow IPC files, which are memory-mapped back on a hit.
+# An entry is keyed by its stage's name, code version and the keys of the stage's inputs; a stage
+# output's key is derived from its stage's key, so keys chain down the graph and an unchanged
+# upstream stage is found without hashing its (possibly large) outputs again.
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+# part of every key; bump when the entry layout changes
+CACHE_FORMAT = 1
+
+
+def _digest(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def value_key(value):
+    # content hash of a graph input: frames by their rows, columns and dtypes; anything else by its JSON form
+    if isinstance(value, pd.DataFrame):
+        rows = pd.util.hash_pandas_object(value, index=False).to_numpy()
+        return _digest("frame", list(value.columns), [str(dtype) for dtype in value.dtypes], rows.tobytes())
+    if isinstance(value, dict):
+        value = {str(k): v for k, v in value.items()}
+    return _digest("value", json.dumps(value, sort_keys=True, default=str))
+
+
+def file_key(path, chunk_size=2**24):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return _digest("file", digest.hexdigest())
+
+
+def _package_modules(module, seen):
+    # modules of this package that a module reaches through its globals (imported modules, functions, classes)
+    path = getattr(module, "__file__", None)
+    if module is None or path is None or module.__name__ in seen or not Path(path).resolve().is_relative_to(PACKAGE_DIR):
+        return
+    seen[module.__name__] = Path(path).resolve()
+    for value in list(vars(module).values()):
+        if inspect.ismodule(value):
+            _package_modules(value, seen)
+        elif callable(value) and getattr(value, "__module__", None):
+            _package_modules(sys.modules.get(value.__module__), seen)
+
+
+@functools.lru_cache(maxsize=None)
+def _source_version(module_name):
+    seen = {}
+    _package_modules(sys.modules[module_name], seen)
+    return _digest(*[path.read_bytes() for _, path in sorted(seen.items())])
+
+
+def code_version(func):
+    # source of the function's module and every package module it reaches; partial arguments count too
+    bound = ""
+    while isinstance(func, functools.partial):
+        bound += repr((func.args, sorted(func.keywords.items())))
+        func = func.func
+    func = inspect.unwrap(func)
+    return _digest(func.__module__, func.__qualname__, bound, _source_version(func.__module__))
+
+
+class CheckpointCache:
+    def __init__(self, path, max_bytes=None, max_age_days=None, salt=None):
+        # salt: settings read outside the stage inputs (e.g. config flags); part of every key
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.salt = _digest(CACHE_FORMAT, json.dumps(salt, sort_keys=True, default=str))
+
+    def stage_key(self, name, version, input_keys):
+        return _digest(self.salt, name, version, *input_keys)
+
+    def _entry(self, key):
+        return self.path / key
+
+    def get(self, key, names):
+        # {name: frame} memory-mapped from the entry, or None on a miss (or an entry being evicted)
+        entry = self._entry(key)
+        if not (entry / "meta.json").exists():
+            return None
+        try:
+            frames = {}
+            for name in names:
+                with pa.memory_map(str(entry / f"{name}.arrow")) as source:
+                    frames[name] = pa.ipc.open_file(source).read_all().to_pandas()
+            # the meta file's mtime is the entry's last use, for eviction
+            os.utime(entry / "meta.json")
+        except (OSError, pa.ArrowInvalid):
+            return None
+        return frames
+
+    def put(self, key, stage, frames):
+        # written to a private directory and renamed into place, so readers never see a partial entry
+        entry = self._entry(key)
+        if entry.exists():
+            return entry
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self.path / f".{key}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        tmp.mkdir()
+        size = 0
+        for name, frame in frames.items():
+            table = pa.Table.from_pandas(frame)
+            with pa.OSFile(str(tmp / f"{name}.arrow"), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            size += (tmp / f"{name}.arrow").stat().st_size
+        (tmp / "meta.json").write_text(json.dumps({"stage": stage, "outputs": list(frames), "bytes": size,
+                                                   "created": time.time()}))
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+        return entry
+
+    def entries(self):
+        rows = []
+        if self.path.exists():
+            for entry in self.path.iterdir():
+                meta = entry / "meta.json"
+                if entry.name.startswith(".") or not meta.exists():
+                    continue
+                info = json.loads(meta.read_text())
+                rows.append({"key": entry.name, "stage": info["stage"], "bytes": info["bytes"],
+                             "created": info["created"], "last_used": meta.stat().st_mtime})
+        return pd.DataFrame(rows, columns=["key", "stage", "bytes", "created", "last_used"])
+
+    def evict(self, max_bytes=None, max_age_days=None, now=None):
+        # entries unused for max_age_days go first, then the least recently used until the total fits max_bytes
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        now = time.time() if now is None else now
+        entries = self.entries().sort_values("last_used", ignore_index=True)
+        remove = np.zeros(len(entries), dtype=bool)
+        if max_age_days is not None:
+            remove |= (now - entries["last_used"].to_numpy(dtype=float)) > max_age_days * 86400
+        if max_bytes is not None:
+            # newest entries are kept first; everything past the byte budget goes
+            kept = np.where(remove, 0, entries["bytes"].to_numpy())[::-1].cumsum()[::-1]
+            remove |= kept > max_bytes
+        for key in entries["key"][remove]:
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+        # directories left behind by writers that died mid-put
+        if self.path.exists():
+            for tmp in self.path.glob(".*"):
+                if now - tmp.stat().st_mtime > 86400:
+                    shutil.rmtree(tmp, ignore_errors=True)
+        return entries[remove].reset_index(drop=True)
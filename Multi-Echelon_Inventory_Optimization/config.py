@@ -1,6 +1,68 @@
 from pathlib import Path
 
-input_path = r"C:\Users\RISHIKESH\Desktop\inventory_optimization\Multi-Echelon_Inventory_Optimization\data\Sample_2.csv"
+input_path = Path(__file__).resolve().parent/"data"/"Sample_2.csv"
+
+# directory of nodes/defaults/sku/lanes tables (see parameter_tables.py); None keeps the literals in Preassumptions
+parameters_dir = None
+# sub-directory of parameters_dir to read, "latest" for the last one, or None for parameters_dir itself
+parameters_version = None
+
+# rows per chunk when streaming the input file
+input_chunk_size = 500_000
+
+item_col = "ItemStat_Item"
+# process pool used to run the per-item pipeline; None lets the pool use every core
+max_workers = None
+chunk_size = 8
+
+# threads running the independent stages of one item's pipeline (pipeline_graph.py); 1 runs them in order
+stage_workers = 4
+# "thread" or "process"; processes only pay off for very large single-item inputs
+stage_executor = "thread"
+
+# directory keeping the previous run's lane totals and outputs; None recomputes everything each run
+incremental_store_path = None
+
+
+# choose where safety stock sits with the guaranteed-service optimizer (network/safety_stock_placement.py)
+# instead of holding it all at the DC and splitting it down by demand share
+safety_stock_placement = False
+# months within which stores must serve customers, and the external supplier serves the DC
+customer_service_time = 0.0
+supplier_service_time = 0.0
+
+# write the order schedules batch by batch to partitioned files (schedule_path/<schedule>/<partition>/) and
+# fold each batch into the EOQ costs, so memory does not grow with the horizon; the schedule outputs then
+# list the files written. Fixed pipeline only, not with incremental_store_path; needs parquet or csv output
+schedule_streaming = False
+# "month" or "node" partitions, and orders per batch
+schedule_partition = "month"
+schedule_batch_rows = 1_000_000
+
+# "eoq" orders the deterministic EOQ with a z-score safety stock at the DC; "rq" optimises reorder point and
+# order quantity jointly at every node under normal lead-time demand (rq_policy.py), against rq_objective:
+# "fill_rate" (Preassumptions.FILL_RATE) or "shortage_cost" (Preassumptions.SHORTAGE_COST). With
+# safety_stock_placement the placed buffers replace the (r, Q) ones
+inventory_policy = "eoq"
+rq_objective = "fill_rate"
+
+# edge table (parent, child, lead_time) for an arbitrary-depth network; None runs the fixed DC/Warehouse/Store pipeline
+network_edges_path = None
+# column of the input file holding the leaf node of each demand row
+network_leaf_col = "Store"
+
+# download() sink: "parquet", "csv" or "xlsx" (one streaming workbook with every output)
+output_format = "parquet"
+# also write the cost tables to cost/cost_summary.xlsx
+excel_summary = False
+output_workers = 4
+# also write per-node daily outbound/inbound load and dock capacity breaches (schedules/schedule_store.py)
+write_schedule_loads = True
+
+# query_service.py: local HTTP lookups over the calculated_metrics outputs, and the entries per LRU cache
+service_host = "127.0.0.1"
+service_port = 8765
+service_cache_size = 4096
 
 
 base_output_dir = Path("./Multi-Echelon_Inventory_Optimization/output_data")
@@ -10,6 +72,27 @@ calculated_metrics_path = base_output_dir/"calculated_metrics"
 distribution_path = base_output_dir/"distribution"
 schedule_path = base_output_dir/"schedule_data"
 cost_path  = base_output_dir/"cost"
+# running per-node demand statistics (demand_stats.py), updated from the weeks newer than the last run; the
+# monthly tables take their rolling mean/std from it and it is written out as calculated_metrics/demand_stats.
+# None rescans the whole history every run
+demand_stats_path = base_output_dir/"demand_stats"
+# compiled parameter snapshots, reused while the tables are unchanged
+parameters_cache_dir = base_output_dir/"parameter_cache"
+# stage outputs checkpointed by input hash, parameters and stage code (checkpoint_cache.py), e.g.
+# base_output_dir/"checkpoints"; None turns it off
+checkpoint_dir = None
+# least recently used checkpoints are evicted past this size, and any unused for longer than the age
+checkpoint_max_bytes = 2 * 2**30
+checkpoint_max_age_days = 14
+
+# per-stage wall/CPU time, memory and row counts appended as JSON lines, e.g. base_output_dir/"stage_trace.jsonl";
+# None turns tracing off
+trace_path = None
+# "rss" records the process high-water mark reached so far with each stage (near free, but not per stage);
+# "tracemalloc" adds a per-stage Python heap peak but slows the run
+trace_memory = "rss"
+# directory for one cProfile dump per outermost traced stage; None disables profiling
+profile_dir = None
 
 for path in [monthly_demand_path, calculated_metrics_path, distribution_path, schedule_path,cost_path]:
     path.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
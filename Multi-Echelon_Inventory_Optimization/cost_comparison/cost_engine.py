@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+from schedules import dc_schedule
+from instrumentation import instrument
+from node_registry import get_registry
+from inventory_common.resampling import days_in_month
+from Preassumptions import CODE_MAP,HOLDING_COST,ORDERING_COST
+
+# echelon -> (node column, parent column, distributed stock column)
+COST_ECHELONS = {
+    "Store": ("Store", "Warehouse", "store_total_stock"),
+    "Warehouse": ("Warehouse", "DC", "warehouse_total_stock"),
+    "DC": ("DC", None, "total_stock"),
+}
+
+COST_KEYS = ["From", "Echelon", "Year", "Month"]
+COST_COLUMNS = ["Level"] + COST_KEYS + ["total_cost"]
+
+
+def node_parameters(codes, costs, code_map=CODE_MAP):
+    # node id per row, then one gather from the compiled parameter array
+    return get_registry(code_map).gather(codes, costs)
+
+
+def schedule_costs(schedule_df, metrics_df, echelon="Store", ordering_costs=ORDERING_COST, holding_costs=HOLDING_COST):
+    node_col = COST_ECHELONS[echelon][0]
+    cycle_df = metrics_df[[node_col, "Year", "Month", "cycle_time_in_days"]].rename(columns={node_col: "Echelon"})
+    merged_df = schedule_df.reset_index(drop=True).merge(cycle_df, on=["Echelon", "Year", "Month"], how="left")
+
+    ordering_cost = node_parameters(merged_df["Echelon"], ordering_costs)
+    holding_cost = node_parameters(merged_df["Echelon"], holding_costs)
+    quantity = merged_df["Quantity"].to_numpy(dtype=float)
+    cycle_time = merged_df["cycle_time_in_days"].to_numpy(dtype=float)
+    # holding cost is per unit-month; cycle time is in calendar days of the order's month
+    month_days = days_in_month(merged_df["Year"], merged_df["Month"])
+    merged_df["total_cost"] = ordering_cost + (quantity / 2) * ((holding_cost * cycle_time) / month_days)
+
+    return merged_df.groupby(COST_KEYS, dropna=False)["total_cost"].sum().reset_index()
+
+
+# traced per call; schedule_stream folds every batch through schedule_costs instead
+eoq_costs = instrument("eoq_costs")(schedule_costs)
+
+
+@instrument()
+def non_eoq_costs(stock_df, echelon="Store", ordering_costs=ORDERING_COST, holding_costs=HOLDING_COST):
+    node_col, parent_col, stock_col = COST_ECHELONS[echelon]
+    cost_df = pd.DataFrame({
+        "From": stock_df[parent_col].to_numpy() if parent_col else np.nan,
+        "Echelon": stock_df[node_col].to_numpy(),
+        "Year": stock_df["Year"].to_numpy(),
+        "Month": stock_df["Month"].to_numpy(),
+    })
+    ordering_cost = node_parameters(cost_df["Echelon"], ordering_costs)
+    holding_cost = node_parameters(cost_df["Echelon"], holding_costs)
+    stock = stock_df[stock_col].to_numpy(dtype=float)
+    cost_df["total_cost"] = ordering_cost + (stock / 2) * holding_cost
+
+    return cost_df.groupby(COST_KEYS, dropna=False)["total_cost"].sum().reset_index()
+
+
+def savings_table(eoq_cost_df, non_eoq_cost_df):
+    keys = ["Level", "Echelon"]
+    eoq = eoq_cost_df.groupby(keys, sort=False)["total_cost"].sum().rename("eoq_cost")
+    non_eoq = non_eoq_cost_df.groupby(keys, sort=False)["total_cost"].sum().rename("non_eoq_cost")
+    savings_df = pd.concat([eoq, non_eoq], axis=1).fillna(0.0).reset_index()
+    savings_df["savings"] = savings_df["non_eoq_cost"] - savings_df["eoq_cost"]
+    return savings_df
+
+
+cost_savings = instrument("cost_savings")(savings_table)
+
+
+def eoq_cost_table(store_schedule_df, warehouse_schedule_df, dc_schedule_df, store_demand_df, warehouse_demand_df,
+                   dc_demand_df, ordering_costs=ORDERING_COST, holding_costs=HOLDING_COST):
+    inputs = {
+        "Store": (store_schedule_df, store_demand_df),
+        "Warehouse": (warehouse_schedule_df, warehouse_demand_df),
+        "DC": (dc_schedule_df, dc_demand_df),
+    }
+    frames = [eoq_costs(schedule_df, metrics_df, echelon, ordering_costs, holding_costs).assign(Level=echelon)
+              for echelon, (schedule_df, metrics_df) in inputs.items()]
+    return pd.concat(frames, ignore_index=True)[COST_COLUMNS]
+
+
+def stack_cost_tables(store_cost_df, warehouse_cost_df, dc_cost_df):
+    # per-echelon cost rows (e.g. from the streamed schedules) as one table in eoq_cost_table's order
+    return pd.concat([store_cost_df, warehouse_cost_df, dc_cost_df], ignore_index=True)[COST_COLUMNS]
+
+
+def non_eoq_cost_table(warehouse_store_distribution, dc_warehouse_distribution, dc_demand_df,
+                       ordering_costs=ORDERING_COST, holding_costs=HOLDING_COST):
+    inputs = {
+        "Store": warehouse_store_distribution,
+        "Warehouse": dc_warehouse_distribution,
+        "DC": dc_demand_df,
+    }
+    frames = [non_eoq_costs(stock_df, echelon, ordering_costs, holding_costs).assign(Level=echelon)
+              for echelon, stock_df in inputs.items()]
+    return pd.concat(frames, ignore_index=True)[COST_COLUMNS]
+
+
+@instrument()
+def compare_costs(store_demand_df, warehouse_demand_df, dc_demand_df, store_schedule_df, warehouse_schedule_df,
+                  warehouse_store_distribution, dc_warehouse_distribution, ordering_costs=ORDERING_COST,
+                  holding_costs=HOLDING_COST, dc_schedule_df=None):
+    # EOQ vs non-EOQ cost for every echelon plus the per-node savings
+    if dc_schedule_df is None:
+        dc_schedule_df = dc_schedule.dcs_schedule(dc_demand_df)
+    eoq_cost_df = eoq_cost_table(store_schedule_df, warehouse_schedule_df, dc_schedule_df, store_demand_df,
+                                 warehouse_demand_df, dc_demand_df, ordering_costs, holding_costs)
+    non_eoq_cost_df = non_eoq_cost_table(warehouse_store_distribution, dc_warehouse_distribution, dc_demand_df,
+                                         ordering_costs, holding_costs)
+    return eoq_cost_df, non_eoq_cost_df, cost_savings(eoq_cost_df, non_eoq_cost_df)
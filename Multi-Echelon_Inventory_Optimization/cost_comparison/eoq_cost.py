@@ -1,39 +1,5 @@
-import pandas as pd
-from schedules import store_schedule
-from Preassumptions import HOLDING_COST, ORDERING_COST, CODE_MAP
-from echelon_aggregation import Store
-
-def eoq_cost_function(df, cyc_df):
-
-    calc_df = df.copy().reset_index(drop=True)
-    cycle_df = cyc_df.copy().reset_index(drop=True)
-
-    cycle_df.rename(columns={"Store": "Echelon"}, inplace=True)
-
-    merged_df = pd.merge(
-        calc_df,
-        cycle_df[["Echelon", "Year", "Month", "cycle_time_in_days"]],
-        on=["Echelon", "Year", "Month"],
-        how="left"
-    )
-
-    total_costs = []
-    for i, row in merged_df.iterrows():
-        echelon_code = row["Echelon"]
-        echelon_name = CODE_MAP[echelon_code]
-        holding_cost = HOLDING_COST[echelon_name]
-        ordering_cost = ORDERING_COST[echelon_name]
-        quantity = row["Quantity"]
-        cycle_time = row["cycle_time_in_days"]
-
-        total_cost = ordering_cost + (quantity / 2) * ((holding_cost * cycle_time) / 30)
-        total_costs.append(total_cost)
-
-    merged_df["total_cost"] = total_costs
-
-    monthly_total_cost_df = merged_df.groupby(
-        ["From", "Echelon", "Year", "Month"]
-    )["total_cost"].sum().reset_index()
-
-    return monthly_total_cost_df
+from Preassumptions import HOLDING_COST, ORDERING_COST
+from cost_comparison import cost_engine
 
+def eoq_cost_function(df, cyc_df, ordering_costs=ORDERING_COST, holding_costs=HOLDING_COST, echelon="Store"):
+    return cost_engine.eoq_costs(df, cyc_df, echelon, ordering_costs, holding_costs)
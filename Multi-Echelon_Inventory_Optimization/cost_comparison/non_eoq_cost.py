@@ -1,26 +1,5 @@
-from Preassumptions import HOLDING_COST, ORDERING_COST, CODE_MAP
-import pandas as pd
+from Preassumptions import HOLDING_COST, ORDERING_COST
+from cost_comparison import cost_engine
 
-def non_eoq_cost_function(df):
-    cost_df = df.copy()
-
-    cost_df["Echelon"] = cost_df["Store"]
-    cost_df["From"] = cost_df["Warehouse"]
-
-    cost_df["total_cost"] = 0.0
-
-    for i in range(len(cost_df)):
-        echelon_code = cost_df.loc[i, "Echelon"]
-        echelon_name = CODE_MAP[echelon_code]
-
-        holding_cost = HOLDING_COST[echelon_name]
-        ordering_cost = ORDERING_COST[echelon_name]
-        stock = cost_df.loc[i, "store_total_stock"]
-        cycle_days = cost_df.loc[i, "cycle_time_in_days"]
-
-        total_cost = ordering_cost + (stock / 2) * (holding_cost )
-        cost_df.loc[i, "total_cost"] = total_cost
-
-    final_cost_df = cost_df.groupby(["From", "Echelon", "Year", "Month"])["total_cost"].sum().reset_index()
-
-    return final_cost_df
+def non_eoq_cost_function(df, ordering_costs=ORDERING_COST, holding_costs=HOLDING_COST, echelon="Store"):
+    return cost_engine.non_eoq_costs(df, echelon, ordering_costs, holding_costs)
@@ -1,70 +1,95 @@
+import logging
+import numpy as np
 import pandas as pd
+from inventory_common.resampling import week_to_month
+from demand_stats import ROLLING_WINDOW,rolling_demand_stats
 
-def aggregate_store_monthly(df_main, date_col='TimeWeek', value_col='Actual'):
-    df = df_main.copy()
-    df['Year'] = df[date_col].dt.year
-    df['Month'] = df[date_col].dt.month
-    store_monthly = df.groupby(['Store', 'Year', 'Month'])[value_col].sum().reset_index()
-    store_warehouse_ref = df[['Store', 'Warehouse']].drop_duplicates()
-
-    rolling_result = (
-    df
-    .groupby(['Store'])  
-    .apply(lambda g: g.sort_values(['Year', 'Month']).set_index(['Year', 'Month'])[[value_col]]
-                .rolling(window=3, min_periods=1)
-                .mean()
-                .reset_index())
-                .reset_index(drop=True))
-    df['std_demand'] = rolling_result[value_col]
-    store_monthly.rename(columns={value_col: 'Store_Monthly_Demand'}, inplace=True)
-    store_monthly["std_demand"]=df["std_demand"]
-
-    store_monthly = store_monthly.merge(store_warehouse_ref, on='Store', how='left')
-
-
-    print(f"Store-level monthly aggregation: {store_monthly.shape}")
-    return store_monthly
-
-
-def aggregate_warehouse_monthly(df_main, date_col='TimeWeek', value_col='Actual'):
-    df = df_main.copy()
-    df['Year'] = df[date_col].dt.year
-    df['Month'] = df[date_col].dt.month
-    Warehouse_monthly = df.groupby(['Warehouse', 'Year', 'Month'])[value_col].sum().reset_index()
-    Warehouse_DC_ref = df[['DC', 'Warehouse']].drop_duplicates()
-
-    rolling_result = (
-    df
-    .groupby(['Warehouse'])  
-    .apply(lambda g: g.sort_values(['Year', 'Month']).set_index(['Year', 'Month'])[[value_col]]
-                .rolling(window=3, min_periods=1)
-                .mean()
-                .reset_index())
-                .reset_index(drop=True))
-    df['std_demand'] = rolling_result[value_col]
-    Warehouse_monthly.rename(columns={value_col: 'Warehouse_Monthly_Demand'}, inplace=True)
-    Warehouse_monthly["std_demand"]=df["std_demand"]
-
-    Warehouse_monthly = Warehouse_monthly.merge(Warehouse_DC_ref, on='Warehouse', how='left')
-
-    print(f"Warehouse-level monthly aggregation: {Warehouse_monthly.shape}")
-    return Warehouse_monthly
-
-
-def aggregate_dc_monthly(df_main, date_col='TimeWeek', value_col='Actual'):
-    df = df_main.copy()
-    df['Year'] = df[date_col].dt.year
-    df['Month'] = df[date_col].dt.month
-    dc_monthly = df.groupby(['DC', 'Year', 'Month'])[value_col].sum().reset_index()
-    rolling_result = (
-    df.groupby(['DC'])  
-    .apply(lambda g: g.sort_values(['Year', 'Month']).set_index(['Year', 'Month'])[[value_col]]
-                .rolling(window=3, min_periods=1)
-                .mean()
-                .reset_index())
-                .reset_index(drop=True))
-    df['std_demand'] = rolling_result[value_col]
-    dc_monthly["std_demand"]=df["std_demand"]    
-    dc_monthly.rename(columns={value_col: 'DC_Monthly_Demand'}, inplace=True)
-    print(f"DC-level monthly aggregation: {dc_monthly.shape}")
-    return dc_monthly
+logger = logging.getLogger(__name__)
+
+# echelon -> (node key columns, monthly demand column, upstream columns kept on the table); stores keep
+# the DC their warehouse is supplied from, as the input lanes give it
+ECHELON_LEVELS = {
+    "Store": (["Store", "Warehouse", "DC"], "Store_Monthly_Demand", ["Warehouse", "DC"]),
+    "Warehouse": (["Warehouse", "DC"], "Warehouse_Monthly_Demand", ["DC"]),
+    "DC": (["DC"], "DC_Monthly_Demand", []),
+}
+
+
+def rolling_stats(monthly, node_cols, demand_col, window):
+    # each node-month's mean and std over its last `window` months, from the online accumulator
+    mean, std = rolling_demand_stats(monthly, node_cols, demand_col, window)
+    monthly["rolling_mean_demand"] = mean
+    monthly["std_demand"] = np.nan_to_num(std, nan=0.0)
+    return monthly
+
+
+def stored_stats(monthly, node_col, stats):
+    # each node-month's mean and std from the persisted accumulator (demand_stats.update_demand_stats);
+    # False, leaving monthly as it is, when the stored months do not cover every row
+    merged = monthly[[node_col, "Year", "Month"]].merge(
+        stats[[node_col, "Year", "Month", "window_mean", "window_std"]], on=[node_col, "Year", "Month"], how="left")
+    if merged["window_mean"].isna().any():
+        return False
+    monthly["rolling_mean_demand"] = merged["window_mean"].to_numpy()
+    monthly["std_demand"] = np.nan_to_num(merged["window_std"].to_numpy(), nan=0.0)
+    return True
+
+
+def lane_monthly(df_main, date_col='TimeWeek', value_col='Actual'):
+    # the only pass over the input rows; weeks crossing a month end are split by their days in each month
+    return week_to_month(df_main, date_col, value_col, key_cols=["DC", "Warehouse", "Store"])
+
+
+def echelon_monthly(lane_monthly_df, echelon, value_col='Actual', window=ROLLING_WINDOW, stats=None):
+    # one echelon's monthly table rolled up from the lane totals; stats: the echelon's stored node-month
+    # statistics, which replace the rescan of its history
+    node_cols, demand_col, parent_cols = ECHELON_LEVELS[echelon]
+    monthly = (
+        lane_monthly_df.groupby(node_cols + ["Year", "Month"], sort=True)[value_col].sum()
+        .reset_index()
+        .rename(columns={value_col: demand_col})
+    )
+    if stats is None or not stored_stats(monthly, echelon, stats):
+        if stats is not None:
+            logger.warning("%s: stored demand statistics miss some node-months; rescanning the history", echelon)
+        monthly = rolling_stats(monthly, node_cols, demand_col, window)
+    monthly = monthly[[echelon, "Year", "Month", demand_col, "rolling_mean_demand", "std_demand"] + parent_cols]
+    logger.info("%s-level monthly aggregation: %s", echelon, monthly.shape)
+    return monthly
+
+
+def aggregate_monthly(df_main, date_col='TimeWeek', value_col='Actual', window=ROLLING_WINDOW, stats=None):
+    # every echelon rolls up from the same lane table; stats: {echelon: stored node-month statistics}
+    lanes = lane_monthly(df_main, date_col, value_col)
+    stats = stats or {}
+    tables = {echelon: echelon_monthly(lanes, echelon, value_col, window, stats.get(echelon)) for echelon in ECHELON_LEVELS}
+    return tables["Store"], tables["Warehouse"], tables["DC"]
+
+
+def _combine_weekly(frames, keys, value_col):
+    combined = pd.concat(frames, ignore_index=True)
+    return combined.groupby(keys, observed=True, sort=False)[value_col].sum().reset_index()
+
+
+def aggregate_chunks(chunks, date_col='TimeWeek', value_col='Actual', item_col='ItemStat_Item', compact_rows=2_000_000):
+    # Reduces a stream of typed input chunks to one row per node/item/week, so the
+    # raw file never has to be held in memory; the result feeds aggregate_monthly.
+    partials = []
+    pending_rows = 0
+    keys = None
+    for chunk in chunks:
+        if keys is None:
+            keys = ['DC', 'Warehouse', 'Store'] + ([item_col] if item_col in chunk.columns else []) + [date_col]
+        partials.append(chunk.groupby(keys, observed=True, sort=False)[value_col].sum().reset_index())
+        pending_rows += len(partials[-1])
+        if pending_rows > compact_rows:
+            partials = [_combine_weekly(partials, keys, value_col)]
+            pending_rows = len(partials[0])
+
+    if keys is None:
+        raise ValueError("No input chunks to aggregate.")
+    weekly = _combine_weekly(partials, keys, value_col).sort_values(keys, ignore_index=True)
+    if item_col in weekly.columns:
+        weekly[item_col] = weekly[item_col].astype("category")
+    logger.info("Chunked weekly aggregation: %s", weekly.shape)
+    return weekly
@@ -2,6 +2,34 @@ import pandas as pd
 import os
 from .file_type_enum import FileType
 
+WEEK_FORMAT = "%d-%b-%y"
+
+# raw column name -> dtype; node codes as ints, repeated labels as categories.
+# The item code stays a string so leading zeros survive.
+INPUT_SCHEMA = {
+    "Version.[Version Name]": "category",
+    "DC": "int32",
+    "Warehouse": "int32",
+    "Store": "int32",
+    "Time.[Week]": "str",
+    "Item.[Stat Item]": "category",
+    "Actual": "float64",
+}
+
+
+def clean_column_name(col):
+    return col.strip().replace(" ", "_").replace(".", "").replace("[", "").replace("]", "")
+
+
+def clean_columns(df):
+    df.columns = (
+        df.columns.str.strip()
+                  .str.replace(r'\s+', '_', regex=True)
+                  .str.replace(r'[\[\]\.]+', '', regex=True)
+    )
+    return df
+
+
 def load_file_as_dataframe(file_path, date_col=None):
     ext = os.path.splitext(file_path)[-1].lower()
 
@@ -10,14 +38,10 @@ def load_file_as_dataframe(file_path, date_col=None):
         reader = FileType.get_reader(ext)
         df = reader(file_path)
 
-        df.columns = (
-            df.columns.str.strip()
-                      .str.replace(r'\s+', '_', regex=True)
-                      .str.replace(r'[\[\]\.]+', '', regex=True)
-        )
+        df = clean_columns(df)
 
         if date_col:
-            cleaned_date_col = date_col.strip().replace(" ", "_").replace(".", "").replace("[", "").replace("]", "")
+            cleaned_date_col = clean_column_name(date_col)
             if cleaned_date_col in df.columns:
                 df[cleaned_date_col] = pd.to_datetime(df[cleaned_date_col], errors='coerce')
             else:
@@ -29,3 +53,58 @@ def load_file_as_dataframe(file_path, date_col=None):
     except Exception as e:
         print(f"Error loading file: {e}")
         return pd.DataFrame()
+
+
+def _apply_schema(df, schema, date_col, date_format):
+    # Parquet/Feather chunks already carry their types; this only casts what differs
+    casts = {col: dtype for col, dtype in schema.items() if col in df.columns and col != date_col}
+    df = df.astype(casts)
+    if date_col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[date_col]):
+        df[date_col] = pd.to_datetime(df[date_col], format=date_format)
+    return clean_columns(df)
+
+
+def _csv_options(file_type, schema, engine):
+    options = {"encoding": "utf-8", "engine": engine, "dtype": schema, "usecols": list(schema)}
+    if file_type == FileType.TSV:
+        options["sep"] = "\t"
+    return options
+
+
+def load_typed_dataframe(file_path, schema=INPUT_SCHEMA, date_col="Time.[Week]", date_format=WEEK_FORMAT, engine="c"):
+    ext = os.path.splitext(file_path)[-1].lower()
+    file_type = FileType.from_extension(ext)
+
+    if file_type in (FileType.CSV, FileType.TSV):
+        df = pd.read_csv(file_path, **_csv_options(file_type, schema, engine))
+    elif file_type == FileType.PARQUET:
+        df = pd.read_parquet(file_path, columns=list(schema))
+    elif file_type == FileType.FEATHER:
+        df = pd.read_feather(file_path, columns=list(schema))
+    else:
+        raise ValueError(f"Typed loading is not supported for {ext} files")
+
+    return _apply_schema(df, schema, date_col, date_format)
+
+
+def iter_file_chunks(file_path, chunk_size=500_000, schema=INPUT_SCHEMA, date_col="Time.[Week]", date_format=WEEK_FORMAT):
+    ext = os.path.splitext(file_path)[-1].lower()
+    file_type = FileType.from_extension(ext)
+
+    if file_type in (FileType.CSV, FileType.TSV):
+        # only the C engine supports chunked reads
+        with pd.read_csv(file_path, chunksize=chunk_size, **_csv_options(file_type, schema, "c")) as reader:
+            for chunk in reader:
+                yield _apply_schema(chunk, schema, date_col, date_format)
+    elif file_type == FileType.PARQUET:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size, columns=list(schema)):
+            yield _apply_schema(batch.to_pandas(), schema, date_col, date_format)
+    elif file_type == FileType.FEATHER:
+        import pyarrow as pa
+        with pa.memory_map(str(file_path)) as source:
+            table = pa.ipc.open_file(source).read_all().select(list(schema))
+            for batch in table.to_batches(max_chunksize=chunk_size):
+                yield _apply_schema(batch.to_pandas(), schema, date_col, date_format)
+    else:
+        raise ValueError(f"Chunked loading is not supported for {ext} files")
@@ -0,0 +1,88 @@
+import uuid
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_SHEET_NAME_LIMIT = 31
+
+
+class OutputType(Enum):
+    PARQUET = ('parquet', '.parquet', lambda df, path: df.to_parquet(path, index=False))
+    CSV = ('csv', '.csv', lambda df, path: df.to_csv(path, index=False))
+    XLSX = ('xlsx', '.xlsx', None)
+
+    def __init__(self, format_name, extension, writer_function):
+        self.format_name = format_name
+        self.extension = extension
+        self.writer_function = writer_function
+
+    @staticmethod
+    def from_name(name):
+        for output_type in OutputType:
+            if name.lower() == output_type.format_name:
+                return output_type
+        raise ValueError(f"Unsupported output format: {name}")
+
+
+def _sheet_name(name, part):
+    suffix = "" if part == 0 else f"_{part + 1}"
+    return name[:EXCEL_SHEET_NAME_LIMIT - len(suffix)] + suffix
+
+
+def write_workbook(frames, path):
+    # xlsxwriter in constant_memory mode flushes each row as soon as the next one starts,
+    # so rows are written in order and frames longer than the Excel limit spill onto extra sheets
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(str(path), {
+        "constant_memory": True,
+        "nan_inf_to_errors": True,
+        "default_date_format": "yyyy-mm-dd",
+    })
+    try:
+        rows_per_sheet = EXCEL_MAX_ROWS - 1
+        for name, df in frames.items():
+            for part, start in enumerate(range(0, max(len(df), 1), rows_per_sheet)):
+                worksheet = workbook.add_worksheet(_sheet_name(name, part))
+                worksheet.write_row(0, 0, [str(col) for col in df.columns])
+                chunk = df.iloc[start:start + rows_per_sheet]
+                for row_idx, row in enumerate(chunk.itertuples(index=False, name=None), start=1):
+                    worksheet.write_row(row_idx, 0, row)
+    finally:
+        workbook.close()
+    return path
+
+
+def write_outputs(outputs, output_format="parquet", max_workers=4, workbook_path=None):
+    # outputs: {name: (frame, directory)}; every frame is an independent file except for
+    # the xlsx sink, which gathers them into one workbook at workbook_path
+    output_type = OutputType.from_name(output_format)
+
+    if output_type == OutputType.XLSX:
+        if workbook_path is None:
+            raise ValueError("workbook_path is required for the xlsx output format")
+        frames = {name: frame for name, (frame, _) in outputs.items()}
+        return [write_workbook(frames, workbook_path)]
+
+    def write(item):
+        name, (frame, directory) = item
+        path = Path(directory) / f"{name}{output_type.extension}"
+        output_type.writer_function(frame, path)
+        return path
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(write, outputs.items()))
+
+
+def write_partition(frame, directory, partition, output_format="parquet"):
+    # one batch as its own file under directory/partition; files are uniquely named, so batches of the
+    # same partition from several items or processes land side by side. Parquet readers pick the
+    # whole directory up as one dataset.
+    output_type = OutputType.from_name(output_format)
+    if output_type == OutputType.XLSX:
+        raise ValueError("Partitioned output supports the parquet and csv formats only")
+    path = Path(directory) / str(partition) / f"part-{uuid.uuid4().hex}{output_type.extension}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    output_type.writer_function(frame, path)
+    return path
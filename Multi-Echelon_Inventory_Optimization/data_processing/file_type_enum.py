@@ -2,10 +2,12 @@ from enum import Enum
 import pandas as pd
 
 class FileType(Enum):
-    CSV = ('.csv', lambda path: pd.read_csv(path, encoding='utf-8', engine='python'))
+    CSV = ('.csv', lambda path: pd.read_csv(path, encoding='utf-8', engine='c'))
     TSV = ('.tsv', lambda path: pd.read_csv(path, sep='\t', encoding='utf-8'))
     XLS = ('.xls', lambda path: pd.read_excel(path, engine='openpyxl'))
     XLSX = ('.xlsx', lambda path: pd.read_excel(path, engine='openpyxl'))
+    PARQUET = ('.parquet', lambda path: pd.read_parquet(path))
+    FEATHER = ('.feather', lambda path: pd.read_feather(path))
 
     def __init__(self, extension, reader_function):
         self.extension = extension
@@ -17,3 +19,10 @@ class FileType(Enum):
             if ext == filetype.extension:
                 return filetype.reader_function
         raise ValueError(f"Unsupported file extension: {ext}")
+
+    @staticmethod
+    def from_extension(ext):
+        for filetype in FileType:
+            if ext == filetype.extension:
+                return filetype
+        raise ValueError(f"Unsupported file extension: {ext}")
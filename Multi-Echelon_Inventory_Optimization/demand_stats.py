@@ -0,0 +1,338 @@
+import json
+import shutil
+import uuid
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from inventory_common.resampling import split_weeks_by_month
+
+# Running monthly demand statistics per key (node, or item and node), held as one array per field so
+# every update is a handful of vectorised operations over the keys it touches:
+#   - Welford count/mean/M2 over the whole history
+#   - exponentially weighted sums (weight, squared weight, value, squared value) with decay 1 - alpha
+#   - a ring buffer of the last `window` months, for the rolling mean/std the metrics tables use
+# All three merge exactly, so partitions built in parallel combine into the state one pass would give.
+# Weekly rows fold into a key's open month, which is committed once a later month arrives.
+
+ROLLING_WINDOW = 3
+EWM_ALPHA = 0.3
+STATE_FIELDS = ["period", "count", "mean", "m2", "ewm_weight", "ewm_weight2", "ewm_sum", "ewm_sum2",
+                "ring_count", "ring_position", "open_period", "open_value"]
+STAT_COLUMNS = ["count", "mean", "std", "ewm_mean", "ewm_std", "window_mean", "window_std"]
+# per committed (key, month), kept by update_demand_stats for the monthly tables
+HISTORY_COLUMNS = ["Year", "Month", "window_mean", "window_std"]
+
+
+def _periods(year, month):
+    return np.asarray(year, dtype="int64") * 12 + np.asarray(month, dtype="int64") - 1
+
+
+class DemandStats:
+    def __init__(self, key_cols, window=ROLLING_WINDOW, alpha=EWM_ALPHA):
+        self.key_cols = list(key_cols)
+        self.window = window
+        self.alpha = alpha
+        self.keys = pd.MultiIndex.from_arrays([[] for _ in self.key_cols], names=self.key_cols)
+        # period: last committed month (Year*12+Month-1), -1 before the first; open_period likewise for weekly rows
+        self.state = {field: np.zeros(0, dtype="int64" if field in ("period", "count", "ring_count", "ring_position", "open_period")
+                                      else float) for field in STATE_FIELDS}
+        self.ring = np.zeros((0, window))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _ids(self, frame):
+        # key ids of the frame's rows, appending keys seen for the first time
+        keys = pd.MultiIndex.from_frame(frame[self.key_cols])
+        ids = self.keys.get_indexer(keys)
+        if (ids < 0).any():
+            new_keys = keys[ids < 0].unique()
+            self.keys = self.keys.append(new_keys)
+            for field, values in self.state.items():
+                fill = -1 if field in ("period", "open_period") else 0
+                self.state[field] = np.concatenate([values, np.full(len(new_keys), fill, dtype=values.dtype)])
+            self.ring = np.concatenate([self.ring, np.zeros((len(new_keys), self.window))])
+            ids = self.keys.get_indexer(keys)
+        return ids
+
+    def _push(self, ids, values):
+        # one new month per key in ids (no key twice)
+        s = self.state
+        count = s["count"][ids] + 1
+        delta = values - s["mean"][ids]
+        mean = s["mean"][ids] + delta / count
+        s["m2"][ids] += delta * (values - mean)
+        s["mean"][ids] = mean
+        s["count"][ids] = count
+
+        decay = 1.0 - self.alpha
+        s["ewm_weight"][ids] = decay * s["ewm_weight"][ids] + 1.0
+        s["ewm_weight2"][ids] = decay * decay * s["ewm_weight2"][ids] + 1.0
+        s["ewm_sum"][ids] = decay * s["ewm_sum"][ids] + values
+        s["ewm_sum2"][ids] = decay * s["ewm_sum2"][ids] + values * values
+
+        self.ring[ids, s["ring_position"][ids]] = values
+        s["ring_position"][ids] = (s["ring_position"][ids] + 1) % self.window
+        s["ring_count"][ids] = np.minimum(s["ring_count"][ids] + 1, self.window)
+
+    def stats(self, ids=None):
+        # STAT_COLUMNS for the given key ids (all keys by default); a std needs two months and is NaN before
+        ids = np.arange(len(self.keys)) if ids is None else np.asarray(ids)
+        return pd.DataFrame(self._stat_arrays(ids))
+
+    def _stat_arrays(self, ids):
+        s = self.state
+        count = s["count"][ids]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            std = np.sqrt(s["m2"][ids] / (count - 1))
+            weight = s["ewm_weight"][ids]
+            ewm_mean = s["ewm_sum"][ids] / weight
+            # bias-corrected weighted variance, as pandas ewm(alpha=..., adjust=True).var()
+            biased = np.maximum(s["ewm_sum2"][ids] / weight - ewm_mean * ewm_mean, 0.0)
+            ewm_std = np.sqrt(biased * weight * weight / (weight * weight - s["ewm_weight2"][ids]))
+
+            filled = s["ring_count"][ids]
+            valid = np.arange(self.window) < filled[:, None]
+            ring = np.where(valid, self.ring[ids], 0.0)
+            window_mean = ring.sum(axis=1) / filled
+            window_std = np.sqrt(np.where(valid, (ring - window_mean[:, None]) ** 2, 0.0).sum(axis=1) / (filled - 1))
+        return {
+            "count": count,
+            "mean": np.where(count > 0, s["mean"][ids], np.nan),
+            "std": np.where(count > 1, std, np.nan),
+            "ewm_mean": ewm_mean,
+            "ewm_std": np.where(count > 1, ewm_std, np.nan),
+            "window_mean": window_mean,
+            "window_std": np.where(filled > 1, window_std, np.nan),
+        }
+
+    def update(self, frame, value_col, year_col="Year", month_col="Month"):
+        # Commits one total per (key, month) row; a key's months must come after the ones it already holds.
+        # Returns STAT_COLUMNS as they stood right after each row's month, aligned with the frame's rows.
+        ids = self._ids(frame)
+        periods = _periods(frame[year_col], frame[month_col])
+        values = frame[value_col].to_numpy(dtype=float)
+        order = np.lexsort((periods, ids))
+        ids, periods, values = ids[order], periods[order], values[order]
+
+        first = np.r_[True, ids[1:] != ids[:-1]]
+        previous = np.where(first, self.state["period"][ids], np.r_[-1, periods[:-1]])
+        if (periods <= previous).any():
+            raise ValueError("DemandStats.update needs each key's months in increasing order after its committed months")
+
+        # the months of every key are pushed together: first months, then second months, ...
+        start = np.flatnonzero(first)
+        rank = np.arange(len(ids)) - np.repeat(start, np.diff(np.r_[start, len(ids)]))
+        by_rank = np.argsort(rank, kind="stable")
+        bounds = np.searchsorted(rank[by_rank], np.arange(rank.max() + 2 if len(rank) else 1))
+        out = {col: np.empty(len(ids), dtype="int64" if col == "count" else float) for col in STAT_COLUMNS}
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            rows = by_rank[lo:hi]
+            self._push(ids[rows], values[rows])
+            for col, stat in self._stat_arrays(ids[rows]).items():
+                out[col][order[rows]] = stat
+        if len(ids):
+            self.state["period"][ids[start]] = periods[np.r_[start[1:], len(ids)] - 1]
+        return pd.DataFrame(out)
+
+    def add_weeks(self, frame, date_col, value_col):
+        # weekly rows split into their months (as aggregate_monthly does) and added to each key's open
+        # month; months before the newest one per key are committed, the newest stays open
+        index, year, month, share = split_weeks_by_month(frame[date_col])
+        parts = frame[self.key_cols].iloc[index].reset_index(drop=True)
+        parts["period"] = _periods(year, month)
+        parts["value"] = frame[value_col].to_numpy(dtype=float)[index] * share
+        ids = self._ids(parts)
+        open_period = self.state["open_period"]
+        if (parts["period"].to_numpy() <= self.state["period"][ids]).any():
+            raise ValueError("Weekly rows fall in a month that is already committed")
+
+        # the open months join the new rows, then every key's latest month is kept open
+        held = np.flatnonzero(open_period >= 0)
+        totals = pd.DataFrame({
+            "id": np.concatenate([held, ids]),
+            "period": np.concatenate([open_period[held], parts["period"].to_numpy()]),
+            "value": np.concatenate([self.state["open_value"][held], parts["value"].to_numpy()]),
+        }).groupby(["id", "period"], sort=True)["value"].sum().reset_index()
+        latest = ~totals["id"].duplicated(keep="last").to_numpy()
+        committed = self._commit(totals["id"].to_numpy()[~latest], totals["period"].to_numpy()[~latest],
+                                 totals["value"].to_numpy()[~latest])
+        kept = totals[latest]
+        self.state["open_period"][kept["id"].to_numpy()] = kept["period"].to_numpy()
+        self.state["open_value"][kept["id"].to_numpy()] = kept["value"].to_numpy()
+        return committed
+
+    def _commit(self, ids, period, value):
+        # updates with (key id, month, total) rows; returns them as key columns, Year, Month and STAT_COLUMNS
+        keys = self.keys[ids].to_frame(index=False).assign(Year=period // 12, Month=period % 12 + 1)
+        if not len(ids):
+            return pd.concat([keys, pd.DataFrame(columns=STAT_COLUMNS)], axis=1)
+        return pd.concat([keys, self.update(keys.assign(value=value), "value")], axis=1)
+
+    def close(self):
+        # commits every open month; returns the committed rows as add_weeks does
+        held = np.flatnonzero(self.state["open_period"] >= 0)
+        committed = self._commit(held, self.state["open_period"][held], self.state["open_value"][held])
+        self.state["open_period"][held] = -1
+        self.state["open_value"][held] = 0.0
+        return committed
+
+    def copy(self):
+        return DemandStats.from_frame(self.to_frame(), self.key_cols, self.window, self.alpha)
+
+    def merge(self, other):
+        # combines other into this state: other holds different keys, or later months of the same keys
+        if (other.key_cols, other.window, other.alpha) != (self.key_cols, self.window, self.alpha):
+            raise ValueError("Only DemandStats with the same keys, window and alpha can be merged")
+        ids = self._ids(other.keys.to_frame(index=False))
+        s, o = self.state, other.state
+        count = s["count"][ids] + o["count"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta = o["mean"] - s["mean"][ids]
+            mean = np.where(count > 0, s["mean"][ids] + delta * o["count"] / count, 0.0)
+            s["m2"][ids] += o["m2"] + np.where(count > 0, delta * delta * s["count"][ids] * o["count"] / count, 0.0)
+        s["mean"][ids] = mean
+        s["count"][ids] = count
+
+        # this side's weighted sums age by the months the other side adds
+        decay = (1.0 - self.alpha) ** o["count"]
+        for field, factor in (("ewm_weight", decay), ("ewm_weight2", decay * decay), ("ewm_sum", decay), ("ewm_sum2", decay)):
+            s[field][ids] = factor * s[field][ids] + o[field]
+
+        # the ring keeps the newest months, this side's before the other side's
+        slot = np.arange(self.window)
+        ordered = np.concatenate([self._ordered_ring(ids), other._ordered_ring(np.arange(len(other)))], axis=1)
+        valid = np.concatenate([slot >= self.window - s["ring_count"][ids][:, None], slot >= self.window - o["ring_count"][:, None]], axis=1)
+        # a stable sort moves the valid months right, oldest to newest
+        newest = np.take_along_axis(ordered, np.argsort(valid, axis=1, kind="stable")[:, -self.window:], axis=1)
+        filled = np.minimum(s["ring_count"][ids] + o["ring_count"], self.window)
+        # back to the ring layout, where a partly filled ring holds its months in slots 0..filled-1
+        columns = (slot[None, :] + (self.window - filled)[:, None]) % self.window
+        self.ring[ids] = np.take_along_axis(newest, columns, axis=1)
+        s["ring_count"][ids] = filled
+        s["ring_position"][ids] = filled % self.window
+
+        s["period"][ids] = np.maximum(s["period"][ids], o["period"])
+        has_open = o["open_period"] >= 0
+        s["open_period"][ids[has_open]] = o["open_period"][has_open]
+        s["open_value"][ids[has_open]] = o["open_value"][has_open]
+        return self
+
+    def _ordered_ring(self, ids):
+        # ring rows rotated so the months run oldest to newest, with any empty slots first
+        shift = self.state["ring_position"][ids]
+        columns = (np.arange(self.window)[None, :] + shift[:, None]) % self.window
+        return np.take_along_axis(self.ring[ids], columns, axis=1)
+
+    def to_frame(self):
+        frame = self.keys.to_frame(index=False)
+        for field, values in self.state.items():
+            frame[field] = values
+        for slot in range(self.window):
+            frame[f"ring_{slot}"] = self.ring[:, slot]
+        return frame
+
+    @classmethod
+    def from_frame(cls, frame, key_cols, window=ROLLING_WINDOW, alpha=EWM_ALPHA):
+        stats = cls(key_cols, window, alpha)
+        stats.keys = pd.MultiIndex.from_frame(frame[stats.key_cols])
+        stats.state = {field: frame[field].to_numpy().copy() for field in STATE_FIELDS}
+        stats.ring = frame[[f"ring_{slot}" for slot in range(window)]].to_numpy(dtype=float).copy()
+        return stats
+
+    def save(self, path):
+        # one parquet file; key columns, window and alpha travel in its metadata
+        table = pa.Table.from_pandas(self.to_frame(), preserve_index=False)
+        settings = json.dumps({"key_cols": list(self.key_cols), "window": self.window, "alpha": self.alpha})
+        metadata = {**(table.schema.metadata or {}), b"demand_stats": settings.encode()}
+        pq.write_table(table.replace_schema_metadata(metadata), path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        table = pq.read_table(path)
+        settings = json.loads(table.schema.metadata[b"demand_stats"])
+        key_cols, window, alpha = settings["key_cols"], settings["window"], settings["alpha"]
+        return cls.from_frame(table.to_pandas(), key_cols, window, alpha)
+
+
+def rolling_demand_stats(monthly, key_cols, demand_col, window=ROLLING_WINDOW):
+    # window mean/std of every (key, month) row as of that month, in one online pass
+    stats = DemandStats(key_cols, window).update(monthly, demand_col)
+    return stats["window_mean"].to_numpy(), stats["window_std"].to_numpy()
+
+
+def _history_path(path, echelon):
+    return path / f"{echelon.lower()}_history"
+
+
+def _covers(stats, frame):
+    # whether every key of frame is already held
+    keys = pd.MultiIndex.from_frame(frame[stats.key_cols].drop_duplicates())
+    return bool((stats.keys.get_indexer(keys) >= 0).all())
+
+
+def update_demand_stats(df, path, echelons=("DC", "Warehouse", "Store"), date_col="TimeWeek", value_col="Actual",
+                        item_col=None, window=ROLLING_WINDOW):
+    # Persisted per-echelon accumulators (one state file each under path) fed only the weeks after the
+    # last run's newest week. Rows for weeks at or before that watermark are taken as already counted, so
+    # corrections to them need the directory removed; an input holding nodes the state has never seen
+    # (another file) starts it over. Every committed month's rolling mean/std is appended to a history,
+    # so the monthly tables read them instead of rescanning the input.
+    # Returns (every node's statistics over its committed months, {echelon: HISTORY_COLUMNS per node-month}),
+    # the second including each node's newest month, which the state keeps open.
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    manifest_path = path / "manifest.json"
+    item_keys = [item_col] if item_col and item_col in df.columns else []
+    if item_keys:
+        df = df.assign(**{item_col: df[item_col].astype(str)})
+    echelons = [echelon for echelon in echelons if echelon in df.columns]
+
+    watermark = json.loads(manifest_path.read_text())["watermark"] if manifest_path.exists() else None
+    states = {echelon: DemandStats(item_keys + [echelon], window) for echelon in echelons}
+    if watermark is not None:
+        counted = df[df[date_col] <= pd.Timestamp(watermark)]
+        for echelon in echelons:
+            state_path = path / f"{echelon.lower()}_stats.parquet"
+            if not state_path.exists():
+                watermark = None
+                break
+            states[echelon] = DemandStats.load(state_path)
+            if states[echelon].window != window or not _covers(states[echelon], counted):
+                watermark = None
+                break
+    if watermark is None:
+        # cold start: every week of the input goes through the accumulators
+        states = {echelon: DemandStats(item_keys + [echelon], window) for echelon in echelons}
+        for echelon in echelons:
+            shutil.rmtree(_history_path(path, echelon), ignore_errors=True)
+    new_rows = df if watermark is None else df[df[date_col] > pd.Timestamp(watermark)]
+
+    snapshots = []
+    monthly = {}
+    for echelon in echelons:
+        stats = states[echelon]
+        history_path = _history_path(path, echelon)
+        if len(new_rows):
+            weekly = new_rows.groupby(item_keys + [echelon, date_col], observed=True, sort=True)[value_col].sum().reset_index()
+            committed = stats.add_weeks(weekly, date_col, value_col)
+            stats.save(path / f"{echelon.lower()}_stats.parquet")
+            if len(committed):
+                history_path.mkdir(exist_ok=True)
+                committed[stats.key_cols + HISTORY_COLUMNS].to_parquet(history_path / f"part-{uuid.uuid4().hex}.parquet",
+                                                                      index=False)
+        snapshot = stats.keys.to_frame(index=False).rename(columns={echelon: "node"})
+        snapshots.append(pd.concat([snapshot, stats.stats()], axis=1).assign(echelon=echelon))
+
+        # the open months as they stand, from a copy so the stored state keeps them open
+        frames = [pd.read_parquet(history_path)] if history_path.exists() else []
+        frames.append(stats.copy().close()[stats.key_cols + HISTORY_COLUMNS])
+        monthly[echelon] = pd.concat(frames, ignore_index=True).astype({"Year": "int64", "Month": "int64",
+                                                                        "window_mean": float, "window_std": float})
+
+    if len(new_rows):
+        manifest_path.write_text(json.dumps({"watermark": str(df[date_col].max())}, indent=2))
+    return pd.concat(snapshots, ignore_index=True), monthly
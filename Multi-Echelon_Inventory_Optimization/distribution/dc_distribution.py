@@ -6,7 +6,9 @@ from Preassumptions import CODE_MAP,HOLDING_COST,LEAD_TIME,ORDERING_COST,Z_SCORE
 def dc_distribution(dc_df,warehouse_df):
     # we are merging a couple of columns from dc_df and merging it with warehouse_df
     warehouse_df=warehouse_df.merge(dc_df[["key","DC_Monthly_Demand","total_stock"]],on="key",how="left")
-    for i in range(len(warehouse_df)):
-        warehouse_df.loc[i,"demand_split"]=warehouse_df.loc[i,"Warehouse_Monthly_Demand"]/warehouse_df.loc[i,"DC_Monthly_Demand"]
-        warehouse_df.loc[i,"warehouse_total_stock"]=warehouse_df.loc[i,"demand_split"]*warehouse_df.loc[i,"total_stock"]
+    warehouse_df["demand_split"]=warehouse_df["Warehouse_Monthly_Demand"]/warehouse_df["DC_Monthly_Demand"]
+    warehouse_df["warehouse_total_stock"]=warehouse_df["demand_split"]*warehouse_df["total_stock"]
+    if "safety_stock" in warehouse_df.columns:
+        # safety stock placed per node: a warehouse holds its own demand plus its own buffer
+        warehouse_df["warehouse_total_stock"]=warehouse_df["Warehouse_Monthly_Demand"]+warehouse_df["safety_stock"]
     return warehouse_df
\ No newline at end of file
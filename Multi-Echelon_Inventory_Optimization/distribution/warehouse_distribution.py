@@ -6,7 +6,9 @@ from Preassumptions import CODE_MAP,HOLDING_COST,LEAD_TIME,ORDERING_COST,Z_SCORE
 def warehouse_distribution(warehouse_df,store_df):
     # we are merging a couple of columns from warehouse_df and merging it with store_df
     store_df=store_df.merge(warehouse_df[["key","Warehouse_Monthly_Demand","warehouse_total_stock"]],on="key",how="left")
-    for i in range(len(store_df)):
-        store_df.loc[i,"demand_split"]=store_df.loc[i,"Store_Monthly_Demand"]/store_df.loc[i,"Warehouse_Monthly_Demand"]
-        store_df.loc[i,"store_total_stock"]=store_df.loc[i,"demand_split"]*store_df.loc[i,"warehouse_total_stock"]
+    store_df["demand_split"]=store_df["Store_Monthly_Demand"]/store_df["Warehouse_Monthly_Demand"]
+    store_df["store_total_stock"]=store_df["demand_split"]*store_df["warehouse_total_stock"]
+    if "safety_stock" in store_df.columns:
+        # safety stock placed per node: a store holds its own demand plus its own buffer
+        store_df["store_total_stock"]=store_df["Store_Monthly_Demand"]+store_df["safety_stock"]
     return store_df
\ No newline at end of file
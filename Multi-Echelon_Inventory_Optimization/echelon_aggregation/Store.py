@@ -1,9 +1,9 @@
 import pandas as pd
 from operations import operations
-from Preassumptions import CODE_MAP,HOLDING_COST,LEAD_TIME,ORDERING_COST
+from Preassumptions import CODE_MAP,HOLDING_COST,LEAD_TIME,ORDERING_COST,SHORTAGE_COST
 from echelon_aggregation import common_aggregation
 
-def store_data(df):
-    echelon_df=common_aggregation.aggreagation_func(df,"Store")
+def store_data(df,ordering_cost=ORDERING_COST,holding_cost=HOLDING_COST,lead_time=LEAD_TIME,shortage_cost=SHORTAGE_COST):
+    echelon_df=common_aggregation.aggreagation_func(df,"Store",ordering_cost,holding_cost,lead_time,shortage_cost)
     return echelon_df
 
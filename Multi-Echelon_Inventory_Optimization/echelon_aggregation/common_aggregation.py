@@ -1,8 +1,41 @@
 import pandas as pd
-from operations import operations
-from Preassumptions import CODE_MAP,HOLDING_COST,LEAD_TIME,ORDERING_COST,Z_SCORE
+import batch_operations
+import rq_policy
+from node_registry import get_registry,period_key
+from inventory_common.resampling import days_in_month
+from Preassumptions import CODE_MAP,FILL_RATE,HOLDING_COST,LEAD_TIME,ORDERING_COST,SHORTAGE_COST,Z_SCORE
+from config import inventory_policy,rq_objective
 
-def aggreagation_func(df,echelon):
+def policy_metrics(echelon,demand,std_demand,ordering_costs,holding_costs,lead_times,shortage_costs,month_days):
+    # METRIC_COLUMNS for one echelon's rows under the configured inventory policy
+    if inventory_policy=="rq":
+        # every node holds its own (r, Q) safety stock
+        metrics = rq_policy.rq_metrics(
+            demand,
+            ordering_costs,
+            holding_costs,
+            lead_times,
+            std_demand,
+            shortage_cost=shortage_costs,
+            fill_rate=FILL_RATE,
+            objective=rq_objective,
+            days_in_month=month_days,
+        )
+        if echelon!="DC":
+            # the distribution stage builds warehouse and store totals from their safety stock
+            metrics.pop("total_stock")
+        return metrics
+    return batch_operations.eoq_metrics(
+        demand,
+        ordering_costs,
+        holding_costs,
+        lead_times,
+        std_demand=std_demand if echelon=="DC" else None,
+        z_score=Z_SCORE,
+        days_in_month=month_days,
+    )
+
+def aggreagation_func(df,echelon,ordering_cost=ORDERING_COST,holding_cost=HOLDING_COST,lead_time=LEAD_TIME,shortage_cost=SHORTAGE_COST):
     echelon_df=df
     if echelon=="Store":
         Monthly_demand="Store_Monthly_Demand"
@@ -11,33 +44,28 @@ def aggreagation_func(df,echelon):
     else:
         Monthly_demand="DC_Monthly_Demand"
 
-    for i in range(len(echelon_df)):
-
-        ordering_cost = ORDERING_COST[CODE_MAP[echelon_df.loc[i,echelon]]]
-        holding_cost = HOLDING_COST[CODE_MAP[echelon_df.loc[i,echelon]]]
-        lead_time = LEAD_TIME[CODE_MAP[echelon_df.loc[i,echelon]]]
-        
-        if echelon=="Store":
-            key = next((k for k, v in CODE_MAP.items() if v == "DC"), None)
-            echelon_df.loc[i,"DC"]=key
-        
-        # echelon_df.loc[i,"monthly_eoq"]=operations.eoq_manual(ordering_cost,holding_cost,echelon_df.loc[i,"Store_Monthly_Demand"])
-        echelon_df.loc[i,"monthly_eoq"]=operations.EOQ(ordering_cost,holding_cost,echelon_df.loc[i,f"{Monthly_demand}"])
+    registry = get_registry(CODE_MAP)
+    ids = registry.ids(echelon_df[echelon])
+    if (ids < 0).any():
+        # the parameter arrays would answer NaN for these and every metric after them
+        missing = sorted(pd.unique(echelon_df[echelon].to_numpy()[ids < 0]).tolist())
+        raise ValueError(f"{echelon} codes missing from CODE_MAP: {missing}")
+    ordering_costs = registry.parameter_array(ordering_cost)[ids]
+    holding_costs = registry.parameter_array(holding_cost)[ids]
+    lead_times = registry.parameter_array(lead_time)[ids]
 
-        echelon_df.loc[i,'cycle_time']=operations.cycle_time(echelon_df.loc[i,'monthly_eoq'],echelon_df.loc[i,f"{Monthly_demand}"])
-        echelon_df.loc[i,"cycle_time_in_days"]=operations.cycle_time_month_to_days(echelon_df.loc[i,"cycle_time"])
-        echelon_df.loc[i,"cycle_time_in_hr"]=operations.cycle_time_days_to_hrs(echelon_df.loc[i,"cycle_time_in_days"])
-        echelon_df.loc[i,"full_cycles_in_lead_time"]=operations.full_cycle_in_lead_time(lead_time,echelon_df.loc[i,"cycle_time"])
-    
-        echelon_df.loc[i,"effective_lead_time"]=operations.effective_lead_time(lead_time,echelon_df.loc[i,"full_cycles_in_lead_time"],echelon_df.loc[i,"cycle_time"])
-        echelon_df.loc[i,"reorder_point"]=operations.reorder_point(echelon_df.loc[i,f"{Monthly_demand}"],echelon_df.loc[i,"effective_lead_time"])
-        if echelon=="DC":
-            echelon_df.loc[i,"safety_stock"] = operations.safety_stock(Z_SCORE,lead_time,echelon_df.loc[i,"std_demand"])
-            echelon_df.loc[i,"total_stock"] = echelon_df.loc[i,"safety_stock"] + echelon_df.loc[i,"DC_Monthly_Demand"]
+    metrics = policy_metrics(
+        echelon,
+        echelon_df[Monthly_demand].to_numpy(dtype=float),
+        echelon_df["std_demand"].to_numpy(dtype=float),
+        ordering_costs,
+        holding_costs,
+        lead_times,
+        registry.parameter_array(shortage_cost)[ids],
+        days_in_month(echelon_df["Year"], echelon_df["Month"]),
+    )
+    for col, values in metrics.items():
+        echelon_df[col] = values
 
-        dc_val = int(echelon_df.loc[i, "DC"]) 
-        year_val = echelon_df.loc[i, "Year"]
-        month_val = echelon_df.loc[i, "Month"]
-        
-        echelon_df.loc[i, "key"] = f"{dc_val}_{year_val}_{month_val}"
+    echelon_df["key"] = period_key(echelon_df["DC"], echelon_df["Year"], echelon_df["Month"])
     return echelon_df
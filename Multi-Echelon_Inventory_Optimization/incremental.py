@@ -0,0 +1,270 @@
+import hashlib
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from app_function_call import aggregate
+from pipeline_graph import run_pipeline
+from cost_comparison import cost_engine
+from sku_pipeline import OUTPUT_NAMES,item_costs,item_stats
+from Preassumptions import CODE_MAP,FILL_RATE,HOLDING_COST,LEAD_TIME,ORDERING_COST,PARAMETER_SET,SHORTAGE_COST,Z_SCORE
+from config import item_col,safety_stock_placement,customer_service_time,supplier_service_time,inventory_policy,rq_objective
+from instrumentation import current_run,instrument,start_run
+from node_registry import period_key
+from inventory_common.resampling import split_weeks_by_month
+
+logger = logging.getLogger(__name__)
+
+LANE_KEYS = ["DC", "Warehouse", "Store", "Year", "Month"]
+# part of the fingerprint; bump when the stored outputs change layout (e.g. the key column) so old stores rebuild
+STORE_VERSION = 2
+
+MONTHLY_OUTPUTS = ["store_df", "warehouse_df", "dc_df"]
+KEYED_OUTPUTS = ["store_demand_df", "warehouse_demand_df", "dc_demand_df", "warehouse_store_distribution", "dc_warehouse_distribution"]
+# outputs keyed by (Echelon, Year, Month) and the echelons whose metrics rows they come from
+ORDER_OUTPUTS = {
+    "store_schedule_df": ["Store"],
+    "warehouse_schedule_df": ["Warehouse"],
+    "eoq_cost_df": ["Store", "Warehouse", "DC"],
+    "non_eoq_cost_df": ["Store", "Warehouse", "DC"],
+}
+METRICS_OUTPUTS = {"Store": "store_demand_df", "Warehouse": "warehouse_demand_df", "DC": "dc_demand_df"}
+SORT_COLUMNS = {
+    "store_df": ["Store", "Year", "Month"],
+    "warehouse_df": ["Warehouse", "Year", "Month"],
+    "dc_df": ["DC", "Year", "Month"],
+    "store_demand_df": ["Store", "Year", "Month"],
+    "warehouse_demand_df": ["Warehouse", "Year", "Month"],
+    "dc_demand_df": ["DC", "Year", "Month"],
+    "warehouse_store_distribution": ["Store", "Year", "Month"],
+    "dc_warehouse_distribution": ["Warehouse", "Year", "Month"],
+    "store_schedule_df": ["Echelon", "Year", "Month"],
+    "warehouse_schedule_df": ["Echelon", "Year", "Month"],
+    "eoq_cost_df": ["Level", "Echelon", "Year", "Month"],
+    "non_eoq_cost_df": ["Level", "Echelon", "Year", "Month"],
+    "cost_savings_df": ["Level", "Echelon"],
+}
+
+
+def lane_partitions(df, date_col='TimeWeek', value_col='Actual'):
+    # one row per (item, DC, Warehouse, Store, month) with its demand and an order-independent content hash
+    item_keys = [item_col] if item_col in df.columns else []
+    # a week crossing a month end belongs to both months, split as in aggregate_monthly
+    index, year, month, share = split_weeks_by_month(df[date_col])
+    row_hash = pd.util.hash_pandas_object(df[[date_col, value_col]], index=False).to_numpy()
+    lanes = pd.DataFrame({
+        **{col: df[col].astype(str).to_numpy()[index] for col in item_keys},
+        "DC": df["DC"].to_numpy()[index],
+        "Warehouse": df["Warehouse"].to_numpy()[index],
+        "Store": df["Store"].to_numpy()[index],
+        "Year": year,
+        "Month": month,
+        value_col: df[value_col].to_numpy(dtype=float)[index] * share,
+        "partition_hash": row_hash[index],
+    })
+    lanes = lanes.groupby(item_keys + LANE_KEYS, sort=True).agg(
+        **{value_col: (value_col, "sum"), "partition_hash": ("partition_hash", "sum")}
+    ).reset_index()
+    return lanes
+
+
+def parameter_fingerprint(sku_costs=None):
+    params = json.dumps({
+        "store_version": STORE_VERSION,
+        "ordering_cost": ORDERING_COST,
+        "holding_cost": HOLDING_COST,
+        "lead_time": LEAD_TIME,
+        "code_map": {str(k): v for k, v in CODE_MAP.items()},
+        "z_score": Z_SCORE,
+        "parameter_tables": PARAMETER_SET.version if PARAMETER_SET is not None else None,
+        "safety_stock_placement": [safety_stock_placement, customer_service_time, supplier_service_time],
+        "inventory_policy": [inventory_policy, rq_objective, SHORTAGE_COST, FILL_RATE],
+    }, sort_keys=True)
+    digest = hashlib.sha256(params.encode())
+    if sku_costs is not None:
+        digest.update(pd.util.hash_pandas_object(sku_costs, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class IncrementalStore:
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def load(self):
+        manifest_path = self.path / "manifest.json"
+        if not manifest_path.exists():
+            return None
+        manifest = json.loads(manifest_path.read_text())
+        lanes = pd.read_parquet(self.path / "lanes.parquet")
+        outputs = {name: pd.read_parquet(self.path / f"{name}.parquet") for name in OUTPUT_NAMES}
+        return manifest, lanes, outputs
+
+    def save(self, lanes, outputs, fingerprint):
+        self.path.mkdir(parents=True, exist_ok=True)
+        lanes.to_parquet(self.path / "lanes.parquet", index=False)
+        for name, frame in outputs.items():
+            frame.to_parquet(self.path / f"{name}.parquet", index=False)
+        manifest = {"fingerprint": fingerprint}
+        (self.path / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+
+def _key(dc, year, month):
+    return period_key(dc, year, month)
+
+
+def _changed_rows(old, new):
+    # rows of new that are not identical in old, plus rows of old that disappeared
+    if old.empty:
+        return new.iloc[:0], new
+    merged = old.merge(new, how="outer", indicator=True)
+    return merged[merged["_merge"] == "left_only"].drop(columns="_merge"), merged[merged["_merge"] == "right_only"].drop(columns="_merge")
+
+
+def _splice(old, new, keep_mask, sort_cols):
+    if old.empty:
+        return new.sort_values(sort_cols, kind="stable", ignore_index=True)
+    frame = pd.concat([old[keep_mask], new], ignore_index=True)
+    return frame.sort_values(sort_cols, kind="stable", ignore_index=True)
+
+
+def _triples(frame, node_col):
+    return pd.MultiIndex.from_arrays([frame[node_col].astype("int64"), frame["Year"].astype("int64"), frame["Month"].astype("int64")])
+
+
+def lanes_to_input(lanes, value_col='Actual'):
+    # a lane-month total stands in for its weekly rows; aggregate only needs the month
+    return pd.DataFrame({
+        "DC": lanes["DC"].to_numpy(),
+        "Warehouse": lanes["Warehouse"].to_numpy(),
+        "Store": lanes["Store"].to_numpy(),
+        "TimeWeek": pd.to_datetime(pd.DataFrame({"year": lanes["Year"], "month": lanes["Month"], "day": 1})),
+        value_col: lanes[value_col].to_numpy(),
+    })
+
+
+def run_item_delta(task):
+    item, lanes, old, ordering_cost, holding_cost, lead_time, shortage_cost, demand_stats = task
+
+    store_df,warehouse_df,dc_df=aggregate(lanes_to_input(lanes),demand_stats)
+    new_monthly = {"store_df": store_df, "warehouse_df": warehouse_df, "dc_df": dc_df}
+
+    # a (DC, year, month) key is affected when any monthly row under it changed, rolling stats included
+    store_dc = dict(zip(lanes["Store"], lanes["DC"]))
+    if not old["store_demand_df"].empty:
+        store_dc.update(zip(old["store_demand_df"]["Store"], old["store_demand_df"]["DC"]))
+    affected = set()
+    for name in MONTHLY_OUTPUTS:
+        for rows in _changed_rows(old[name], new_monthly[name]):
+            dc = rows["Store"].map(store_dc) if name == "store_df" else rows["DC"]
+            affected.update(_key(dc, rows["Year"], rows["Month"]))
+
+    if not affected:
+        return [old[name] for name in OUTPUT_NAMES], 0
+
+    def affected_rows(frame, dc):
+        return frame[np.isin(_key(dc, frame["Year"], frame["Month"]), list(affected))].reset_index(drop=True)
+
+    sub_store = affected_rows(store_df, store_df["Store"].map(store_dc))
+    sub_warehouse = affected_rows(warehouse_df, warehouse_df["DC"])
+    sub_dc = affected_rows(dc_df, dc_df["DC"])
+
+    # the monthly tables are given, so the pipeline starts at the metrics stages
+    delta = run_pipeline(ordering_cost=ordering_cost, holding_cost=holding_cost, lead_time=lead_time, shortage_cost=shortage_cost,
+                         targets=KEYED_OUTPUTS + list(ORDER_OUTPUTS), store_df=sub_store, warehouse_df=sub_warehouse, dc_df=sub_dc)
+
+    results = {name: new_monthly[name] for name in MONTHLY_OUTPUTS}
+    for name in KEYED_OUTPUTS:
+        frame = old[name]
+        keep = ~frame["key"].isin(list(affected)) if not frame.empty else None
+        results[name] = _splice(frame, delta[name], keep, SORT_COLUMNS[name])
+
+    # orders and costs are keyed by node-month; drop every one that belonged to an affected key
+    # node codes are unique across echelons, so node-month triples from several echelons can be pooled
+    node_months = {}
+    for node_col, metrics_name in METRICS_OUTPUTS.items():
+        frame = old[metrics_name]
+        if not frame.empty:
+            node_months[node_col] = _triples(frame[frame["key"].isin(list(affected))], node_col)
+    for name, node_cols in ORDER_OUTPUTS.items():
+        frame = old[name]
+        keep = None
+        if not frame.empty:
+            affected_months = node_months[node_cols[0]]
+            for node_col in node_cols[1:]:
+                affected_months = affected_months.append(node_months[node_col])
+            keep = ~_triples(frame, "Echelon").isin(affected_months)
+        results[name] = _splice(frame, delta[name], keep, SORT_COLUMNS[name])
+    results["cost_savings_df"] = cost_engine.cost_savings(results["eoq_cost_df"], results["non_eoq_cost_df"])
+
+    return [results[name] for name in OUTPUT_NAMES], len(affected)
+
+
+def _item_rows(frame, item):
+    if frame.empty or item_col not in frame.columns:
+        return frame
+    mask = frame[item_col].isna() if item is None else frame[item_col].astype(str) == item
+    return frame[mask].drop(columns=item_col).reset_index(drop=True)
+
+
+@instrument()
+def run_incremental(df, store_path, max_workers=None, chunk_size=1, sku_costs=None, date_col='TimeWeek', demand_stats=None):
+    # demand_stats: {echelon: stored node-month statistics} for the monthly tables of the recomputed items
+    store = IncrementalStore(store_path)
+    stats = item_stats(demand_stats)
+    lanes = lane_partitions(df, date_col=date_col)
+    fingerprint = parameter_fingerprint(sku_costs)
+    item_keys = [item_col] if item_col in lanes.columns else []
+
+    previous = store.load()
+    if previous is None or previous[0]["fingerprint"] != fingerprint:
+        # no usable history: every item is recomputed against empty previous outputs
+        old_lanes, old_outputs = lanes.iloc[:0], {name: pd.DataFrame() for name in OUTPUT_NAMES}
+    else:
+        _, old_lanes, old_outputs = previous
+
+    # items with any new, changed or removed lane partition
+    diff = old_lanes.merge(lanes, on=item_keys + LANE_KEYS, how="outer", suffixes=("_old", ""), indicator=True)
+    changed = diff[(diff["_merge"] != "both") | (diff["partition_hash_old"] != diff["partition_hash"])]
+    if item_keys:
+        changed_items = sorted(changed[item_col].astype(str).unique())
+        current_items = set(lanes[item_col])
+    else:
+        changed_items = [None] if len(changed) else []
+        current_items = {None}
+
+    tasks = (
+        (item, lanes if item is None else lanes[lanes[item_col] == item].reset_index(drop=True),
+         {name: _item_rows(frame, item) for name, frame in old_outputs.items()},
+         *item_costs(sku_costs, item), stats(item))
+        for item in changed_items if item in current_items
+    )
+    if max_workers == 1:
+        results = list(map(run_item_delta, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=start_run, initargs=(current_run(),)) as executor:
+            results = list(executor.map(run_item_delta, tasks, chunksize=chunk_size))
+
+    recomputed = [item for item in changed_items if item in current_items]
+    outputs = {}
+    for position, name in enumerate(OUTPUT_NAMES):
+        frames = []
+        old = old_outputs[name]
+        if not old.empty:
+            # unchanged items are carried over as they are; removed items drop out
+            if item_keys:
+                unchanged = ~old[item_col].astype(str).isin(changed_items)
+            else:
+                unchanged = pd.Series(not changed_items, index=old.index)
+            frames.append(old[unchanged])
+        for item, (frames_out, _) in zip(recomputed, results):
+            frame = frames_out[position].copy()
+            frame.insert(0, item_col, item)
+            frames.append(frame)
+        outputs[name] = pd.concat(frames, ignore_index=True) if frames else old
+
+    keys_recomputed = sum(count for _, count in results)
+    logger.info("Incremental refresh: %d changed item(s), %d DC-month(s) recomputed", len(recomputed), keys_recomputed)
+    store.save(lanes, outputs, fingerprint)
+    return outputs
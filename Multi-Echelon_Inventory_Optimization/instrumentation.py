@@ -0,0 +1,194 @@
+import cProfile
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+import pandas as pd
+from config import trace_path,trace_memory,profile_dir
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows; the RSS high-water mark is then left out
+    resource = None
+
+# id shared by every record of one entry-point call; worker pools get it through start_run as initializer
+_run_id = None
+
+# each thread keeps its own stack of open stages, so concurrently running stages nest correctly
+_local = threading.local()
+_sequence = itertools.count(1)
+_lock = threading.Lock()
+_tracemalloc_stages = 0
+
+
+def _reset_after_fork():
+    # a worker forked while another thread held the lock would otherwise never get it
+    global _lock
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def start_run(run_id=None):
+    # a fresh id per run (app.main); workers pass the parent's id on
+    global _run_id
+    _run_id = run_id or uuid.uuid4().hex[:12]
+    return _run_id
+
+
+def current_run():
+    # stages traced outside a started run (library calls, tests) get an id of their own
+    return _run_id or start_run()
+
+
+def _active_stages():
+    if not hasattr(_local, "active"):
+        _local.active = []
+    return _local.active
+
+
+def current_stage():
+    # innermost open stage of the calling thread, for work handed to another thread
+    active = _active_stages()
+    return active[-1]["stage"] if active else None
+
+
+def count_rows(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (tuple, list)):
+        counts = [count_rows(item) for item in value]
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+def _process_peak_rss_mb():
+    # the process high-water mark so far, not the stage's own use: it never comes down between stages
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _write(record, path):
+    line = json.dumps(record, default=str) + "\n"
+    with _lock, open(path, "a") as f:
+        f.write(line)
+
+
+@contextmanager
+def trace_stage(stage, rows_in=None, path=trace_path, memory=trace_memory, profile=profile_dir, parent=None):
+    # yields the record so the caller can fill in rows_out (or extra fields) before it is written;
+    # parent names the enclosing stage when the work was submitted from another thread
+    global _tracemalloc_stages
+    if path is None:
+        yield {}
+        return
+
+    _active = _active_stages()
+    record = {"run_id": current_run(), "pid": os.getpid(), "seq": next(_sequence), "stage": stage,
+              "parent": parent or (_active[-1]["stage"] if _active else None), "rows_in": rows_in, "rows_out": None}
+    use_tracemalloc = memory == "tracemalloc"
+    if use_tracemalloc:
+        # the traced heap is shared by every thread, so concurrent stages see each other's allocations
+        with _lock:
+            _tracemalloc_stages += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        if _active:
+            # an enclosing stage keeps the peak seen so far before this stage resets it
+            _active[-1]["_peak"] = max(_active[-1].get("_peak", 0), tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        record["_start_bytes"] = tracemalloc.get_traced_memory()[0]
+
+    # cProfile cannot nest, so only the outermost profiled stage of each process gets a dump
+    # (forked workers inherit the parent's active stages, hence the pid check)
+    profiler = None
+    if profile and not any("_profiler" in active and active["pid"] == record["pid"] for active in _active):
+        profiler = cProfile.Profile()
+        record["_profiler"] = profiler
+
+    _active.append(record)
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    if profiler:
+        profiler.enable()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = repr(e)
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        record["wall_s"] = time.perf_counter() - wall_start
+        record["cpu_s"] = time.process_time() - cpu_start
+        _active.pop()
+
+        if use_tracemalloc:
+            peak = max(record.pop("_peak", 0), tracemalloc.get_traced_memory()[1])
+            record["peak_mb"] = (peak - record.pop("_start_bytes")) / 2**20
+            if _active:
+                _active[-1]["_peak"] = max(_active[-1].get("_peak", 0), peak)
+            with _lock:
+                _tracemalloc_stages -= 1
+                if not _tracemalloc_stages:
+                    tracemalloc.stop()
+        record["process_peak_rss_mb"] = _process_peak_rss_mb()
+
+        if record.pop("_profiler", None):
+            os.makedirs(profile, exist_ok=True)
+            dump = os.path.join(profile, f"{record['run_id']}_{os.getpid()}_{record['seq']:05d}_{stage}.prof")
+            profiler.dump_stats(dump)
+            record["profile"] = dump
+        _write(record, path)
+
+
+def instrument(stage=None):
+    # decorator form of trace_stage; rows are counted from DataFrame arguments and results
+    def decorator(func):
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if trace_path is None:
+                return func(*args, **kwargs)
+            with trace_stage(name, rows_in=count_rows(list(args) + list(kwargs.values()))) as record:
+                result = func(*args, **kwargs)
+                record["rows_out"] = count_rows(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def load_trace(path=trace_path, run_id=None):
+    trace = pd.read_json(path, lines=True)
+    if run_id == "last" and len(trace):
+        run_id = trace["run_id"].iloc[-1]
+    if run_id is not None:
+        trace = trace[trace["run_id"] == run_id]
+    return trace
+
+
+def stage_summary(trace):
+    # per stage totals; worker records are summed, so wall_s can exceed the run's elapsed time
+    return trace.groupby("stage", sort=False).agg(
+        calls=("seq", "size"),
+        wall_s=("wall_s", "sum"),
+        cpu_s=("cpu_s", "sum"),
+        max_wall_s=("wall_s", "max"),
+        rows_in=("rows_in", "sum"),
+        rows_out=("rows_out", "sum"),
+        **({"peak_mb": ("peak_mb", "max")} if "peak_mb" in trace.columns else {}),
+        process_peak_rss_mb=("process_peak_rss_mb", "max"),
+    ).reset_index()
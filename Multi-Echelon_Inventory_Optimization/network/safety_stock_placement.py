@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+from node_registry import get_registry
+from network.supply_network import SupplyNetwork
+from instrumentation import instrument
+from Preassumptions import CODE_MAP,HOLDING_COST,LEAD_TIME,Z_SCORE
+
+# Guaranteed-service safety-stock placement over a tree where every node has one supplier.
+# Each node j quotes its children an outbound service time S_j and is quoted an inbound service
+# time SI_j by its parent; it holds z * sigma_j * sqrt(SI_j + T_j - S_j) of buffer stock. The DP
+# runs once per node (leaves first) on a grid of service times, and every array carries a leading
+# axis of network instances (item x month), so thousands of networks are solved in the same pass.
+
+# service times are searched on this grid, in months (about a week)
+SERVICE_TIME_STEP = 0.25
+# cap on the elements of one (instances, nodes, inbound, outbound) block
+BLOCK_ELEMENTS = 2**23
+
+PLACEMENT_COLUMNS = [
+    "inbound_service_time",
+    "service_time",
+    "net_replenishment_time",
+    "safety_stock",
+    "safety_stock_cost",
+]
+
+
+
+class ServiceTree:
+    def __init__(self, nodes, parents, lead_time, max_service_time):
+        # nodes in topological order (every parent before its children); parents are positions, -1 for a root
+        self.nodes = list(nodes)
+        self.parents = np.asarray(parents, dtype="int64")
+        self.lead_time = np.asarray(lead_time, dtype=float)
+        self.max_service_time = np.asarray(max_service_time, dtype=float)
+        if np.any(~np.isfinite(self.lead_time)) or np.any(self.lead_time < 0):
+            missing = [node for node, value in zip(self.nodes, self.lead_time) if not value >= 0]
+            raise ValueError(f"Nodes without a non-negative lead time: {missing}")
+
+        depth = np.zeros(len(self.nodes), dtype="int64")
+        for i, parent in enumerate(self.parents):
+            if parent >= i:
+                raise ValueError("Nodes must be ordered with every parent before its children")
+            if parent >= 0:
+                depth[i] = depth[parent] + 1
+        is_leaf = np.ones(len(self.nodes), dtype=bool)
+        is_leaf[self.parents[self.parents >= 0]] = False
+
+        # solve order: level by level, nodes with children before leaves, siblings side by side, so
+        # every block the DP reads or writes is a contiguous slice
+        self.order = np.lexsort((self.parents, is_leaf, depth))
+        rank = np.empty(len(self.order), dtype="int64")
+        rank[self.order] = np.arange(len(self.order))
+        parents = self.parents[self.order]
+        self.solve_parents = np.where(parents >= 0, rank[np.maximum(parents, 0)], -1)
+        # (start, first leaf, end) of every level in solve order
+        depth, is_leaf = depth[self.order], is_leaf[self.order]
+        self.segments = []
+        for d in range(depth.max() + 1 if len(depth) else 0):
+            start, end = np.searchsorted(depth, [d, d + 1])
+            self.segments.append((start, start + int(np.count_nonzero(~is_leaf[start:end])), end))
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @classmethod
+    def from_network(cls, network, customer_service_time=0.0):
+        # leaves serve the end customer within customer_service_time; inner nodes are unconstrained
+        nodes = [node for level in network.levels for node in level]
+        position = {node: i for i, node in enumerate(nodes)}
+        parents = [position[network.parent[node]] if node in network.parent else -1 for node in nodes]
+        leaves = set(network.leaves)
+        max_service_time = [customer_service_time if node in leaves else np.inf for node in nodes]
+        return cls(nodes, parents, [network.lead_time[node] for node in nodes], max_service_time)
+
+    def grid(self, step, supplier_service_time):
+        # lead times round up to the grid; the grid spans the longest cumulative lead time from the supplier
+        lead = np.ceil(self.lead_time / step - 1e-9).astype("int64")
+        supplier = int(np.ceil(supplier_service_time / step - 1e-9))
+        reach = np.zeros(len(self.nodes), dtype="int64")
+        for i, parent in enumerate(self.parents):
+            reach[i] = (reach[parent] if parent >= 0 else supplier) + lead[i]
+        size = int(reach.max()) + 1 if len(reach) else 1
+        with np.errstate(invalid="ignore"):
+            max_service = np.where(np.isfinite(self.max_service_time),
+                                   np.floor(self.max_service_time / step + 1e-9), size - 1)
+        return lead, np.clip(max_service, 0, size - 1).astype("int64"), supplier, size
+
+
+def _add_to_parents(children_cost, parents, cost):
+    # siblings are adjacent, so one reduceat sums every parent's children
+    if len(parents) == 0 or parents[0] < 0:
+        return
+    starts = np.flatnonzero(np.r_[True, parents[1:] != parents[:-1]])
+    children_cost[:, parents[starts]] += np.add.reduceat(cost, starts, axis=1)
+
+
+def _solve_block(tree, cost_rate, lead, max_service, supplier, size):
+    # all arrays in solve order; cost_rate: (instances, nodes) holding cost * z * sigma per unit of sqrt(time)
+    n_instances = cost_rate.shape[0]
+    grid = np.arange(size)
+    children_cost = np.zeros((n_instances, len(tree), size))
+    best = {}
+
+    for start, split, end in reversed(tree.segments):
+        if split > start:
+            # tau[node, inbound, outbound]; outbound service times past inbound + lead time are infeasible
+            inner = slice(start, split)
+            tau = grid[None, :, None] + lead[inner, None, None] - grid[None, None, :]
+            feasible = (tau >= 0) & (grid[None, None, :] <= max_service[inner, None, None])
+            total = cost_rate[:, inner, None, None] * np.sqrt(np.where(feasible, tau, 0))[None]
+            total += children_cost[:, inner, None, :]
+            total += np.where(feasible, 0.0, np.inf)[None]
+            best[start] = total.argmin(axis=3)
+            cost = np.take_along_axis(total, best[start][..., None], axis=3)[..., 0]
+            _add_to_parents(children_cost, tree.solve_parents[inner], cost)
+        if end > split:
+            # cost only grows with the net replenishment time, so a leaf quotes the longest service time it may
+            leaves = slice(split, end)
+            tau = grid[None, :] + lead[leaves, None] - np.minimum(grid[None, :] + lead[leaves, None], max_service[leaves, None])
+            _add_to_parents(children_cost, tree.solve_parents[leaves], cost_rate[:, leaves, None] * np.sqrt(tau)[None])
+
+    # top-down: each node's inbound service time is its parent's quoted service time
+    inbound = np.zeros((n_instances, len(tree)), dtype="int64")
+    service = np.zeros((n_instances, len(tree)), dtype="int64")
+    for start, split, end in tree.segments:
+        parents = tree.solve_parents[start:end]
+        inbound[:, start:end] = supplier if parents[0] < 0 else service[:, parents]
+        if split > start:
+            service[:, start:split] = np.take_along_axis(best[start], inbound[:, start:split, None], axis=2)[..., 0]
+        service[:, split:end] = np.minimum(inbound[:, split:end] + lead[split:end], max_service[split:end])
+    return inbound, service
+
+
+def solve_service_times(tree, sigma, holding_cost, z_score=Z_SCORE, supplier_service_time=0.0,
+                        step=SERVICE_TIME_STEP, block_elements=BLOCK_ELEMENTS):
+    # sigma: (instances, nodes) monthly demand std seen by each node; holding_cost broadcasts to it.
+    # Returns PLACEMENT_COLUMNS -> (instances, nodes) arrays, service times in months.
+    sigma = np.nan_to_num(np.atleast_2d(np.asarray(sigma, dtype=float)))
+    holding_cost = np.broadcast_to(np.asarray(holding_cost, dtype=float), sigma.shape)
+    if np.any(holding_cost[sigma > 0] < 0) or np.any(np.isnan(holding_cost[sigma > 0])):
+        raise ValueError("holding_cost must be non-negative for every node with demand variability.")
+    cost_rate = np.nan_to_num(holding_cost) * z_score * sigma * np.sqrt(step)
+
+    lead, max_service, supplier, size = tree.grid(step, supplier_service_time)
+    inner = max([split - start for start, split, _ in tree.segments] + [1])
+    block = max(1, block_elements // (size * max(len(tree), inner * size)))
+
+    # solved in the tree's solve order, then put back in node order
+    order = tree.order
+    inbound = np.zeros(sigma.shape, dtype="int64")
+    service = np.zeros(sigma.shape, dtype="int64")
+    for start in range(0, sigma.shape[0], block):
+        rows = slice(start, start + block)
+        solved = _solve_block(tree, cost_rate[rows][:, order], lead[order], max_service[order], supplier, size)
+        inbound[rows, order], service[rows, order] = solved
+
+    net_time = (inbound + lead[None, :] - service) * step
+    safety_stock = z_score * sigma * np.sqrt(net_time)
+    return {
+        "inbound_service_time": inbound * step,
+        "service_time": service * step,
+        "net_replenishment_time": net_time,
+        "safety_stock": safety_stock,
+        "safety_stock_cost": holding_cost * safety_stock,
+    }
+
+
+def place_rows(tree, nodes, instances, sigma, holding_cost, **kwargs):
+    # long rows (one per instance and node) -> the solution for each row, aligned with the input
+    nodes = np.asarray(nodes)
+    col = pd.Index(tree.nodes).get_indexer(nodes)
+    if np.any(col < 0):
+        unknown = pd.unique(nodes[col < 0]).tolist()
+        raise ValueError(f"Nodes missing from the service tree: {unknown}")
+    row = np.asarray(instances, dtype="int64")
+
+    n_instances = int(row.max()) + 1 if len(row) else 0
+    sigma_matrix = np.zeros((n_instances, len(tree)))
+    holding_matrix = np.zeros((n_instances, len(tree)))
+    sigma_matrix[row, col] = sigma
+    holding_matrix[row, col] = holding_cost
+    solution = solve_service_times(tree, sigma_matrix, holding_matrix, **kwargs)
+    return {name: values[row, col] for name, values in solution.items()}
+
+
+def assign_safety_stock(store_df, warehouse_df, dc_df, holding_cost=HOLDING_COST, lead_time=LEAD_TIME,
+                        code_map=CODE_MAP, z_score=Z_SCORE, customer_service_time=0.0,
+                        supplier_service_time=0.0, step=SERVICE_TIME_STEP, instance_cols=("Year", "Month")):
+    # fixed DC -> Warehouse -> Store layout: one network per instance (month, plus item when present).
+    # Adds PLACEMENT_COLUMNS to all three metrics tables; the DC total_stock is rebuilt from its placed buffer.
+    registry = get_registry(code_map)
+    lead_times = registry.parameter_array(lead_time)
+    lanes = [
+        pd.DataFrame({"parent": np.nan, "child": dc_df["DC"].unique()}),
+        warehouse_df[["DC", "Warehouse"]].drop_duplicates().set_axis(["parent", "child"], axis=1),
+        store_df[["Warehouse", "Store"]].drop_duplicates().set_axis(["parent", "child"], axis=1),
+    ]
+    edges = pd.concat(lanes, ignore_index=True)
+    edges["lead_time"] = lead_times[registry.ids(edges["child"])]
+    tree = ServiceTree.from_network(SupplyNetwork(edges), customer_service_time)
+
+    frames = [(store_df, "Store"), (warehouse_df, "Warehouse"), (dc_df, "DC")]
+    instance_cols = [col for col in instance_cols if col in dc_df.columns]
+    rows = pd.concat([frame[instance_cols + [node_col, "std_demand"]].rename(columns={node_col: "node"})
+                      for frame, node_col in frames], ignore_index=True)
+    instances = rows.groupby(instance_cols, sort=False, observed=True).ngroup().to_numpy()
+    solution = place_rows(
+        tree, rows["node"].to_numpy(), instances, rows["std_demand"].to_numpy(dtype=float),
+        registry.gather(rows["node"], holding_cost), z_score=z_score,
+        supplier_service_time=supplier_service_time, step=step,
+    )
+
+    start = 0
+    for frame, _ in frames:
+        for name, values in solution.items():
+            frame[name] = values[start:start + len(frame)]
+        start += len(frame)
+    dc_df["total_stock"] = dc_df["safety_stock"] + dc_df["DC_Monthly_Demand"]
+    return store_df, warehouse_df, dc_df
+
+
+# traced entry point; the stage graph runs assign_safety_stock under its own trace record
+place_safety_stock = instrument("place_safety_stock")(assign_safety_stock)
+
+
+@instrument()
+def place_network_safety_stock(network, metrics_df, holding_cost=HOLDING_COST, code_map=CODE_MAP, z_score=Z_SCORE,
+                               item_col=None, customer_service_time=0.0, supplier_service_time=0.0, step=SERVICE_TIME_STEP):
+    # run_network metrics -> the same rows with PLACEMENT_COLUMNS and total_stock from each node's own buffer;
+    # every (item, month) of the network is one instance, all solved together
+    tree = ServiceTree.from_network(network, customer_service_time)
+    instance_cols = ([item_col] if item_col else []) + ["Year", "Month"]
+    instances = metrics_df.groupby(instance_cols, sort=False, observed=True).ngroup().to_numpy()
+    if code_map is not None:
+        holding = get_registry(code_map).gather(metrics_df["node"], holding_cost)
+    else:
+        holding = metrics_df["node"].map(holding_cost).to_numpy(dtype=float)
+
+    solution = place_rows(
+        tree, metrics_df["node"].to_numpy(), instances, metrics_df["std_demand"].to_numpy(dtype=float), holding,
+        z_score=z_score, supplier_service_time=supplier_service_time, step=step,
+    )
+    metrics_df = metrics_df.assign(**solution)
+    metrics_df["total_stock"] = metrics_df["monthly_demand"] + metrics_df["safety_stock"]
+    return metrics_df
@@ -0,0 +1,156 @@
+import os
+import pandas as pd
+import batch_operations
+import rq_policy
+from node_registry import get_registry
+from data_processing.file_type_enum import FileType
+from inventory_common.resampling import days_in_month,week_to_month
+from data_processing.Data_Aggregate import rolling_stats, ROLLING_WINDOW
+from schedules.common_schedule import build_schedule
+from Preassumptions import CODE_MAP,FILL_RATE,HOLDING_COST,ORDERING_COST,SHORTAGE_COST,Z_SCORE
+from config import inventory_policy,rq_objective
+from instrumentation import instrument
+
+EDGE_COLUMNS = ["parent", "child", "lead_time"]
+
+
+def load_edges(file_path):
+    # one row per lane; a root node has an empty parent and its supplier lead time
+    ext = os.path.splitext(file_path)[-1].lower()
+    edges = FileType.get_reader(ext)(file_path)
+    missing = set(EDGE_COLUMNS) - set(edges.columns)
+    if missing:
+        raise ValueError(f"Edge table is missing columns: {sorted(missing)}")
+    return edges[EDGE_COLUMNS]
+
+
+class SupplyNetwork:
+    def __init__(self, edges):
+        edges = edges[EDGE_COLUMNS].reset_index(drop=True)
+        duplicated = edges["child"][edges["child"].duplicated()]
+        if len(duplicated):
+            raise ValueError(f"Nodes with more than one parent lane: {duplicated.unique().tolist()}")
+
+        lanes = edges[edges["parent"].notna()]
+        # an empty root parent turns the column into floats; keep node ids in the child dtype
+        lanes = lanes.assign(parent=lanes["parent"].astype(edges["child"].dtype))
+        self.parent = dict(zip(lanes["child"], lanes["parent"]))
+        self.lead_time = dict(zip(edges["child"], edges["lead_time"]))
+
+        nodes = pd.unique(pd.concat([lanes["parent"], edges["child"]], ignore_index=True))
+        children = {}
+        for child, parent in self.parent.items():
+            children.setdefault(parent, []).append(child)
+
+        # breadth-first from the roots gives the topological levels of the tree
+        self.levels = []
+        frontier = [node for node in nodes if node not in self.parent]
+        seen = 0
+        while frontier:
+            self.levels.append(frontier)
+            seen += len(frontier)
+            frontier = [child for node in frontier for child in children.get(node, [])]
+        if seen != len(nodes):
+            raise ValueError("Edge table contains a cycle")
+
+        self.depth = {node: depth for depth, level in enumerate(self.levels) for node in level}
+        self.leaves = [node for node in nodes if node not in children]
+
+    def __len__(self):
+        return len(self.depth)
+
+
+def leaf_monthly_demand(df, leaf_col="Store", date_col="TimeWeek", value_col="Actual", item_col=None):
+    keys = ([item_col] if item_col else []) + [leaf_col]
+    # weeks crossing a month end are split by their days in each month
+    demand = week_to_month(df, date_col, {value_col: "monthly_demand"}, key_cols=keys)
+    return demand.rename(columns={leaf_col: "node"})
+
+
+def _parameters(nodes, costs, code_map):
+    # parameter dicts are keyed by node name when a code map is given, else by node id
+    if code_map is not None:
+        return get_registry(code_map).gather(nodes, costs)
+    return nodes.map(costs).to_numpy(dtype=float)
+
+
+@instrument()
+def run_network(network, demand, ordering_cost=ORDERING_COST, holding_cost=HOLDING_COST, code_map=CODE_MAP,
+                z_score=Z_SCORE, window=ROLLING_WINDOW, item_col=None, policy=inventory_policy, shortage_cost=SHORTAGE_COST):
+    # demand: leaf_monthly_demand output. Returns (metrics, schedule) for every node, level by level.
+    # policy "rq" gives every node its own (r, Q) safety stock instead of splitting the root's stock down.
+    item_keys = [item_col] if item_col else []
+    period_keys = item_keys + ["node", "Year", "Month"]
+
+    # bottom-up: a node's demand is its own leaf demand plus its children's roll-up
+    level_demand = {}
+    for depth in reversed(range(len(network.levels))):
+        level_nodes = set(network.levels[depth])
+        frames = [demand[demand["node"].isin(level_nodes)]]
+        if depth + 1 < len(network.levels):
+            child = level_demand[depth + 1]
+            frames.append(child.assign(node=child["node"].map(network.parent))[period_keys + ["monthly_demand"]])
+        level_demand[depth] = (
+            pd.concat(frames, ignore_index=True)
+            .groupby(period_keys, sort=True, observed=True)["monthly_demand"].sum()
+            .reset_index()
+        )
+
+    # top-down: metrics for the whole level in one batch, then stock split from the parent level
+    metrics_frames = []
+    schedule_frames = []
+    parent_stock = None
+    for depth in range(len(network.levels)):
+        level_df = rolling_stats(level_demand[depth], item_keys + ["node"], "monthly_demand", window)
+        level_df.insert(0, "level", depth)
+        level_df["parent"] = level_df["node"].map(network.parent)
+        level_df["lead_time"] = level_df["node"].map(network.lead_time).astype(float)
+
+        if policy == "rq":
+            metrics = rq_policy.rq_metrics(
+                level_df["monthly_demand"].to_numpy(dtype=float),
+                _parameters(level_df["node"], ordering_cost, code_map),
+                _parameters(level_df["node"], holding_cost, code_map),
+                level_df["lead_time"].to_numpy(dtype=float),
+                level_df["std_demand"].to_numpy(dtype=float),
+                shortage_cost=_parameters(level_df["node"], shortage_cost, code_map),
+                fill_rate=FILL_RATE,
+                objective=rq_objective,
+                days_in_month=days_in_month(level_df["Year"], level_df["Month"]),
+            )
+        else:
+            metrics = batch_operations.eoq_metrics(
+                level_df["monthly_demand"].to_numpy(dtype=float),
+                _parameters(level_df["node"], ordering_cost, code_map),
+                _parameters(level_df["node"], holding_cost, code_map),
+                level_df["lead_time"].to_numpy(dtype=float),
+                std_demand=level_df["std_demand"].to_numpy(dtype=float) if depth == 0 else None,
+                z_score=z_score,
+                days_in_month=days_in_month(level_df["Year"], level_df["Month"]),
+            )
+        for col, values in metrics.items():
+            level_df[col] = values
+
+        if depth == 0:
+            level_df["demand_split"] = 1.0
+        else:
+            level_df = level_df.merge(parent_stock, on=item_keys + ["parent", "Year", "Month"], how="left")
+            level_df["demand_split"] = level_df["monthly_demand"] / level_df.pop("parent_monthly_demand")
+            parent_total_stock = level_df.pop("parent_total_stock")
+            if policy != "rq":
+                level_df["total_stock"] = level_df["demand_split"] * parent_total_stock
+            schedule_frames.append(build_schedule(level_df, "node", "parent", "monthly_demand", carry_cols=item_keys + ["level"]))
+
+        parent_stock = level_df[item_keys + ["node", "Year", "Month", "monthly_demand", "total_stock"]].rename(columns={
+            "node": "parent",
+            "monthly_demand": "parent_monthly_demand",
+            "total_stock": "parent_total_stock",
+        })
+        metrics_frames.append(level_df)
+
+    metrics_df = pd.concat(metrics_frames, ignore_index=True)
+    if schedule_frames:
+        schedule_df = pd.concat(schedule_frames, ignore_index=True)
+    else:
+        schedule_df = build_schedule(metrics_df.iloc[:0], "node", "parent", "monthly_demand", carry_cols=item_keys + ["level"])
+    return metrics_df, schedule_df
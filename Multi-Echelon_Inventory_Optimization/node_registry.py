@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from Preassumptions import CODE_MAP
+
+# Node codes get dense int32 ids once; every per-node parameter is a float array indexed by id,
+# so a row-level lookup is one hash probe for the id and one gather. Arrays carry a trailing NaN
+# slot, which is where the id -1 of an unknown code lands.
+
+PERIOD_BITS = 20
+
+
+def period_key(node, year, month):
+    # integer (node, year, month) join key; the period count Year*12+Month fits in PERIOD_BITS
+    node = np.asarray(node, dtype="int64")
+    period = np.asarray(year, dtype="int64") * 12 + np.asarray(month, dtype="int64") - 1
+    return (node << PERIOD_BITS) | period
+
+
+class NodeRegistry:
+    def __init__(self, code_map=CODE_MAP):
+        self.code_map = dict(code_map)
+        self.codes = np.fromiter(self.code_map, dtype="int64", count=len(self.code_map))
+        self.names = np.array(list(self.code_map.values()), dtype=object)
+        self._code_index = pd.Index(self.codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def ids(self, codes):
+        return self._code_index.get_indexer(np.asarray(codes)).astype("int32")
+
+    def parameter_array(self, values):
+        # values keyed by node name (as the Preassumptions tables are); missing nodes are NaN
+        array = np.full(len(self.codes) + 1, np.nan)
+        array[:-1] = [values.get(name, np.nan) for name in self.names]
+        return array
+
+    def gather(self, codes, values):
+        array = values if isinstance(values, np.ndarray) else self.parameter_array(values)
+        return array[self.ids(codes)]
+
+
+_registry = None
+
+
+def get_registry(code_map=CODE_MAP):
+    # rebuilt only when the code map changes (the benchmark swaps the tables in place)
+    global _registry
+    if _registry is None or _registry.code_map != code_map:
+        _registry = NodeRegistry(code_map)
+    return _registry
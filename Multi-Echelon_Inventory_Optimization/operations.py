@@ -10,8 +10,8 @@ class operations:
         return eoq
     def cycle_time(eoq,demand):
         return eoq/demand
-    def cycle_time_month_to_days(cycle_time):
-        return cycle_time*30
+    def cycle_time_month_to_days(cycle_time,days_in_month=30):
+        return cycle_time*days_in_month
     def cycle_time_days_to_hrs(cycle_time):
         return cycle_time*24
     def full_cycle_in_lead_time(lead_time,cycle_time):
@@ -0,0 +1,294 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from data_processing.file_type_enum import FileType
+
+# Planning parameters from CSV/Parquet tables in one (optionally versioned) directory:
+#   nodes     code, name, [echelon], [ordering_cost], [holding_cost], [lead_time], [shortage_cost], [dock_capacity]   (required)
+#   defaults  scope ("*" or an echelon), [ordering_cost], [holding_cost], [lead_time], [shortage_cost], [dock_capacity], [z_score]
+#   sku       item, node, [ordering_cost], [holding_cost], [lead_time], [shortage_cost]
+#   lanes     parent, child, [item], lead_time
+# node/parent/child accept a node name or code. Blank cells inherit; the most specific value wins:
+#   sku lane > sku node > lane > node > echelon default > "*" default
+# Lanes are inbound lead times, so in a tree they resolve onto the child node.
+
+PARAMETERS = ["ordering_cost", "holding_cost", "lead_time", "shortage_cost"]
+# every node needs these; shortage_cost only matters to the (r, Q) shortage-cost objective and may stay blank
+REQUIRED = ["ordering_cost", "holding_cost", "lead_time"]
+# per node only, with no sku or lane override; a blank dock capacity leaves the node unchecked
+NODE_PARAMETERS = PARAMETERS + ["dock_capacity"]
+TABLES = ["nodes", "defaults", "sku", "lanes"]
+# bump when the compiled snapshot layout changes
+SNAPSHOT_FORMAT = 3
+
+
+def _find_table(directory, name):
+    for ext in (".parquet", ".feather", ".csv", ".tsv"):
+        path = directory / f"{name}{ext}"
+        if path.exists():
+            return path
+    return None
+
+
+def resolve_version(parameters_dir, version=None):
+    # version None reads the directory itself; "latest" picks the last sub-directory holding a nodes table
+    directory = Path(parameters_dir)
+    if version is None:
+        return directory
+    if version == "latest":
+        versions = sorted(path for path in directory.iterdir() if path.is_dir() and _find_table(path, "nodes"))
+        if not versions:
+            raise ValueError(f"No parameter versions under {directory}")
+        return versions[-1]
+    return directory / version
+
+
+def read_tables(directory):
+    paths = {name: _find_table(directory, name) for name in TABLES}
+    if paths["nodes"] is None:
+        raise ValueError(f"Parameter directory {directory} has no nodes table")
+    tables = {}
+    for name, path in paths.items():
+        if path is not None:
+            if path.suffix.lower() in (".csv", ".tsv"):
+                # item codes keep their leading zeros
+                table = pd.read_csv(path, sep="\t" if path.suffix.lower() == ".tsv" else ",", dtype={"item": str})
+            else:
+                table = FileType.get_reader(path.suffix.lower())(path)
+            table.columns = [col.strip() for col in table.columns]
+            tables[name] = table
+    return tables
+
+
+def _require(table, name, columns):
+    missing = set(columns) - set(table.columns)
+    if missing:
+        raise ValueError(f"{name} table is missing columns: {sorted(missing)}")
+
+
+def _check_values(table, name):
+    # cost bounds as in the EOQ checks of inventory_common/eoq.py and rq_policy.solve_rq (shortage_cost)
+    rules = {"ordering_cost": lambda v: v < 0, "holding_cost": lambda v: v <= 0, "lead_time": lambda v: v < 0,
+             "shortage_cost": lambda v: v <= 0, "dock_capacity": lambda v: v <= 0}
+    for col, invalid in rules.items():
+        if col in table.columns:
+            values = pd.to_numeric(table[col], errors="coerce")
+            bad = table[(values.isna() & table[col].notna()) | invalid(values.fillna(1))]
+            if len(bad):
+                raise ValueError(f"{name} table has invalid {col} values in rows {bad.index.tolist()[:10]}")
+
+
+def _node_codes(values, codes, names, name, col):
+    # accept names or codes, always return codes
+    by_name = dict(zip(names, codes))
+    resolved = values.map(lambda v: by_name.get(v, by_name.get(str(v))))
+    numeric = pd.to_numeric(values, errors="coerce")
+    resolved = resolved.fillna(numeric.where(numeric.isin(codes)))
+    unknown = values[resolved.isna()]
+    if len(unknown):
+        raise ValueError(f"{name} table references unknown nodes in '{col}': {unknown.unique().tolist()[:10]}")
+    return resolved.astype("int64").to_numpy()
+
+
+def _item_labels(values):
+    # items are matched as strings; blanks stay missing
+    return values.map(lambda value: value if pd.isna(value) else str(value))
+
+
+class ParameterSet:
+    def __init__(self, codes, names, echelons, node_values, items, sku_keys, sku_values, z_score, version):
+        self.codes = codes
+        self.names = names
+        self.echelons = echelons
+        # node_values[param]: float array over node ids with a trailing NaN slot (see node_registry)
+        self.node_values = node_values
+        self.items = items
+        # sku_keys: sorted item_id * len(codes) + node_id; sku_values[param] aligned, NaN = inherit
+        self.sku_keys = sku_keys
+        self.sku_values = sku_values
+        self.z_score = z_score
+        self.version = version
+        self._code_index = pd.Index(codes)
+        self._item_index = pd.Index(items)
+
+    @property
+    def code_map(self):
+        return dict(zip(self.codes.tolist(), self.names.tolist()))
+
+    def _by_name(self, values):
+        # blank optional parameters are left out, as nodes missing from the Preassumptions literals are
+        return {name: value for name, value in zip(self.names.tolist(), values.tolist()) if not np.isnan(value)}
+
+    def node_tables(self):
+        # name-keyed dicts in the shape of the Preassumptions literals
+        return self.code_map, *(self._by_name(self.node_values[param][:-1]) for param in NODE_PARAMETERS)
+
+    def values(self, parameter, codes, item=None):
+        node_ids = self._code_index.get_indexer(np.asarray(codes))
+        values = self.node_values[parameter][node_ids]
+        if item is None or not len(self.sku_keys):
+            return values
+        item_id = self._item_index.get_indexer([str(item)])[0]
+        if item_id < 0:
+            return values
+        keys = item_id * len(self.codes) + node_ids
+        position = np.minimum(np.searchsorted(self.sku_keys, keys), len(self.sku_keys) - 1)
+        override = self.sku_values[parameter][position]
+        use = (self.sku_keys[position] == keys) & (node_ids >= 0) & ~np.isnan(override)
+        return np.where(use, override, values)
+
+    def item_tables(self, item):
+        # (ordering_cost, holding_cost, lead_time, shortage_cost) dicts for one item, keyed by node name
+        return tuple(self._by_name(self.values(param, self.codes, item)) for param in PARAMETERS)
+
+    def save(self, path):
+        arrays = {"codes": self.codes, "names": self.names.astype(str), "echelons": self.echelons.astype(str),
+                  "items": self.items.astype(str), "sku_keys": self.sku_keys}
+        arrays.update({f"node_{param}": values for param, values in self.node_values.items()})
+        arrays.update({f"sku_{param}": values for param, values in self.sku_values.items()})
+        np.savez(path, z_score=np.array(self.z_score), version=np.array(self.version), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["codes"], data["names"].astype(object), data["echelons"].astype(object),
+                {param: data[f"node_{param}"] for param in NODE_PARAMETERS},
+                data["items"].astype(object), data["sku_keys"],
+                {param: data[f"sku_{param}"] for param in PARAMETERS},
+                float(data["z_score"]), str(data["version"]),
+            )
+
+
+def compile_tables(tables, version, z_score_default):
+    nodes = tables["nodes"]
+    _require(nodes, "nodes", ["code", "name"])
+    _check_values(nodes, "nodes")
+    codes = pd.to_numeric(nodes["code"], errors="raise").astype("int64").to_numpy()
+    names = nodes["name"].astype(str).to_numpy(dtype=object)
+    for label, values in (("code", codes), ("name", names)):
+        duplicated = pd.Series(values)[pd.Series(values).duplicated()]
+        if len(duplicated):
+            raise ValueError(f"nodes table has duplicate {label}s: {duplicated.unique().tolist()[:10]}")
+    echelons = (nodes["echelon"].astype(str) if "echelon" in nodes.columns else pd.Series("", index=nodes.index)).to_numpy(dtype=object)
+
+    # node values, then echelon and "*" defaults for the blanks
+    defaults = tables.get("defaults")
+    z_score = z_score_default
+    node_values = {param: pd.to_numeric(nodes[param], errors="coerce").to_numpy(dtype=float)
+                   if param in nodes.columns else np.full(len(nodes), np.nan) for param in NODE_PARAMETERS}
+    if defaults is not None:
+        _require(defaults, "defaults", ["scope"])
+        _check_values(defaults, "defaults")
+        scoped = defaults.set_index(defaults["scope"].astype(str))
+        if "z_score" in scoped.columns and "*" in scoped.index and pd.notna(scoped.loc["*", "z_score"]):
+            z_score = float(scoped.loc["*", "z_score"])
+        for param in NODE_PARAMETERS:
+            if param not in scoped.columns:
+                continue
+            by_scope = pd.to_numeric(scoped[param], errors="coerce")
+            fill = pd.Series(echelons).map(by_scope).to_numpy(dtype=float)
+            if "*" in by_scope.index:
+                fill = np.where(np.isnan(fill), by_scope["*"], fill)
+            node_values[param] = np.where(np.isnan(node_values[param]), fill, node_values[param])
+
+    items = np.array([], dtype=object)
+    sku = tables.get("sku")
+    lanes = tables.get("lanes")
+    frames = []
+    if sku is not None:
+        _require(sku, "sku", ["item", "node"])
+        _check_values(sku, "sku")
+        sku = sku.assign(code=_node_codes(sku["node"], codes, names, "sku", "node"), item=_item_labels(sku["item"]), rank=1)
+        frames.append(sku)
+    if lanes is not None:
+        _require(lanes, "lanes", ["parent", "child", "lead_time"])
+        _check_values(lanes, "lanes")
+        lanes = lanes.assign(
+            parent_code=_node_codes(lanes["parent"], codes, names, "lanes", "parent"),
+            code=_node_codes(lanes["child"], codes, names, "lanes", "child"),
+            item=_item_labels(lanes["item"]) if "item" in lanes.columns else np.nan,
+        )
+        ambiguous = lanes[lanes.duplicated(["item", "code"], keep=False)]
+        if len(ambiguous):
+            raise ValueError(f"lanes table has more than one inbound lane per node: {ambiguous['child'].unique().tolist()[:10]}")
+        # lane defaults beat node values; item lanes join the sku rows at the highest rank
+        generic = lanes[lanes["item"].isna()]
+        node_values["lead_time"][pd.Index(codes).get_indexer(generic["code"])] = generic["lead_time"].to_numpy(dtype=float)
+        frames.append(lanes[lanes["item"].notna()][["item", "code", "lead_time"]].assign(rank=2))
+
+    missing = {param: names[np.isnan(node_values[param])].tolist() for param in REQUIRED if np.isnan(node_values[param]).any()}
+    if missing:
+        raise ValueError(f"Nodes without a value or default: {missing}")
+    node_values = {param: np.append(values, np.nan) for param, values in node_values.items()}
+
+    if frames:
+        overrides = pd.concat(frames, ignore_index=True)
+        duplicated = overrides[overrides.duplicated(["item", "code", "rank"])]
+        if len(duplicated):
+            raise ValueError(f"Duplicate item/node override rows: {duplicated[['item', 'code']].head(10).values.tolist()}")
+        item_ids, items = pd.factorize(overrides["item"], sort=True)
+        items = items.to_numpy(dtype=object)
+        overrides["key"] = item_ids.astype("int64") * len(codes) + pd.Index(codes).get_indexer(overrides["code"])
+        # per key, the highest-ranked non-blank value of each parameter
+        overrides = overrides.sort_values(["key", "rank"])
+        collapsed = overrides.groupby("key")[[param for param in PARAMETERS if param in overrides.columns]].last()
+        sku_keys = collapsed.index.to_numpy(dtype="int64")
+        sku_values = {param: collapsed[param].to_numpy(dtype=float) if param in collapsed.columns
+                      else np.full(len(sku_keys), np.nan) for param in PARAMETERS}
+    else:
+        sku_keys = np.array([], dtype="int64")
+        sku_values = {param: np.array([], dtype=float) for param in PARAMETERS}
+
+    return ParameterSet(codes, names, echelons, node_values, items, sku_keys, sku_values, z_score, version)
+
+
+def table_fingerprint(paths):
+    digest = hashlib.sha256(f"snapshot-{SNAPSHOT_FORMAT}".encode())
+    for name in TABLES:
+        if paths.get(name) is not None:
+            digest.update(name.encode())
+            digest.update(Path(paths[name]).read_bytes())
+    return digest.hexdigest()
+
+
+def load_parameters(parameters_dir, version=None, cache_dir=None, z_score_default=1.65):
+    # compiled once per table content; a repeated run with unchanged tables loads the .npz snapshot
+    directory = resolve_version(parameters_dir, version)
+    paths = {name: _find_table(directory, name) for name in TABLES}
+    if paths["nodes"] is None:
+        raise ValueError(f"Parameter directory {directory} has no nodes table")
+    fingerprint = table_fingerprint(paths)
+
+    snapshot = Path(cache_dir) / f"parameters_{fingerprint[:16]}.npz" if cache_dir else None
+    if snapshot is not None and snapshot.exists():
+        return ParameterSet.load(snapshot)
+
+    tables = read_tables(directory)
+    parameters = compile_tables(tables, fingerprint, z_score_default)
+    if snapshot is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write to a file of this process's own, then rename, so a concurrent reader never sees half a
+        # snapshot and concurrent writers never share a partial file
+        with tempfile.NamedTemporaryFile(dir=cache_dir, prefix=snapshot.stem, suffix=".tmp", delete=False) as partial:
+            try:
+                parameters.save(partial)
+            except BaseException:
+                partial.close()
+                os.remove(partial.name)
+                raise
+        os.replace(partial.name, snapshot)
+    return parameters
+
+
+def install(parameters, namespace):
+    # refresh the Preassumptions tables in place, so every module that imported them shares the result
+    code_map, ordering_cost, holding_cost, lead_time, shortage_cost, dock_capacity = parameters.node_tables()
+    for name, values in (("CODE_MAP", code_map), ("ORDERING_COST", ordering_cost), ("HOLDING_COST", holding_cost),
+                         ("LEAD_TIME", lead_time), ("SHORTAGE_COST", shortage_cost), ("DOCK_CAPACITY", dock_capacity)):
+        namespace[name].clear()
+        namespace[name].update(values)
+    namespace["Z_SCORE"] = parameters.z_score
@@ -0,0 +1,285 @@
+import functools
+import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from data_processing.Data_Aggregate import ECHELON_LEVELS,echelon_monthly,lane_monthly
+from echelon_aggregation.Store import store_data
+from echelon_aggregation.Warehouse import warehouse_data
+from echelon_aggregation.DC import dc_data
+from distribution.dc_distribution import dc_distribution
+from distribution.warehouse_distribution import warehouse_distribution
+from schedules import dc_schedule,store_schedule,warehouse_schedule
+from schedules.schedule_stream import stream_schedule
+from cost_comparison.cost_engine import eoq_cost_table,non_eoq_cost_table,savings_table,stack_cost_tables
+from network.safety_stock_placement import assign_safety_stock
+from app_function_call import write_results
+from instrumentation import count_rows,current_run,current_stage,start_run,trace_stage
+from checkpoint_cache import CheckpointCache,code_version,value_key
+from Preassumptions import CODE_MAP,ORDERING_COST,HOLDING_COST,LEAD_TIME,PARAMETER_SET,Z_SCORE,SHORTAGE_COST,FILL_RATE
+from config import stage_workers,stage_executor,safety_stock_placement,customer_service_time,supplier_service_time
+from config import checkpoint_dir,checkpoint_max_bytes,checkpoint_max_age_days,inventory_policy,rq_objective
+from config import schedule_streaming,schedule_partition,schedule_batch_rows,schedule_path,output_format
+
+# The per-item pipeline as a graph of named values: each stage declares the values it reads and
+# the ones it produces, and a run executes only the stages its targets need, each once, starting
+# every stage as soon as its inputs exist. Values passed in skip the stages that would produce them.
+
+# keyword names match app_function_call.download so the result can be passed straight through
+OUTPUT_NAMES = [
+    "store_df",
+    "warehouse_df",
+    "dc_df",
+    "store_demand_df",
+    "warehouse_demand_df",
+    "dc_demand_df",
+    "warehouse_store_distribution",
+    "dc_warehouse_distribution",
+    "store_schedule_df",
+    "warehouse_schedule_df",
+    "eoq_cost_df",
+    "non_eoq_cost_df",
+    "cost_savings_df",
+]
+
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+
+class Stage:
+    def __init__(self, name, func, inputs, outputs, checkpoint=True):
+        # outputs: one value name, or a list of names the function returns as a tuple;
+        # checkpoint=False for stages run for their side effects (writing files)
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.single = isinstance(outputs, str)
+        self.outputs = [outputs] if self.single else list(outputs)
+        self.checkpoint = checkpoint
+
+
+def _run_stage(name, func, args, parent=None):
+    # module level so process pools can pickle it; parent keeps the trace nested under the caller
+    with trace_stage(name, rows_in=count_rows(list(args)), parent=parent) as record:
+        result = func(*args)
+        record["rows_out"] = count_rows(result)
+    return result
+
+
+class StageGraph:
+    def __init__(self, stages):
+        self.stages = {}
+        self.producer = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name!r}")
+            for output in stage.outputs:
+                if output in self.producer:
+                    raise ValueError(f"{output!r} is produced by both {self.producer[output]!r} and {stage.name!r}")
+                self.producer[output] = stage.name
+            self.stages[stage.name] = stage
+
+        # depth-first topological order; also rejects cycles
+        self.order = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Stage graph has a cycle: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for value in self.stages[name].inputs:
+                if value in self.producer:
+                    visit(self.producer[value], path + [name])
+            state[name] = "done"
+            self.order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+
+    def plan(self, provided, targets):
+        # stages the targets need, in run order; given values cut the walk short
+        needed = set()
+        pending = list(targets)
+        while pending:
+            value = pending.pop()
+            if value in provided:
+                continue
+            if value not in self.producer:
+                raise ValueError(f"No stage produces {value!r} and it was not given")
+            name = self.producer[value]
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].inputs)
+        return [name for name in self.order if name in needed]
+
+    def _store(self, values, stage, result, cache=None, keys=None):
+        outputs = {stage.outputs[0]: result} if stage.single else None
+        if outputs is None:
+            if len(result) != len(stage.outputs):
+                raise ValueError(f"Stage {stage.name!r} returned {len(result)} values for outputs {stage.outputs}")
+            outputs = dict(zip(stage.outputs, result))
+        values.update(outputs)
+        if cache is not None and stage.name in keys and all(isinstance(v, pd.DataFrame) for v in outputs.values()):
+            cache.put(keys[stage.name], stage.name, outputs)
+
+    def restore(self, values, targets, cache):
+        # stage keys for the plan, then cached outputs loaded for the stages whose results are needed and
+        # unchanged; a hit also prunes everything upstream of it. Returns the keys of stages still to run.
+        input_keys = {}
+        keys = {}
+        for name in self.plan(values, targets):
+            stage = self.stages[name]
+            for value in stage.inputs:
+                if value not in input_keys:
+                    input_keys[value] = value_key(values[value])
+            keys[name] = cache.stage_key(name, code_version(stage.func), [input_keys[value] for value in stage.inputs])
+            for output in stage.outputs:
+                input_keys[output] = f"{keys[name]}:{output}"
+
+        pending = list(targets)
+        seen = set()
+        while pending:
+            value = pending.pop()
+            if value in values or self.producer[value] in seen:
+                continue
+            stage = self.stages[self.producer[value]]
+            seen.add(stage.name)
+            cached = cache.get(keys[stage.name], stage.outputs) if stage.checkpoint else None
+            if cached is not None:
+                values.update(cached)
+            else:
+                pending.extend(stage.inputs)
+        return {name: key for name, key in keys.items() if self.stages[name].checkpoint}
+
+    def run(self, inputs, targets=None, max_workers=1, executor="thread", cache=None):
+        # returns {target: value}; max_workers=1 runs the plan inline in order
+        values = dict(inputs)
+        targets = list(self.producer) if targets is None else list(targets)
+        keys = self.restore(values, targets, cache) if cache is not None else None
+        plan = self.plan(values, targets)
+        parent = current_stage()
+
+        if max_workers == 1 or len(plan) <= 1:
+            for name in plan:
+                stage = self.stages[name]
+                args = [values[value] for value in stage.inputs]
+                self._store(values, stage, _run_stage(name, stage.func, args, parent), cache, keys)
+            return {target: values[target] for target in targets}
+
+        waiting = list(plan)
+        running = {}
+        with EXECUTORS[executor](max_workers=max_workers, initializer=start_run, initargs=(current_run(),)) as pool:
+            while waiting or running:
+                ready = [name for name in waiting if all(value in values for value in self.stages[name].inputs)]
+                for name in ready:
+                    waiting.remove(name)
+                    stage = self.stages[name]
+                    args = [values[value] for value in stage.inputs]
+                    running[pool.submit(_run_stage, name, stage.func, args, parent)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    self._store(values, self.stages[name], future.result(), cache, keys)
+        return {target: values[target] for target in targets}
+
+
+def echelon_table(lane_monthly_df, stats, echelon):
+    return echelon_monthly(lane_monthly_df, echelon, stats=stats)
+
+
+def echelon_metrics(frame, ordering_cost, holding_cost, lead_time, shortage_cost, echelon):
+    # the metric functions add columns to their input, which other stages also read
+    metrics = {"Store": store_data, "Warehouse": warehouse_data, "DC": dc_data}[echelon]
+    return metrics(frame.copy(), ordering_cost, holding_cost, lead_time, shortage_cost)
+
+
+def placed_metrics(store_metrics_df, warehouse_metrics_df, dc_metrics_df, holding_cost, lead_time):
+    return assign_safety_stock(store_metrics_df.copy(), warehouse_metrics_df.copy(), dc_metrics_df.copy(),
+                               holding_cost, lead_time, customer_service_time=customer_service_time,
+                               supplier_service_time=supplier_service_time)
+
+
+def schedule_stages(streaming):
+    echelons = [("Store", "store"), ("Warehouse", "warehouse"), ("DC", "dc")]
+    if not streaming:
+        return [
+            Stage("store_schedule", store_schedule.stores_schedule, ["store_demand_df"], "store_schedule_df"),
+            Stage("warehouse_schedule", warehouse_schedule.warehouses_schedule, ["warehouse_demand_df"], "warehouse_schedule_df"),
+            Stage("dc_schedule", dc_schedule.dcs_schedule, ["dc_demand_df"], "dc_schedule_df"),
+            Stage("eoq_cost_table", eoq_cost_table, ["store_schedule_df", "warehouse_schedule_df", "dc_schedule_df",
+                                                     "store_demand_df", "warehouse_demand_df", "dc_demand_df",
+                                                     "ordering_cost", "holding_cost"], "eoq_cost_df"),
+        ]
+    # each schedule stage writes its orders to the sink and yields the file manifest in place of the
+    # schedule, plus its echelon's EOQ costs; the files are its result, so it is never checkpointed
+    stages = [Stage(f"{prefix}_schedule", functools.partial(stream_schedule, echelon=echelon, directory=schedule_path,
+                                                            output_format=output_format, partition=schedule_partition,
+                                                            batch_rows=schedule_batch_rows),
+                    [f"{prefix}_demand_df", "ordering_cost", "holding_cost", "item"], [f"{prefix}_schedule_df", f"{prefix}_eoq_cost_df"],
+                    checkpoint=False)
+              for echelon, prefix in echelons]
+    stages.append(Stage("eoq_cost_table", stack_cost_tables, [f"{prefix}_eoq_cost_df" for _, prefix in echelons], "eoq_cost_df"))
+    return stages
+
+
+@functools.lru_cache(maxsize=None)
+def pipeline_graph(placement=safety_stock_placement, streaming=schedule_streaming):
+    metrics_names = ["store_demand_df", "warehouse_demand_df", "dc_demand_df"]
+    if placement:
+        metrics_names = ["store_metrics_df", "warehouse_metrics_df", "dc_metrics_df"]
+    parameters = ["ordering_cost", "holding_cost", "lead_time", "shortage_cost"]
+
+    stages = [Stage("lane_monthly", lane_monthly, ["df"], "lane_monthly_df")]
+    for echelon, monthly_name, metrics_name in zip(["Store", "Warehouse", "DC"], OUTPUT_NAMES[:3], metrics_names):
+        stages.append(Stage(f"{echelon.lower()}_monthly", functools.partial(echelon_table, echelon=echelon),
+                            ["lane_monthly_df", f"{echelon.lower()}_stats"], monthly_name))
+        stages.append(Stage(f"{echelon.lower()}_metrics", functools.partial(echelon_metrics, echelon=echelon),
+                            [monthly_name] + parameters, metrics_name))
+    if placement:
+        stages.append(Stage("place_safety_stock", placed_metrics, metrics_names + ["holding_cost", "lead_time"],
+                            ["store_demand_df", "warehouse_demand_df", "dc_demand_df"]))
+
+    stages += [
+        Stage("dc_distribution", dc_distribution, ["dc_demand_df", "warehouse_demand_df"], "dc_warehouse_distribution"),
+        Stage("warehouse_distribution", warehouse_distribution, ["dc_warehouse_distribution", "store_demand_df"],
+              "warehouse_store_distribution"),
+    ]
+    stages += schedule_stages(streaming)
+    stages += [
+        Stage("non_eoq_cost_table", non_eoq_cost_table, ["warehouse_store_distribution", "dc_warehouse_distribution",
+                                                         "dc_demand_df", "ordering_cost", "holding_cost"], "non_eoq_cost_df"),
+        # the plain functions behind cost_savings and download; the graph's own trace record stands in for theirs
+        Stage("cost_savings", savings_table, ["eoq_cost_df", "non_eoq_cost_df"], "cost_savings_df"),
+        Stage("download", write_results, OUTPUT_NAMES, "written", checkpoint=False),
+    ]
+    return StageGraph(stages)
+
+
+def checkpoint_cache(path=checkpoint_dir):
+    if path is None:
+        return None
+    # settings the stages read from config and Preassumptions rather than from their inputs
+    salt = {
+        "code_map": {str(k): v for k, v in CODE_MAP.items()},
+        "z_score": Z_SCORE,
+        "service_times": [customer_service_time, supplier_service_time],
+        "inventory_policy": [inventory_policy, rq_objective, SHORTAGE_COST, FILL_RATE],
+    }
+    return CheckpointCache(path, checkpoint_max_bytes, checkpoint_max_age_days, salt)
+
+
+CACHE = checkpoint_cache()
+
+
+def run_pipeline(df=None, ordering_cost=ORDERING_COST, holding_cost=HOLDING_COST, lead_time=LEAD_TIME, shortage_cost=SHORTAGE_COST,
+                 targets=OUTPUT_NAMES,
+                 max_workers=stage_workers, executor=stage_executor, placement=safety_stock_placement, cache=CACHE,
+                 streaming=schedule_streaming, item=None, demand_stats=None, **values):
+    # values: intermediate results already at hand (e.g. store_df), whose producing stages are skipped;
+    # item tags the orders the streaming schedule stages write; demand_stats: {echelon: stored node-month
+    # statistics} for the monthly tables, None to compute them from df
+    inputs = {"ordering_cost": ordering_cost, "holding_cost": holding_cost, "lead_time": lead_time,
+              "shortage_cost": shortage_cost, "item": item,
+              **{f"{echelon.lower()}_stats": (demand_stats or {}).get(echelon) for echelon in ECHELON_LEVELS}, **values}
+    if df is not None:
+        inputs["df"] = df
+    return pipeline_graph(placement, streaming).run(inputs, targets, max_workers, executor, cache)
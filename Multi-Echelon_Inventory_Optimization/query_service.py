@@ -0,0 +1,387 @@
+import argparse
+import functools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import date
+from http.server import BaseHTTPRequestHandler,ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs,urlsplit
+import numpy as np
+import pandas as pd
+from data_processing.file_type_enum import FileType
+from inventory_common.resampling import days_in_month
+from echelon_aggregation.common_aggregation import policy_metrics
+from schedules.common_schedule import SCHEDULE_COLUMNS,build_schedule
+from Preassumptions import CODE_MAP,HOLDING_COST,LEAD_TIME,ORDERING_COST,PARAMETER_SET,SHORTAGE_COST
+from config import calculated_metrics_path,item_col,inventory_policy
+from config import service_host,service_port,service_cache_size
+
+# A local HTTP service over the latest calculated_metrics outputs: order quantity, reorder point and next
+# order dates per node (and item), served from memory through LRU caches. Posted parameters recompute the
+# rows of the one node they name; every cached answer carries its node's version, so only that node's
+# entries go stale. Stdlib http.server only, bound to localhost by default.
+#
+#   GET  /health                                 status, table sizes, cache counters
+#   GET  /metrics                                request latency per route
+#   GET  /policy?node=ST1&item=..&as_of=..&orders=3
+#   POST /policy      {"queries": [{"node": .., "item": .., "as_of": .., "orders": ..}, ..]}
+#   POST /parameters  {"node": .., "item": .., "ordering_cost": .., "holding_cost": .., "lead_time": .., "shortage_cost": ..}
+
+logger = logging.getLogger(__name__)
+
+ECHELONS = ("Store", "Warehouse", "DC")
+METRICS_FILES = {echelon: f"{echelon.lower()}_monthly_metrics" for echelon in ECHELONS}
+PARAMETERS = {"ordering_cost": ORDERING_COST, "holding_cost": HOLDING_COST, "lead_time": LEAD_TIME,
+              "shortage_cost": SHORTAGE_COST}
+ROUTES = ("GET /health", "GET /metrics", "GET /policy", "POST /policy", "POST /parameters")
+DEFAULT_ORDERS = 3
+MAX_ORDERS = 100
+# latencies kept per route for the percentiles
+LATENCY_WINDOW = 2048
+
+
+def read_metrics(directory=calculated_metrics_path):
+    # {echelon: metrics frame} from the batch run's parquet, feather or csv outputs
+    frames = {}
+    for echelon, name in METRICS_FILES.items():
+        paths = [directory / f"{name}{ext}" for ext in (".parquet", ".feather", ".csv")]
+        path = next((path for path in paths if path.exists()), None)
+        if path is None:
+            raise FileNotFoundError(f"No {name} output in {directory}; run app.py with a parquet or csv output_format")
+        frames[echelon] = FileType.get_reader(path.suffix)(path)
+    return frames
+
+
+class LatencyMetrics:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, seconds, error=False):
+        with self._lock:
+            stats = self._routes.setdefault(route, {"count": 0, "errors": 0, "latencies": deque(maxlen=self.window)})
+            stats["count"] += 1
+            stats["errors"] += bool(error)
+            stats["latencies"].append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            routes = {route: (stats["count"], stats["errors"], np.array(stats["latencies"]))
+                      for route, stats in self._routes.items()}
+        result = {}
+        for route, (count, errors, latencies) in routes.items():
+            ms = latencies * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            result[route] = {"count": count, "errors": errors, "mean_ms": float(ms.mean()), "p50_ms": float(p50),
+                             "p95_ms": float(p95), "p99_ms": float(p99), "max_ms": float(ms.max())}
+        return result
+
+
+class PolicyService:
+    def __init__(self, frames, code_map=CODE_MAP, cache_size=service_cache_size):
+        # frames: {echelon: metrics frame} as read_metrics returns them
+        self.code_map = dict(code_map)
+        self.codes = {name: code for code, name in self.code_map.items()}
+        self.frames = {echelon: frame.reset_index(drop=True) for echelon, frame in frames.items()}
+        self.started = time.time()
+        self.latency = LatencyMetrics()
+        self._lock = threading.Lock()
+        # posted values by (node name, item); item None applies to every item of the node
+        self._overrides = {}
+        self._versions = {}
+        self._build_index()
+        self._cached_policy = functools.lru_cache(maxsize=cache_size)(self._policy)
+        self._cached_orders = functools.lru_cache(maxsize=cache_size)(self._orders)
+
+    @classmethod
+    def from_outputs(cls, directory=calculated_metrics_path, cache_size=service_cache_size):
+        return cls(read_metrics(directory), cache_size=cache_size)
+
+    def _build_index(self):
+        # (node code, item) -> (echelon, row positions and periods in period order)
+        self._index = {}
+        self._items = {}
+        for echelon, frame in self.frames.items():
+            items = frame[item_col].astype(str) if item_col in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+            period = frame["Year"].to_numpy(dtype="int64") * 12 + frame["Month"].to_numpy(dtype="int64") - 1
+            keys = pd.DataFrame({"node": frame[echelon].to_numpy(), "item": items.to_numpy(), "period": period})
+            for (node, item), group in keys.groupby(["node", "item"], sort=False, dropna=False).groups.items():
+                item = None if pd.isna(item) else item
+                rows = group.to_numpy()[np.argsort(period[group], kind="stable")]
+                self._index[(node, item)] = (echelon, rows, period[rows])
+                self._items.setdefault(node, []).append(item)
+
+    def node_code(self, node):
+        # a node code or name, as given in a query
+        node = str(node)
+        if node in self.codes:
+            return self.codes[node]
+        try:
+            code = int(node)
+        except ValueError:
+            code = None
+        if code not in self._items:
+            raise KeyError(f"Unknown node {node!r}")
+        return code
+
+    def _key(self, node, item):
+        code = self.node_code(node)
+        items = self._items[code]
+        if item is None:
+            if len(items) > 1:
+                raise ValueError(f"item is required: node {node!r} has {len(items)} items")
+            return code, items[0]
+        if str(item) not in items:
+            raise KeyError(f"Node {node!r} has no item {item!r}")
+        return code, str(item)
+
+    def _policy(self, key, version, month, as_of, orders):
+        # the metrics row for the query month (the nearest month inside the horizon otherwise) and the
+        # node's next orders from as_of on
+        echelon, rows, periods = self._index[key]
+        position = int(np.clip(np.searchsorted(periods, month, "right") - 1, 0, len(rows) - 1))
+        with self._lock:
+            row = self.frames[echelon].iloc[rows[position]]
+        dates, quantities = self._cached_orders(key, version)
+        start = np.searchsorted(dates, np.datetime64(as_of, "D"))
+        result = {
+            "node": int(key[0]),
+            "node_name": self.code_map.get(key[0]),
+            "echelon": echelon,
+            "item": key[1],
+            "year": int(row["Year"]),
+            "month": int(row["Month"]),
+            "monthly_demand": float(row[SCHEDULE_COLUMNS[echelon.lower()][2]]),
+            "order_quantity": float(row["monthly_eoq"]),
+            "reorder_point": float(row["reorder_point"]),
+            "cycle_time_in_days": float(row["cycle_time_in_days"]),
+        }
+        for col in ("safety_stock", "fill_rate"):
+            if col in row.index and pd.notna(row[col]):
+                result[col] = float(row[col])
+        result["next_orders"] = [{"date": str(day), "quantity": int(quantity)}
+                                 for day, quantity in zip(dates[start:start + orders], quantities[start:start + orders])]
+        return result
+
+    def _orders(self, key, version):
+        # every order of the node over the horizon, by date, as the batch schedules would list them
+        echelon, rows, _ = self._index[key]
+        echelon_col, parent_col, demand_col = SCHEDULE_COLUMNS[echelon.lower()]
+        with self._lock:
+            ss_df = self.frames[echelon].iloc[rows]
+        if parent_col not in ss_df.columns:
+            ss_df = ss_df.assign(**{parent_col: np.nan})
+        schedule = build_schedule(ss_df, echelon_col, parent_col, demand_col).sort_values("Date_Time", kind="stable")
+        return schedule["Date_Time"].to_numpy().astype("datetime64[D]"), schedule["Quantity"].to_numpy()
+
+    def policy(self, node, item=None, as_of=None, orders=DEFAULT_ORDERS):
+        key = self._key(node, item)
+        as_of = pd.Timestamp(as_of if as_of is not None else date.today()).date()
+        orders = int(orders)
+        if not 0 <= orders <= MAX_ORDERS:
+            raise ValueError(f"orders must be between 0 and {MAX_ORDERS}")
+        month = as_of.year * 12 + as_of.month - 1
+        return self._cached_policy(key, self._versions.get(key, 0), month, as_of, orders)
+
+    def policies(self, queries):
+        # one result per query; a failed query answers with its error instead of failing the batch
+        results = []
+        for query in queries:
+            if not isinstance(query, dict):
+                results.append({"error": "a query must be a JSON object", "query": query})
+                continue
+            try:
+                results.append(self.policy(query.get("node"), query.get("item"), query.get("as_of"),
+                                           query.get("orders", DEFAULT_ORDERS)))
+            except (KeyError, ValueError, TypeError) as error:
+                results.append({"error": _message(error), "query": query})
+        return results
+
+    def _parameters(self, code, item):
+        # loaded tables (per-item when the parameter tables have sku rows), then posted node and item values
+        name = self.code_map.get(code, code)
+        values = {param: table.get(name, np.nan) for param, table in PARAMETERS.items()}
+        if PARAMETER_SET is not None and item is not None:
+            for param in PARAMETERS:
+                values[param] = float(PARAMETER_SET.values(param, [code], item)[0])
+        values.update(self._overrides.get((name, None), {}))
+        values.update(self._overrides.get((name, item), {}))
+        return values
+
+    def update_parameters(self, node, values, item=None):
+        # recompute the metrics rows of one node (one item of it, when given) under the posted values
+        unknown = set(values) - set(PARAMETERS)
+        if unknown or not values:
+            raise ValueError(f"parameters must be some of {sorted(PARAMETERS)}, got {sorted(values)}")
+        values = {param: float(value) for param, value in values.items()}
+        code = self.node_code(node)
+        name = self.code_map.get(code, code)
+        keys = [self._key(node, item)] if item is not None else [(code, key_item) for key_item in self._items[code]]
+        scope = (name, None if item is None else str(item))
+
+        start = time.perf_counter()
+        with self._lock:
+            previous = self._overrides.get(scope)
+            self._overrides[scope] = {**(previous or {}), **values}
+            try:
+                updates = [(key, self._recompute(key)) for key in keys]
+            except ValueError:
+                if previous is None:
+                    self._overrides.pop(scope)
+                else:
+                    self._overrides[scope] = previous
+                raise
+            for key, (echelon, rows, metrics) in updates:
+                frame = self.frames[echelon]
+                for col, column in metrics.items():
+                    if col not in frame.columns:
+                        frame[col] = np.nan
+                    frame.iloc[rows, frame.columns.get_loc(col)] = column
+                self._versions[key] = self._versions.get(key, 0) + 1
+        return {"node": int(code), "node_name": self.code_map.get(code), "item": scope[1], "parameters": values,
+                "rows": int(sum(len(rows) for _, (_, rows, _) in updates)),
+                "seconds": time.perf_counter() - start}
+
+    def _recompute(self, key):
+        echelon, rows, _ = self._index[key]
+        frame = self.frames[echelon]
+        demand_col = SCHEDULE_COLUMNS[echelon.lower()][2]
+        values = self._parameters(*key)
+        n = len(rows)
+        metrics = policy_metrics(
+            echelon,
+            frame[demand_col].to_numpy(dtype=float)[rows],
+            frame["std_demand"].to_numpy(dtype=float)[rows],
+            np.full(n, values["ordering_cost"]),
+            np.full(n, values["holding_cost"]),
+            np.full(n, values["lead_time"]),
+            np.full(n, values["shortage_cost"]),
+            days_in_month(frame["Year"].iloc[rows], frame["Month"].iloc[rows]),
+        )
+        return echelon, rows, metrics
+
+    def health(self):
+        policy_info = self._cached_policy.cache_info()
+        orders_info = self._cached_orders.cache_info()
+        return {
+            "status": "ok",
+            "uptime_seconds": time.time() - self.started,
+            "inventory_policy": inventory_policy,
+            "parameters_version": PARAMETER_SET.version if PARAMETER_SET is not None else None,
+            "rows": {echelon: len(frame) for echelon, frame in self.frames.items()},
+            "nodes": len(self._items),
+            "series": len(self._index),
+            "updated_series": len(self._versions),
+            "cache": {"policy": policy_info._asdict(), "orders": orders_info._asdict()},
+        }
+
+
+def _message(error):
+    return error.args[0] if isinstance(error, KeyError) and error.args else str(error)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # per-request logging is replaced by the latency metrics
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as error:
+            raise ValueError(f"request body is not JSON: {error}")
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        return body
+
+    def _handle(self, method):
+        service = self.server.service
+        url = urlsplit(self.path)
+        route = f"{method} {url.path}"
+        start = time.perf_counter()
+        status = 200
+        try:
+            if route == "GET /health":
+                body = service.health()
+            elif route == "GET /metrics":
+                body = {"routes": service.latency.snapshot(), "cache": service.health()["cache"]}
+            elif route == "GET /policy":
+                query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                body = service.policy(query.get("node"), query.get("item"), query.get("as_of"),
+                                      query.get("orders", DEFAULT_ORDERS))
+            elif route == "POST /policy":
+                queries = self._body().get("queries")
+                if not isinstance(queries, list):
+                    raise ValueError('body must hold a "queries" list')
+                body = {"results": service.policies(queries)}
+            elif route == "POST /parameters":
+                values = self._body()
+                node, item = values.pop("node", None), values.pop("item", None)
+                body = service.update_parameters(node, values, item)
+            else:
+                status, body = 404, {"error": f"no route {route}"}
+        except KeyError as error:
+            status, body = 404, {"error": _message(error)}
+        except (ValueError, TypeError) as error:
+            status, body = 400, {"error": str(error)}
+        except Exception as error:
+            logger.exception("%s failed", route)
+            status, body = 500, {"error": f"{type(error).__name__}: {error}"}
+        try:
+            self._send(status, body)
+        finally:
+            service.latency.record(route if route in ROUTES else "unmatched", time.perf_counter() - start, error=status >= 400)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+def make_server(service, host=service_host, port=service_port):
+    # port 0 binds a free port (server.server_address has it), for tests on localhost
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve EOQ, reorder point and next order lookups over HTTP")
+    parser.add_argument("--host", default=service_host)
+    parser.add_argument("--port", type=int, default=service_port)
+    parser.add_argument("--metrics-dir", default=str(calculated_metrics_path),
+                        help="directory of the *_monthly_metrics outputs of app.py")
+    parser.add_argument("--cache-size", type=int, default=service_cache_size)
+    args = parser.parse_args()
+
+    service = PolicyService.from_outputs(Path(args.metrics_dir), args.cache_size)
+    server = make_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"Serving {service.health()['series']} node series on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import warnings
+import numpy as np
+from scipy.special import ndtr,ndtri
+import batch_operations
+from Preassumptions import FILL_RATE
+
+# Continuous-review (r, Q) policy per node-month: lead-time demand is normal with mean demand * lead time
+# and standard deviation std_demand * sqrt(lead time) (months). r and Q depend on each other, so every
+# element runs the fixed-point iteration below in lockstep over NumPy arrays; each pass only touches
+# the elements that have not converged yet.
+
+OBJECTIVES = ("fill_rate", "shortage_cost")
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+# loss targets below this would put r at infinity (a fill rate of 1)
+MIN_LOSS = 1e-12
+
+
+def normal_loss(z):
+    # standard normal first-order loss E[(X - z)+]
+    z = np.asarray(z, dtype=float)
+    return np.exp(-0.5 * z * z) / np.sqrt(2 * np.pi) - z * ndtr(-z)
+
+
+def inverse_normal_loss(target, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    # z >= 0 with normal_loss(z) == target. Newton on log loss, which is concave: the first step from 0
+    # lands right of the root and the rest close in on it from there
+    log_target = np.log(np.maximum(np.asarray(target, dtype=float), MIN_LOSS))
+    z = np.zeros_like(log_target)
+    active = np.flatnonzero(log_target < np.log(normal_loss(0.0)))
+    for _ in range(max_iterations):
+        if not len(active):
+            break
+        za = z[active]
+        loss = normal_loss(za)
+        step = (np.log(loss) - log_target[active]) * loss / ndtr(-za)
+        z[active] = np.maximum(za + step, 0.0)
+        active = active[np.abs(step) > tolerance]
+    return z
+
+
+def solve_rq(demand, ordering_cost, holding_cost, sigma, shortage_cost=None, fill_rate=FILL_RATE, objective="fill_rate",
+             tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    # (order quantity, safety factor z, iterations, converged) per element; r = mean lead-time demand + z * sigma.
+    # Elements without demand or demand variability keep the EOQ and no safety stock.
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}, got {objective!r}")
+    demand, ordering_cost, holding_cost, sigma = np.broadcast_arrays(*[
+        np.asarray(value, dtype=float) for value in (demand, ordering_cost, holding_cost, sigma)])
+    q = np.array(batch_operations.EOQ(ordering_cost, holding_cost, demand), dtype=float)
+    z = np.zeros_like(q)
+    iterations = np.zeros(q.shape, dtype="int64")
+    active = np.flatnonzero((demand > 0) & (sigma > 0))
+
+    if objective == "shortage_cost":
+        shortage_cost = np.broadcast_to(np.asarray(shortage_cost, dtype=float), q.shape)
+        if np.any(~(shortage_cost.flat[active] > 0)):
+            raise ValueError("shortage_cost must be positive for every node with demand.")
+    elif not 0 < fill_rate < 1:
+        raise ValueError("fill_rate must be between 0 and 1.")
+
+    flat = [array.reshape(-1) for array in (q, z, iterations, demand, ordering_cost, holding_cost, sigma)]
+    q_flat, z_flat, iterations_flat, d, k, h, s = flat
+    for _ in range(max_iterations):
+        if not len(active):
+            break
+        qa, za = q_flat[active], z_flat[active]
+        da, ka, ha, sa = d[active], k[active], h[active], s[active]
+        if objective == "shortage_cost":
+            # Hadley-Whitin: stock out with probability Qh/(pD), order the EOQ with the expected backorder
+            # cost per cycle added to the ordering cost; z is kept at or above 0
+            pa = shortage_cost.reshape(-1)[active]
+            z_new = ndtri(1 - np.minimum(qa * ha / (pa * da), 0.5))
+            q_new = np.sqrt(2 * da * (ka + pa * sa * normal_loss(z_new)) / ha)
+        else:
+            # the units short per cycle may be (1 - fill rate) of Q, which fixes z; Q then balances ordering
+            # and holding cost given the shortage that z implies
+            z_new = inverse_normal_loss((1 - fill_rate) * qa / sa, tolerance, max_iterations)
+            short = sa * normal_loss(z_new) / ndtr(-z_new)
+            q_new = short + np.sqrt(2 * ka * da / ha + short * short)
+        done = (np.abs(q_new - qa) <= tolerance * np.maximum(qa, 1.0)) & (np.abs(z_new - za) <= tolerance)
+        q_flat[active] = q_new
+        z_flat[active] = z_new
+        iterations_flat[active] += 1
+        active = active[~done]
+
+    converged = np.ones(q.shape, dtype=bool)
+    converged.reshape(-1)[active] = False
+    return q, z, iterations, converged
+
+
+def rq_metrics(demand, ordering_cost, holding_cost, lead_time, std_demand, shortage_cost=None, fill_rate=FILL_RATE,
+               objective="fill_rate", days_in_month=30):
+    # METRIC_COLUMNS for the (r, Q) policy plus its fill rate: the reorder point is, as for the EOQ, the
+    # on-hand level that triggers an order (lead-time demand of the last partial cycle), here plus safety stock
+    demand = np.asarray(demand, dtype=float)
+    lead_time = np.asarray(lead_time, dtype=float)
+    sigma = np.sqrt(lead_time) * np.asarray(std_demand, dtype=float)
+    q, z, _, converged = solve_rq(demand, ordering_cost, holding_cost, sigma, shortage_cost, fill_rate, objective)
+    if not converged.all():
+        warnings.warn(f"(r, Q) policy: {np.count_nonzero(~converged)} of {converged.size} node-months did not converge",
+                      RuntimeWarning, stacklevel=2)
+
+    metrics = batch_operations.cycle_metrics(q, demand, lead_time, days_in_month)
+    ss = np.broadcast_to(z * sigma, demand.shape).astype(float)
+    metrics["reorder_point"] = metrics["reorder_point"] + ss
+    metrics["safety_stock"] = ss
+    metrics["total_stock"] = demand + ss
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics["fill_rate"] = np.where((sigma > 0) & (q > 0), 1 - sigma * normal_loss(z) / q, 1.0)
+    return metrics
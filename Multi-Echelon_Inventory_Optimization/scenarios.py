@@ -0,0 +1,142 @@
+import itertools
+import numpy as np
+import pandas as pd
+import batch_operations
+from node_registry import get_registry
+from inventory_common.resampling import days_in_month
+from Preassumptions import CODE_MAP,HOLDING_COST,LEAD_TIME,ORDERING_COST,Z_SCORE
+
+# scenario columns are "<parameter>.<target>" where target is a node name (ST2) or an
+# echelon (Warehouse); node overrides win over echelon overrides. "z_score" is global.
+PARAMETERS = {
+    "ordering_cost": ORDERING_COST,
+    "holding_cost": HOLDING_COST,
+    "lead_time": LEAD_TIME,
+}
+
+ECHELONS = ["DC", "Warehouse", "Store"]
+
+
+def scenario_grid(axes):
+    # {"holding_cost.Warehouse": [0.7, 0.84], "lead_time.ST2": [3, 2]} -> one row per combination
+    names = list(axes)
+    combos = list(itertools.product(*(axes[name] for name in names)))
+    grid = pd.DataFrame(combos, columns=names)
+    grid.index.name = "scenario"
+    return grid
+
+
+def network_rows(store_df, warehouse_df, dc_df, code_map=CODE_MAP):
+    # the three monthly tables stacked into one node-month axis, sorted by node
+    warehouse_dc = dict(zip(warehouse_df["Warehouse"], warehouse_df["DC"]))
+    frames = [
+        pd.DataFrame({"echelon": "DC", "node": dc_df["DC"], "dc": dc_df["DC"],
+                      "Year": dc_df["Year"], "Month": dc_df["Month"],
+                      "demand": dc_df["DC_Monthly_Demand"], "std_demand": dc_df["std_demand"]}),
+        pd.DataFrame({"echelon": "Warehouse", "node": warehouse_df["Warehouse"], "dc": warehouse_df["DC"],
+                      "Year": warehouse_df["Year"], "Month": warehouse_df["Month"],
+                      "demand": warehouse_df["Warehouse_Monthly_Demand"], "std_demand": warehouse_df["std_demand"]}),
+        pd.DataFrame({"echelon": "Store", "node": store_df["Store"], "dc": store_df["Warehouse"].map(warehouse_dc),
+                      "Year": store_df["Year"], "Month": store_df["Month"],
+                      "demand": store_df["Store_Monthly_Demand"], "std_demand": store_df["std_demand"]}),
+    ]
+    rows = pd.concat(frames, ignore_index=True)
+    rows["name"] = rows["node"].map(code_map)
+    rows["echelon"] = pd.Categorical(rows["echelon"], categories=ECHELONS)
+    return rows.sort_values(["echelon", "node", "Year", "Month"], ignore_index=True)
+
+
+def parameter_matrix(scenarios, parameter, rows, code_map=CODE_MAP):
+    # code_map must be the one network_rows named the rows with
+    base = get_registry(code_map).gather(rows["node"], PARAMETERS[parameter])
+    matrix = np.tile(base, (len(scenarios), 1))
+    prefix = f"{parameter}."
+    targets = [col for col in scenarios.columns if col.startswith(prefix)]
+    # echelon-wide overrides first so node-specific ones are applied on top
+    targets.sort(key=lambda col: col[len(prefix):] not in ECHELONS)
+    for col in targets:
+        target = col[len(prefix):]
+        if target in ECHELONS:
+            row_mask = (rows["echelon"] == target).to_numpy()
+        else:
+            row_mask = (rows["name"] == target).to_numpy()
+        values = scenarios[col].to_numpy(dtype=float)
+        mask = row_mask[None, :] & ~np.isnan(values)[:, None]
+        matrix = np.where(mask, values[:, None], matrix)
+    return matrix
+
+
+def _evaluate_block(scenarios, rows, demand, std_demand, is_dc, dc_index, node_starts, code_map):
+    ordering_cost = parameter_matrix(scenarios, "ordering_cost", rows, code_map)
+    holding_cost = parameter_matrix(scenarios, "holding_cost", rows, code_map)
+    lead_time = parameter_matrix(scenarios, "lead_time", rows, code_map)
+    if "z_score" in scenarios.columns:
+        z_score = scenarios["z_score"].fillna(Z_SCORE).to_numpy(dtype=float)[:, None]
+    else:
+        z_score = Z_SCORE
+
+    month_days = days_in_month(rows["Year"], rows["Month"])
+    metrics = batch_operations.eoq_metrics(demand, ordering_cost, holding_cost, lead_time, days_in_month=month_days)
+    eoq = metrics["monthly_eoq"]
+
+    # safety stock sits at the DC and is split down by demand share, as in dc/warehouse_distribution
+    safety_stock = np.where(is_dc, batch_operations.safety_stock(z_score, lead_time, std_demand), 0.0)
+    dc_total_stock = safety_stock + demand
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total_stock = demand / demand[dc_index] * dc_total_stock[:, dc_index]
+
+        # eoq_cost_function summed over the schedule: floor(D/Q) orders of ceil(Q) plus the balance order
+        no_of_orders = np.floor(demand / eoq)
+        balance_demand = np.mod(demand, eoq)
+    hold_per_unit = holding_cost * metrics["cycle_time_in_days"] / month_days / 2
+    eoq_cost = no_of_orders * (ordering_cost + np.ceil(eoq) * hold_per_unit)
+    eoq_cost = eoq_cost + (balance_demand > 0) * (ordering_cost + np.ceil(balance_demand) * hold_per_unit)
+    eoq_cost = np.where(np.isfinite(eoq_cost), eoq_cost, 0.0)
+
+    # non_eoq_cost_function: one order of the whole distributed stock
+    non_eoq_cost = ordering_cost + total_stock / 2 * holding_cost
+
+    def per_node(values):
+        return np.add.reduceat(np.nan_to_num(values), node_starts, axis=1)
+
+    months = np.diff(np.append(node_starts, len(demand)))
+    return {
+        "eoq_cost": per_node(eoq_cost),
+        "non_eoq_cost": per_node(non_eoq_cost),
+        "avg_reorder_point": per_node(metrics["reorder_point"]) / months,
+        "avg_safety_stock": per_node(safety_stock) / months,
+    }
+
+
+def evaluate_scenarios(store_df, warehouse_df, dc_df, scenarios, chunk_size=1024, code_map=CODE_MAP):
+    # every scenario in one broadcast over a (scenario, node-month) axis; chunk_size bounds memory
+    rows = network_rows(store_df, warehouse_df, dc_df, code_map)
+    demand = rows["demand"].to_numpy(dtype=float)
+    std_demand = rows["std_demand"].to_numpy(dtype=float)
+    is_dc = (rows["echelon"] == "DC").to_numpy()
+
+    dc_rows = pd.Series(np.flatnonzero(is_dc), index=pd.MultiIndex.from_frame(rows.loc[is_dc, ["node", "Year", "Month"]]))
+    dc_index = dc_rows.reindex(pd.MultiIndex.from_frame(rows[["dc", "Year", "Month"]])).to_numpy()
+    if np.isnan(dc_index).any():
+        raise ValueError("Every node-month needs a matching DC-month")
+    dc_index = dc_index.astype("int64")
+
+    node_starts = np.flatnonzero(~rows[["echelon", "node"]].duplicated().to_numpy())
+    nodes = rows.iloc[node_starts][["echelon", "node", "name"]].reset_index(drop=True)
+
+    tables = []
+    for start in range(0, len(scenarios), chunk_size):
+        block = scenarios.iloc[start:start + chunk_size]
+        results = _evaluate_block(block, rows, demand, std_demand, is_dc, dc_index, node_starts, code_map)
+        table = pd.DataFrame({
+            "scenario": np.repeat(block.index.to_numpy(), len(nodes)),
+            "echelon": np.tile(nodes["echelon"].to_numpy(), len(block)),
+            "node": np.tile(nodes["node"].to_numpy(), len(block)),
+            "name": np.tile(nodes["name"].to_numpy(), len(block)),
+            **{col: values.ravel() for col, values in results.items()},
+        })
+        tables.append(table)
+
+    result = pd.concat(tables, ignore_index=True)
+    result["savings"] = result["non_eoq_cost"] - result["eoq_cost"]
+    return result
@@ -1,62 +1,139 @@
+import numpy as np
 import pandas as pd
-from math import floor,ceil
-from datetime import datetime, timedelta
-from Preassumptions import STORE_SCHEDULE, WAREHOUSE_SCHEDULE
 
-def common_schedule_func(df, echelon_type):
-    if echelon_type.lower() == "warehouse":
-        echelon_col = "Warehouse"
-        parent_col = "DC"
-        demand_col = "Warehouse_Monthly_Demand"
-        output = WAREHOUSE_SCHEDULE
-    elif echelon_type.lower() == "store":
-        echelon_col = "Store"
-        parent_col = "Warehouse"
-        demand_col = "Store_Monthly_Demand"
-        output = STORE_SCHEDULE
-    else:
-        raise ValueError("Invalid echelon_type. Use 'warehouse' or 'store'.")
+SCHEDULE_COLUMNS = {
+    "warehouse": ("Warehouse", "DC", "Warehouse_Monthly_Demand"),
+    "store": ("Store", "Warehouse", "Store_Monthly_Demand"),
+    # the DC replenishes from an external supplier that has no node code
+    "dc": ("DC", "Supplier", "DC_Monthly_Demand"),
+}
+
+SCHEDULE_DTYPES = {
+    "From": "int64",
+    "Echelon": "int64",
+    "Year": "int64",
+    "Month": "int64",
+    "Date_Time": "datetime64[us]",
+    "Quantity": "int64",
+}
+
+
+# orders per streamed batch (iter_schedule_batches); memory per batch is a few dozen bytes per order
+SCHEDULE_BATCH_ROWS = 1_000_000
+# "month" batches one planning month across every node, "node" one node across the horizon
+SCHEDULE_PARTITIONS = ("month", "node")
+
 
+def empty_schedule():
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in SCHEDULE_DTYPES.items()})
+
+
+def _schedule_columns(df, echelon_type):
+    try:
+        echelon_col, parent_col, demand_col = SCHEDULE_COLUMNS[echelon_type.lower()]
+    except KeyError:
+        raise ValueError("Invalid echelon_type. Use 'dc', 'warehouse' or 'store'.")
+    if parent_col not in df.columns:
+        df = df.assign(**{parent_col: np.nan})
+    return df, echelon_col, parent_col, demand_col
+
+
+def common_schedule_func(df, echelon_type):
+    df, echelon_col, parent_col, demand_col = _schedule_columns(df, echelon_type)
     ss_df = df.sort_values([echelon_col, "Year", "Month"]).reset_index(drop=True)
+    return build_schedule(ss_df, echelon_col, parent_col, demand_col)
+
 
-    for i in range(len(ss_df)):
-        echelon_name = ss_df.loc[i, echelon_col]
-        parent_name = ss_df.loc[i, parent_col]
-        year = int(ss_df.loc[i, "Year"])
-        month = int(ss_df.loc[i, "Month"])
-
-        total_demand = ss_df.loc[i, demand_col]
-        eoq = ss_df.loc[i, "monthly_eoq"]
-        cycle = int(ss_df.loc[i, "cycle_time_in_days"])
-        full_cycles = int(ss_df.loc[i, "full_cycles_in_lead_time"])
-        days_before_start = cycle * full_cycles
-
-        no_of_orders = floor(total_demand / eoq)
-        balance_demand = total_demand % eoq
-
-        month_start = datetime(year, month, 1)
-        first_order_date = month_start - timedelta(days=days_before_start)
-        order_dates = [first_order_date + timedelta(days=j * cycle) for j in range(no_of_orders)]
-
-        for j in range(no_of_orders):
-            order = {
-                "From": parent_name,
-                "Echelon": echelon_name,
-                "Year": year,
-                "Month": month,
-                "Date_Time": order_dates[j],
-                "Quantity": ceil(eoq)
-            }
-            output.append(order)
-
-        if balance_demand > 0:
-            balance_order_date = first_order_date + timedelta(days=no_of_orders * cycle)
-            order = {
-                "From": parent_name,
-                "Echelon": echelon_name,
-                "Year": year,
-                "Month": month,
-                "Date_Time": balance_order_date,
-                "Quantity": ceil(balance_demand)
-            }
-            output.append(order)
+def _order_plan(ss_df, demand_col):
+    # per metrics row: order count, full-order size, balance and first order date
+    total_demand = ss_df[demand_col].to_numpy(dtype=float)
+    eoq = ss_df["monthly_eoq"].to_numpy(dtype=float)
+    cycle = np.trunc(ss_df["cycle_time_in_days"].to_numpy(dtype=float)).astype("int64")
+    full_cycles = np.trunc(ss_df["full_cycles_in_lead_time"].to_numpy(dtype=float)).astype("int64")
+    year = ss_df["Year"].to_numpy(dtype="int64")
+    month = ss_df["Month"].to_numpy(dtype="int64")
+
+    # rows without a usable EOQ (zero demand) produce no orders
+    with np.errstate(divide="ignore", invalid="ignore"):
+        no_of_orders = np.floor(total_demand / eoq)
+        balance_demand = np.mod(total_demand, eoq)
+    valid = np.isfinite(no_of_orders)
+    no_of_orders = np.where(valid, no_of_orders, 0).astype("int64")
+    has_balance = valid & (balance_demand > 0)
+
+    # every order is (row, position j) -> date = month start - lead cycles + j * cycle
+    month_start = ((year - 1970) * 12 + (month - 1)).astype("datetime64[M]").astype("datetime64[D]")
+    return {
+        "eoq": eoq,
+        "cycle": cycle,
+        "year": year,
+        "month": month,
+        "no_of_orders": no_of_orders,
+        "balance_demand": balance_demand,
+        "orders_per_row": no_of_orders + has_balance,
+        "first_order_date": month_start - (cycle * full_cycles).astype("timedelta64[D]"),
+    }
+
+
+def _orders(ss_df, plan, row, j, echelon_col, parent_col, carry_cols):
+    # the orders (row, j) of the plan as schedule columns
+    order_dates = plan["first_order_date"][row] + (j * plan["cycle"][row]).astype("timedelta64[D]")
+    is_balance = j >= plan["no_of_orders"][row]
+    quantity = np.where(is_balance, np.ceil(plan["balance_demand"][row]), np.ceil(plan["eoq"][row]))
+
+    schedule_df = pd.DataFrame({
+        **{col: ss_df[col].to_numpy()[row] for col in carry_cols},
+        "From": ss_df[parent_col].to_numpy()[row],
+        "Echelon": ss_df[echelon_col].to_numpy()[row],
+        "Year": plan["year"][row],
+        "Month": plan["month"][row],
+        "Date_Time": order_dates,
+        "Quantity": quantity,
+    })
+    # node ids keep their source dtype so networks keyed by names work too
+    return schedule_df.astype({col: dtype for col, dtype in SCHEDULE_DTYPES.items() if col not in ("From", "Echelon")})
+
+
+def build_schedule(ss_df, echelon_col, parent_col, demand_col, carry_cols=()):
+    # carry_cols are extra per-row columns (e.g. item, network level) repeated onto every order
+    if ss_df.empty:
+        return pd.concat([ss_df[list(carry_cols)].iloc[:0], empty_schedule()], axis=1)
+
+    plan = _order_plan(ss_df, demand_col)
+    orders_per_row = plan["orders_per_row"]
+    row = np.repeat(np.arange(len(ss_df)), orders_per_row)
+    row_start = np.cumsum(orders_per_row) - orders_per_row
+    j = np.arange(len(row)) - row_start[row]
+    return _orders(ss_df, plan, row, j, echelon_col, parent_col, carry_cols)
+
+
+def iter_schedule_batches(df, echelon_type, partition="month", batch_rows=SCHEDULE_BATCH_ROWS, carry_cols=()):
+    # The schedule of common_schedule_func as (partition label, orders, source rows) batches of at most
+    # batch_rows orders, none spanning two partitions; source rows is the slice of the sorted input the
+    # orders come from. Orders are materialised one batch at a time from the per-row plan, so memory
+    # follows batch_rows rather than the length of the horizon.
+    if partition not in SCHEDULE_PARTITIONS:
+        raise ValueError(f"partition must be one of {SCHEDULE_PARTITIONS}, got {partition!r}")
+    df, echelon_col, parent_col, demand_col = _schedule_columns(df, echelon_type)
+    keys = ["Year", "Month", echelon_col] if partition == "month" else [echelon_col, "Year", "Month"]
+    ss_df = df.sort_values(keys).reset_index(drop=True)
+    if ss_df.empty:
+        return
+
+    plan = _order_plan(ss_df, demand_col)
+    order_end = np.cumsum(plan["orders_per_row"])
+    row_start = order_end - plan["orders_per_row"]
+    if partition == "month":
+        labels = pd.Series(plan["year"]).map("{:04d}".format) + "-" + pd.Series(plan["month"]).map("{:02d}".format)
+    else:
+        labels = ss_df[echelon_col].astype(str)
+    labels = labels.to_numpy()
+    # rows are sorted by partition, so each partition is one run of rows and one range of orders
+    first_rows = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    last_rows = np.r_[first_rows[1:], len(ss_df)] - 1
+    for first_row, last_row in zip(first_rows, last_rows):
+        for start in range(row_start[first_row], order_end[last_row], batch_rows):
+            position = np.arange(start, min(start + batch_rows, order_end[last_row]))
+            row = np.searchsorted(order_end, position, side="right")
+            orders = _orders(ss_df, plan, row, position - row_start[row], echelon_col, parent_col, carry_cols)
+            yield labels[first_row], orders, ss_df.iloc[row[0]:row[-1] + 1]
@@ -0,0 +1,5 @@
+from schedules import common_schedule
+
+
+def dcs_schedule(df):
+    return common_schedule.common_schedule_func(df,"DC")
@@ -0,0 +1,176 @@
+import logging
+import numpy as np
+import pandas as pd
+from inventory_common.resampling import add_months
+from instrumentation import instrument
+from Preassumptions import CODE_MAP,DOCK_CAPACITY,LEAD_TIME
+
+logger = logging.getLogger(__name__)
+
+# The orders of one or more schedules, indexed twice: by (shipping node, ship day) for outbound
+# load and by (receiving node, arrival day) for inbound load. Each index packs node id and day into
+# one sorted int64 key, so a node's orders over a date range are one searchsorted pair and the
+# per-node daily or weekly loads are one reduceat over the sorted quantities.
+
+# "outbound" counts an order at its From node on its Date_Time; "inbound" at its Echelon node on arrival
+DIRECTIONS = ("outbound", "inbound")
+FREQUENCIES = {"day": 1, "week": 7}
+DAY_BITS = 32
+DAY_MASK = (1 << DAY_BITS) - 1
+LOAD_COLUMNS = ["node", "date", "quantity", "orders"]
+
+
+def _day(date):
+    return np.datetime64(pd.Timestamp(date).date(), "D")
+
+
+def _arrival_days(ship, node_lead, receivers):
+    # add_months over a (lead time, ship day) table: schedules hold few distinct lead times and
+    # span a few years of days, so the calendar arithmetic runs on that grid, not on every order
+    leads, node_lead_index = np.unique(node_lead, return_inverse=True)
+    lead_index = node_lead_index[receivers]
+    first = ship.min()
+    span = (ship.max() - first).astype("int64") + 1
+    days = first + np.arange(span)
+    grid = add_months(np.tile(days, len(leads)), np.repeat(leads, span)).reshape(len(leads), span)
+    return grid[lead_index, (ship - first).astype("int64")]
+
+
+class ScheduleStore:
+    def __init__(self, orders, lead_time=LEAD_TIME, code_map=CODE_MAP):
+        # orders: schedule rows (From, Echelon, Date_Time, Quantity and any carried columns); an order
+        # arrives one lead time of its receiving node (months, keyed by label or name) after it ships
+        self.code_map = dict(code_map)
+        self.orders = orders.reset_index(drop=True)
+        n = len(self.orders)
+        # From and Echelon share one id space; the DC's external supplier (NaN) gets -1 and no index entry
+        ids, self.nodes = pd.factorize(pd.concat([self.orders["From"], self.orders["Echelon"]], ignore_index=True))
+        if self.nodes.dtype.kind == "f":
+            self.nodes = self.nodes.astype("int64")
+        senders, receivers = ids[:n], ids[n:]
+
+        node_lead = np.array([lead_time.get(node, lead_time.get(self.code_map.get(node), 0)) for node in self.nodes], dtype=float)
+        ship = self.orders["Date_Time"].to_numpy().astype("datetime64[D]")
+        arrival = _arrival_days(ship, np.nan_to_num(node_lead), receivers) if n else ship
+        self.orders["Arrival_Date"] = arrival.astype("datetime64[us]")
+
+        # day offsets start a week early so week starts before the first order stay non-negative
+        self.day0 = (min(ship.min(), arrival.min()) if n else np.datetime64(0, "D")) - 7
+        self._index = {"outbound": self._sort(senders, ship), "inbound": self._sort(receivers, arrival)}
+        self._loads = {}
+
+    def __len__(self):
+        return len(self.orders)
+
+    @classmethod
+    def from_frames(cls, frames, lead_time=LEAD_TIME, code_map=CODE_MAP):
+        return cls(pd.concat(list(frames), ignore_index=True), lead_time, code_map)
+
+    def _sort(self, ids, days):
+        rows = np.flatnonzero(ids >= 0)
+        keys = (ids[rows].astype("int64") << DAY_BITS) | (days[rows] - self.day0).astype("int64")
+        order = np.argsort(keys)
+        return keys[order], rows[order]
+
+    def node_id(self, node):
+        # a node label as it appears in the schedules, or its name in the code map
+        position = self.nodes.get_indexer([node])[0]
+        if position < 0:
+            codes = [code for code, name in self.code_map.items() if name == node]
+            position = self.nodes.get_indexer(codes[:1])[0] if codes else -1
+        if position < 0:
+            raise KeyError(f"Node {node!r} has no orders in the schedule")
+        return position
+
+    def _range(self, keys, node, start, end):
+        node = np.int64(self.node_id(node)) << DAY_BITS
+        first = 0 if start is None else int(np.clip((_day(start) - self.day0).astype("int64"), 0, DAY_MASK))
+        last = DAY_MASK if end is None else int(np.clip((_day(end) - self.day0).astype("int64"), -1, DAY_MASK))
+        if last < first:
+            return 0, 0
+        return np.searchsorted(keys, node | first, "left"), np.searchsorted(keys, node | last, "right")
+
+    def _direction(self, direction):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}, got {direction!r}")
+        return self._index[direction]
+
+    def shipments(self, node, start=None, end=None, direction="outbound"):
+        # orders a node ships (or receives, for "inbound") between two dates, both inclusive, in date order
+        keys, rows = self._direction(direction)
+        lo, hi = self._range(keys, node, start, end)
+        return self.orders.take(rows[lo:hi])
+
+    def _rollup(self, direction, freq, week_start):
+        # (sorted node/period keys, load table) for every node with orders, built once per view
+        if freq not in FREQUENCIES:
+            raise ValueError(f"freq must be one of {list(FREQUENCIES)}, got {freq!r}")
+        view = (direction, freq, week_start)
+        if view not in self._loads:
+            keys, rows = self._direction(direction)
+            if freq == "week":
+                # 1970-01-01 was a Thursday (weekday 3); a node's days map to non-decreasing week starts
+                day = keys & DAY_MASK
+                keys = keys - (day + self.day0.astype("int64") + 3 - week_start) % 7
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype="int64")
+            quantity = self.orders["Quantity"].to_numpy()[rows]
+            period = keys[starts]
+            frame = pd.DataFrame({
+                "node": self.nodes.to_numpy()[period >> DAY_BITS],
+                "date": (self.day0 + (period & DAY_MASK)).astype("datetime64[us]"),
+                "quantity": np.add.reduceat(quantity, starts) if len(starts) else quantity[:0],
+                "orders": np.diff(np.append(starts, len(keys))),
+            })
+            self._loads[view] = period, frame
+        return self._loads[view]
+
+    def loads(self, direction="outbound", freq="day", week_start=0):
+        # quantity and order count per node and day (or week, dated by its first day); days without orders are absent
+        return self._rollup(direction, freq, week_start)[1]
+
+    def node_load(self, node, start=None, end=None, direction="outbound", freq="day", week_start=0):
+        # one node's loads over a date range with every day (or week) present, idle ones as zero
+        period, frame = self._rollup(direction, freq, week_start)
+        if start is not None and freq == "week":
+            # the week holding start counts in full
+            start = _day(start)
+            start -= (start.astype("int64") + 3 - week_start) % 7
+        lo, hi = self._range(period, node, start, end)
+        rows = frame.iloc[lo:hi]
+        if not len(rows) and (start is None or end is None):
+            return rows.reset_index(drop=True)
+        first = rows["date"].iloc[0] if start is None else start
+        last = rows["date"].iloc[-1] if end is None else end
+        dates = np.arange(_day(first), _day(last) + 1, FREQUENCIES[freq]).astype("datetime64[us]")
+        filled = rows.set_index("date")[["quantity", "orders"]].reindex(dates, fill_value=0)
+        filled.index.name = "date"
+        return filled.reset_index().assign(node=self.nodes[self.node_id(node)])[LOAD_COLUMNS]
+
+    def capacity_flags(self, capacity=DOCK_CAPACITY, direction="outbound", freq="day", breaches_only=True):
+        # capacity: units per day keyed by node name (or label); a week may carry seven days' worth.
+        # Nodes without a capacity are never flagged.
+        period, frame = self._rollup(direction, freq, 0)
+        per_node = np.array([capacity.get(self.code_map.get(node, node), capacity.get(node, np.nan)) for node in self.nodes],
+                            dtype=float)
+        if len(per_node) and np.isnan(per_node).all():
+            logger.warning("No node in the schedule has a dock capacity, so no %s breaches can be flagged", direction)
+        limit = per_node[period >> DAY_BITS] * FREQUENCIES[freq]
+        quantity = frame["quantity"].to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            utilisation = quantity / limit
+        flags = frame.assign(direction=direction, capacity=limit, utilisation=utilisation, over_capacity=quantity > limit)
+        if breaches_only:
+            return flags[flags["over_capacity"]].reset_index(drop=True)
+        return flags
+
+
+@instrument()
+def schedule_loads(schedule_frames, capacity=DOCK_CAPACITY, lead_time=LEAD_TIME, code_map=CODE_MAP):
+    # daily outbound/inbound load per node and the days over dock capacity, ready for write_outputs
+    store = ScheduleStore.from_frames(schedule_frames, lead_time, code_map)
+    return {
+        "daily_outbound_load": store.loads("outbound"),
+        "daily_inbound_load": store.loads("inbound"),
+        "dock_capacity_breaches": pd.concat([store.capacity_flags(capacity, direction) for direction in DIRECTIONS],
+                                            ignore_index=True),
+    }
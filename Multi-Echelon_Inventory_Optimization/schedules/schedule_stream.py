@@ -0,0 +1,53 @@
+import shutil
+from pathlib import Path
+import pandas as pd
+from schedules.common_schedule import SCHEDULE_BATCH_ROWS,empty_schedule,iter_schedule_batches
+from cost_comparison.cost_engine import COST_COLUMNS,COST_KEYS,schedule_costs
+from data_processing.Output_Data import write_partition
+from Preassumptions import HOLDING_COST,ORDERING_COST
+from config import item_col
+
+# echelon -> folder of its streamed orders, named like the in-memory schedule outputs
+STREAM_DIRECTORIES = {
+    "Store": "stores_order_schedule",
+    "Warehouse": "warehouses_order_schedule",
+    "DC": "dcs_order_schedule",
+}
+
+MANIFEST_COLUMNS = ["partition", "path", "rows"]
+
+
+def stream_schedule(demand_df, ordering_costs=ORDERING_COST, holding_costs=HOLDING_COST, item=None, echelon="Store",
+                    directory=".", output_format="parquet", partition="month", batch_rows=SCHEDULE_BATCH_ROWS):
+    # One echelon's orders generated a batch at a time; every batch is folded into the EOQ cost totals and
+    # written to the partitioned sink (tagged with its item, as the per-item outputs are) before the next
+    # one is built. Returns the manifest of files written and the echelon's rows of the EOQ cost table.
+    files = []
+    costs = []
+    for label, batch, source_rows in iter_schedule_batches(demand_df, echelon, partition, batch_rows):
+        # only the metrics rows the batch came from take part in its cycle-time merge
+        costs.append(schedule_costs(batch, source_rows, echelon, ordering_costs, holding_costs))
+        if item is not None:
+            batch.insert(0, item_col, item)
+        path = write_partition(batch, Path(directory)/STREAM_DIRECTORIES[echelon], label, output_format)
+        files.append((label, str(path), len(batch)))
+    if not costs:
+        costs.append(schedule_costs(empty_schedule(), demand_df, echelon, ordering_costs, holding_costs))
+    # a node-month's orders can span batches, so the partial totals are summed once more
+    cost_df = pd.concat(costs, ignore_index=True).groupby(COST_KEYS, dropna=False)["total_cost"].sum().reset_index()
+    return pd.DataFrame(files, columns=MANIFEST_COLUMNS), cost_df.assign(Level=echelon)[COST_COLUMNS]
+
+
+def clear_stream(directory):
+    # drop the previous run's streamed orders; batch files are uniquely named and would otherwise pile up
+    for name in STREAM_DIRECTORIES.values():
+        shutil.rmtree(Path(directory)/name, ignore_errors=True)
+
+
+def read_stream(manifest, columns=None):
+    # the streamed orders back, one written batch at a time
+    for path in manifest["path"]:
+        if str(path).endswith(".csv"):
+            yield pd.read_csv(path, usecols=columns, parse_dates=["Date_Time"])
+        else:
+            yield pd.read_parquet(path, columns=columns)
@@ -0,0 +1,129 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from inventory_common.resampling import add_months
+from schedules import common_schedule
+from Preassumptions import CODE_MAP,LEAD_TIME
+
+# echelon -> (node column, monthly demand column) of the metrics frames
+ECHELON_COLUMNS = {
+    "Store": ("Store", "Store_Monthly_Demand"),
+    "Warehouse": ("Warehouse", "Warehouse_Monthly_Demand"),
+    "DC": ("DC", "DC_Monthly_Demand"),
+}
+
+
+def _daily_inputs(metrics_df, schedule_df, node_col, demand_col, lead_time, code_map):
+    # per node-day demand mean/sd and deterministic receipts on one shared calendar
+    nodes = np.sort(metrics_df[node_col].unique())
+    node_index = pd.Series(np.arange(len(nodes)), index=nodes)
+
+    month_start = pd.to_datetime(pd.DataFrame({"year": metrics_df["Year"], "month": metrics_df["Month"], "day": 1}))
+    days_in_month = month_start.dt.days_in_month.to_numpy()
+    horizon_start = month_start.min()
+    horizon_end = (month_start + pd.to_timedelta(days_in_month, unit="D")).max()
+    days = (horizon_end - horizon_start).days
+
+    mean = np.zeros((len(nodes), days))
+    sd = np.zeros((len(nodes), days))
+    rows = node_index[metrics_df[node_col].to_numpy()].to_numpy()
+    first_day = (month_start - horizon_start).dt.days.to_numpy()
+    demand = metrics_df[demand_col].to_numpy(dtype=float)
+    std_demand = metrics_df["std_demand"].fillna(0).to_numpy(dtype=float)
+    # a month's demand is spread evenly over its days; the monthly std scales with sqrt(days)
+    day_rows = np.repeat(rows, days_in_month)
+    day_cols = np.repeat(first_day, days_in_month) + (np.arange(days_in_month.sum()) - np.repeat(np.cumsum(days_in_month) - days_in_month, days_in_month))
+    mean[day_rows, day_cols] = np.repeat(demand / days_in_month, days_in_month)
+    sd[day_rows, day_cols] = np.repeat(std_demand / np.sqrt(days_in_month), days_in_month)
+
+    # orders arrive one lead time (calendar months, as in aggreagation_func) after they are placed
+    receipts = np.zeros((len(nodes), days))
+    schedule_df = schedule_df[schedule_df["Echelon"].isin(nodes)]
+    node_lead_months = pd.Series(nodes).map(code_map).map(lead_time).to_numpy(dtype=float)
+    order_rows = node_index[schedule_df["Echelon"].to_numpy()].to_numpy()
+    arrival_day = add_months(schedule_df["Date_Time"], node_lead_months[order_rows])
+    arrival = (arrival_day - horizon_start.to_datetime64().astype("datetime64[D]")).astype("int64")
+    # stock that landed before the horizon is on hand at day 0; later arrivals fall outside the run
+    arrival = np.maximum(arrival, 0)
+    inside = arrival < days
+    np.add.at(receipts, (order_rows[inside], arrival[inside]), schedule_df["Quantity"].to_numpy(dtype=float)[inside])
+
+    first_rows = metrics_df.sort_values(["Year", "Month"]).drop_duplicates(node_col)
+    initial = first_rows["reorder_point"].fillna(0).to_numpy(dtype=float)
+    if "safety_stock" in first_rows.columns:
+        initial = initial + first_rows["safety_stock"].fillna(0).to_numpy(dtype=float)
+    initial = pd.Series(initial, index=first_rows[node_col].to_numpy()).reindex(nodes).to_numpy()
+    return nodes, mean, sd, receipts, initial
+
+
+def simulate_block(task):
+    # lost-sales daily simulation for a block of nodes, vectorised over (node, replication)
+    mean, sd, receipts, initial, replications, seed = task
+    rng = np.random.default_rng(seed)
+    n_nodes, days = mean.shape
+
+    on_hand = np.repeat(initial[:, None], replications, axis=1)
+    total_demand = np.zeros((n_nodes, replications))
+    total_served = np.zeros((n_nodes, replications))
+    stockout_days = np.zeros((n_nodes, replications))
+    on_hand_sum = np.zeros((n_nodes, replications))
+    active_days = np.maximum((mean > 0).sum(axis=1), 1)
+
+    for day in range(days):
+        on_hand += receipts[:, day, None]
+        demand = np.maximum(mean[:, day, None] + sd[:, day, None] * rng.standard_normal((n_nodes, replications)), 0.0)
+        served = np.minimum(demand, on_hand)
+        on_hand -= served
+        total_demand += demand
+        total_served += served
+        stockout_days += demand > served + 1e-9
+        on_hand_sum += on_hand
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fill_rate = np.where(total_demand > 0, total_served / total_demand, 1.0)
+    return {
+        "fill_rate": fill_rate.mean(axis=1),
+        "fill_rate_p05": np.percentile(fill_rate, 5, axis=1),
+        "stockout_probability": (stockout_days / active_days[:, None]).mean(axis=1),
+        "any_stockout_probability": (stockout_days > 0).mean(axis=1),
+        "avg_on_hand": (on_hand_sum / days).mean(axis=1),
+    }
+
+
+def simulate_echelon(metrics_df, echelon, schedule_df=None, replications=1000, seed=None, max_workers=1,
+                     nodes_per_task=64, lead_time=LEAD_TIME, code_map=CODE_MAP):
+    node_col, demand_col = ECHELON_COLUMNS[echelon]
+    if schedule_df is None:
+        # the DC has no upstream schedule in the pipeline; derive its own EOQ orders
+        schedule_df = common_schedule.common_schedule_func(metrics_df, echelon)
+
+    nodes, mean, sd, receipts, initial = _daily_inputs(metrics_df, schedule_df, node_col, demand_col, lead_time, code_map)
+
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seeds = seed_sequence.spawn((len(nodes) + nodes_per_task - 1) // nodes_per_task)
+    tasks = [
+        (mean[start:start + nodes_per_task], sd[start:start + nodes_per_task], receipts[start:start + nodes_per_task],
+         initial[start:start + nodes_per_task], replications, block_seed)
+        for block_seed, start in zip(seeds, range(0, len(nodes), nodes_per_task))
+    ]
+    if max_workers == 1:
+        results = list(map(simulate_block, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(simulate_block, tasks))
+
+    summary = pd.DataFrame({col: np.concatenate([result[col] for result in results]) for col in results[0]})
+    summary.insert(0, "node", nodes)
+    summary.insert(0, "echelon", echelon)
+    summary["replications"] = replications
+    return summary
+
+
+def simulate_network(store_demand_df, warehouse_demand_df, dc_demand_df, store_schedule_df, warehouse_schedule_df,
+                     replications=1000, seed=None, max_workers=1, nodes_per_task=64):
+    seeds = np.random.SeedSequence(seed).spawn(3)
+    return pd.concat([
+        simulate_echelon(dc_demand_df, "DC", None, replications, seeds[0], max_workers, nodes_per_task),
+        simulate_echelon(warehouse_demand_df, "Warehouse", warehouse_schedule_df, replications, seeds[1], max_workers, nodes_per_task),
+        simulate_echelon(store_demand_df, "Store", store_schedule_df, replications, seeds[2], max_workers, nodes_per_task),
+    ], ignore_index=True)
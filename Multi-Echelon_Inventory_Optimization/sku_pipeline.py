@@ -0,0 +1,78 @@
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pipeline_graph import OUTPUT_NAMES,run_pipeline
+from Preassumptions import ORDERING_COST,HOLDING_COST,LEAD_TIME,PARAMETER_SET,SHORTAGE_COST
+from config import item_col
+from instrumentation import current_run,instrument,start_run
+
+
+def item_costs(sku_costs, item):
+    # per-item (ordering_cost, holding_cost, lead_time, shortage_cost) keyed by node name: the loaded parameter
+    # tables' SKU and lane overrides first, then the sku_costs frame on top
+    # sku_costs: Item, Node (name as in CODE_MAP), ordering_cost, holding_cost, lead_time, shortage_cost; blanks keep
+    # the node default
+    if PARAMETER_SET is not None and item is not None:
+        costs = PARAMETER_SET.item_tables(item)
+    else:
+        costs = dict(ORDERING_COST), dict(HOLDING_COST), dict(LEAD_TIME), dict(SHORTAGE_COST)
+    if sku_costs is None:
+        return costs
+
+    rows = sku_costs[sku_costs["Item"] == item]
+    for col, values in zip(("ordering_cost", "holding_cost", "lead_time", "shortage_cost"), costs):
+        if col in rows.columns:
+            overrides = rows[["Node", col]].dropna()
+            values.update(zip(overrides["Node"], overrides[col].astype(float)))
+    return costs
+
+
+def run_item(task):
+    item, item_df, ordering_cost, holding_cost, lead_time, shortage_cost, demand_stats = task
+
+    # lane_monthly -> echelon tables -> metrics -> distribution/schedules -> costs, independent stages concurrently
+    results = run_pipeline(item_df, ordering_cost, holding_cost, lead_time, shortage_cost=shortage_cost, item=item,
+                           demand_stats=demand_stats)
+    frames = [results[name] for name in OUTPUT_NAMES]
+    for frame in frames:
+        frame.insert(0, item_col, item)
+    return frames
+
+
+def item_stats(demand_stats):
+    # item -> {echelon: that item's stored node-month statistics}; None when there are none
+    if demand_stats is None:
+        return lambda item: None
+    groups = {}
+    for echelon, frame in demand_stats.items():
+        if item_col not in frame.columns:
+            groups[echelon] = {None: frame}
+            continue
+        groups[echelon] = {item: item_frame.drop(columns=item_col).reset_index(drop=True)
+                           for item, item_frame in frame.groupby(item_col, sort=False)}
+    empty = {echelon: frame.iloc[:0].drop(columns=item_col, errors="ignore") for echelon, frame in demand_stats.items()}
+    return lambda item: {echelon: groups[echelon].get(None if item is None else str(item), empty[echelon]) for echelon in groups}
+
+
+def item_tasks(df, sku_costs=None, demand_stats=None):
+    # demand_stats: {echelon: stored node-month statistics}, split per item along with df
+    stats = item_stats(demand_stats)
+    if item_col not in df.columns:
+        yield None, df, *item_costs(sku_costs, None), stats(None)
+        return
+    for item, item_df in df.groupby(item_col, sort=True):
+        yield item, item_df.reset_index(drop=True), *item_costs(sku_costs, item), stats(item)
+
+
+@instrument()
+def run_multi_sku(df, max_workers=None, chunk_size=1, sku_costs=None, demand_stats=None):
+    tasks = item_tasks(df, sku_costs, demand_stats)
+    if max_workers == 1:
+        results = list(map(run_item, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=start_run, initargs=(current_run(),)) as executor:
+            results = list(executor.map(run_item, tasks, chunksize=chunk_size))
+
+    if not results:
+        raise ValueError("No item partitions to process.")
+    combined = [pd.concat(frames, ignore_index=True) for frames in zip(*results)]
+    return dict(zip(OUTPUT_NAMES, combined))
@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+import pytest
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PACKAGE_DIR))
+# config creates its output directories relative to the working directory on import; keep them out of the tree
+os.chdir(tempfile.mkdtemp(prefix="meio-tests-"))
+
+SAMPLE_PATH = PACKAGE_DIR / "data" / "Sample_2.csv"
+
+
+@pytest.fixture(scope="session")
+def weekly():
+    from data_processing.Input_Data import iter_file_chunks
+    from data_processing.Data_Aggregate import aggregate_chunks
+    return aggregate_chunks(iter_file_chunks(SAMPLE_PATH))
@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+from app_function_call import aggregate,calculate_metrics
+
+
+def test_stores_keep_the_dc_of_their_lane(weekly):
+    # a second DC supplying a copy of the network under other codes
+    second = weekly.assign(DC=weekly["DC"] + 1, Warehouse=weekly["Warehouse"] + 1, Store=weekly["Store"] + 1)
+    store_df, warehouse_df, _ = aggregate(pd.concat([weekly, second], ignore_index=True))
+    lanes = warehouse_df[["Warehouse", "DC"]].drop_duplicates()
+    merged = store_df.merge(lanes, on="Warehouse", suffixes=("", "_lane"))
+    assert len(merged) == len(store_df)
+    assert (merged["DC"] == merged["DC_lane"]).all()
+    assert store_df["DC"].nunique() == 2
+
+
+def test_unknown_node_codes_raise(weekly):
+    unknown = weekly.assign(Store=weekly["Store"].where(weekly["Store"] != weekly["Store"].iloc[0], 999))
+    with pytest.raises(ValueError, match="999"):
+        calculate_metrics(*aggregate(unknown))
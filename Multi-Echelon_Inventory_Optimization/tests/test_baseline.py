@@ -0,0 +1,105 @@
+from datetime import datetime,timedelta
+from math import ceil,floor
+import numpy as np
+import pandas as pd
+import pytest
+import batch_operations
+from operations import operations
+from app_function_call import aggregate,calculate_metrics,schedule
+from inventory_common.resampling import days_in_month
+from Preassumptions import CODE_MAP,HOLDING_COST,LEAD_TIME,ORDERING_COST,Z_SCORE
+
+# The per-row loops the batched kernels replaced (aggreagation_func and common_schedule_func before
+# user-001/002), run on the same monthly tables of Sample_2.csv
+
+METRIC_COLUMNS = ["monthly_eoq", "cycle_time", "cycle_time_in_days", "cycle_time_in_hr", "full_cycles_in_lead_time",
+                  "effective_lead_time", "reorder_point"]
+
+
+def loop_metrics(df, echelon):
+    rows = []
+    demand_col = f"{echelon}_Monthly_Demand"
+    for i in range(len(df)):
+        name = CODE_MAP[df.loc[i, echelon]]
+        lead_time = LEAD_TIME[name]
+        demand = df.loc[i, demand_col]
+        row = {"monthly_eoq": operations.EOQ(ORDERING_COST[name], HOLDING_COST[name], demand)}
+        row["cycle_time"] = operations.cycle_time(row["monthly_eoq"], demand)
+        row["cycle_time_in_days"] = operations.cycle_time_month_to_days(
+            row["cycle_time"], days_in_month(df.loc[[i], "Year"], df.loc[[i], "Month"])[0])
+        row["cycle_time_in_hr"] = operations.cycle_time_days_to_hrs(row["cycle_time_in_days"])
+        row["full_cycles_in_lead_time"] = operations.full_cycle_in_lead_time(lead_time, row["cycle_time"])
+        row["effective_lead_time"] = operations.effective_lead_time(lead_time, row["full_cycles_in_lead_time"], row["cycle_time"])
+        row["reorder_point"] = operations.reorder_point(demand, row["effective_lead_time"])
+        if echelon == "DC":
+            row["safety_stock"] = operations.safety_stock(Z_SCORE, lead_time, df.loc[i, "std_demand"])
+            row["total_stock"] = row["safety_stock"] + demand
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def loop_schedule(df, echelon_col, parent_col, demand_col):
+    orders = []
+    ss_df = df.sort_values([echelon_col, "Year", "Month"]).reset_index(drop=True)
+    for i in range(len(ss_df)):
+        total_demand = ss_df.loc[i, demand_col]
+        eoq = ss_df.loc[i, "monthly_eoq"]
+        cycle = int(ss_df.loc[i, "cycle_time_in_days"])
+        first_order_date = datetime(int(ss_df.loc[i, "Year"]), int(ss_df.loc[i, "Month"]), 1) - timedelta(
+            days=cycle * int(ss_df.loc[i, "full_cycles_in_lead_time"]))
+        order = {"From": ss_df.loc[i, parent_col], "Echelon": ss_df.loc[i, echelon_col],
+                 "Year": int(ss_df.loc[i, "Year"]), "Month": int(ss_df.loc[i, "Month"])}
+        no_of_orders = floor(total_demand / eoq)
+        for j in range(no_of_orders):
+            orders.append({**order, "Date_Time": first_order_date + timedelta(days=j * cycle), "Quantity": ceil(eoq)})
+        if total_demand % eoq > 0:
+            orders.append({**order, "Date_Time": first_order_date + timedelta(days=no_of_orders * cycle),
+                           "Quantity": ceil(total_demand % eoq)})
+    return pd.DataFrame(orders)
+
+
+@pytest.fixture(scope="module")
+def pipeline(weekly):
+    monthly = aggregate(weekly)
+    metrics = calculate_metrics(*[frame.copy() for frame in monthly])
+    return monthly, metrics, schedule(metrics[0], metrics[1])
+
+
+@pytest.mark.parametrize("position,echelon", [(0, "Store"), (1, "Warehouse"), (2, "DC")])
+def test_metrics_match_row_loop(pipeline, position, echelon):
+    monthly, metrics, _ = pipeline
+    expected = loop_metrics(monthly[position].reset_index(drop=True), echelon)
+    result = metrics[position].reset_index(drop=True)[list(expected.columns)]
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, rtol=1e-12)
+
+
+@pytest.mark.parametrize("position,columns", [(0, ("Store", "Warehouse", "Store_Monthly_Demand")),
+                                              (1, ("Warehouse", "DC", "Warehouse_Monthly_Demand"))])
+def test_schedule_matches_row_loop(pipeline, position, columns):
+    _, metrics, schedules = pipeline
+    expected = loop_schedule(metrics[position], *columns)
+    result = schedules[position][list(expected.columns)]
+    assert len(expected) > 0
+    sort_cols = list(expected.columns)
+    pd.testing.assert_frame_equal(result.sort_values(sort_cols, ignore_index=True),
+                                  expected.sort_values(sort_cols, ignore_index=True), check_dtype=False)
+
+
+def test_schedule_does_not_accumulate(pipeline):
+    _, metrics, schedules = pipeline
+    again = schedule(metrics[0], metrics[1])
+    assert [len(frame) for frame in again] == [len(frame) for frame in schedules]
+
+
+def test_monthly_rolling_stats(pipeline):
+    # std_demand is the 3-month rolling standard deviation of each node's own monthly totals, 0 for a first month
+    store_df = pipeline[0][0].drop_duplicates(["Store", "Year", "Month"]).sort_values(["Store", "Year", "Month"])
+    expected = store_df.groupby("Store")["Store_Monthly_Demand"].rolling(3, min_periods=1).std().fillna(0.0)
+    np.testing.assert_allclose(store_df["std_demand"].to_numpy(), expected.to_numpy())
+
+
+@pytest.mark.parametrize("ordering_cost,holding_cost,demand", [(np.nan, 1.0, 10.0), (10.0, np.nan, 10.0), (10.0, 1.0, np.nan),
+                                                               (-1.0, 1.0, 10.0), (10.0, 0.0, 10.0), (10.0, 1.0, -1.0)])
+def test_eoq_rejects_invalid_parameters(ordering_cost, holding_cost, demand):
+    with pytest.raises(ValueError):
+        batch_operations.EOQ([10.0, ordering_cost], [1.0, holding_cost], [10.0, demand])
@@ -0,0 +1,13 @@
+import os
+import Preassumptions
+from benchmark.run_benchmark import run_benchmark
+
+
+def test_run_benchmark_restores_cwd_and_parameters(tmp_path):
+    cwd = os.getcwd()
+    tables = {name: dict(getattr(Preassumptions, name)) for name in ("CODE_MAP", "ORDERING_COST", "HOLDING_COST", "LEAD_TIME")}
+    report = run_benchmark(["small"], repeats=1, memory=False, work_dir=tmp_path)
+    assert os.getcwd() == cwd
+    assert {name: getattr(Preassumptions, name) for name in tables} == tables
+    assert report["results"][0]["nodes"] == 9
+    assert report["results"][0]["stages"][0]["rows_out"] == report["results"][0]["input_rows"]
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+import pipeline_graph
+from checkpoint_cache import CheckpointCache
+from pipeline_graph import OUTPUT_NAMES,run_pipeline
+
+
+@pytest.fixture
+def stages_run(monkeypatch):
+    names = []
+    run_stage = pipeline_graph._run_stage
+
+    def recording(name, *args):
+        names.append(name)
+        return run_stage(name, *args)
+    monkeypatch.setattr(pipeline_graph, "_run_stage", recording)
+    return names
+
+
+def test_warm_run_matches_cold_run(weekly, tmp_path, stages_run):
+    cache = CheckpointCache(tmp_path)
+    cold = run_pipeline(weekly, max_workers=1, cache=cache, placement=False, streaming=False)
+    assert "lane_monthly" in stages_run
+    entries = len(cache.entries())
+
+    stages_run.clear()
+    warm = run_pipeline(weekly, max_workers=1, cache=cache, placement=False, streaming=False)
+    # every output comes from the cache, so no stage runs and nothing new is stored
+    assert stages_run == []
+    assert len(cache.entries()) == entries
+    for name in OUTPUT_NAMES:
+        pd.testing.assert_frame_equal(warm[name], cold[name])
+
+
+def test_changed_input_misses_the_cache(weekly, tmp_path, stages_run):
+    cache = CheckpointCache(tmp_path)
+    run_pipeline(weekly, max_workers=1, cache=cache, placement=False, streaming=False)
+    entries = len(cache.entries())
+
+    stages_run.clear()
+    changed = weekly.copy()
+    changed.loc[0, "Actual"] += 100
+    result = run_pipeline(changed, max_workers=1, cache=cache, placement=False, streaming=False)
+    assert "lane_monthly" in stages_run
+    assert len(cache.entries()) > entries
+    pd.testing.assert_frame_equal(result["store_df"], run_pipeline(changed, max_workers=1, cache=None)["store_df"])
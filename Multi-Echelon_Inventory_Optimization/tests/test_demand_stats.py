@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from demand_stats import DemandStats
+from inventory_common.resampling import week_to_month
+
+
+@pytest.fixture
+def monthly():
+    rng = np.random.default_rng(1)
+    rows = []
+    for node in range(30):
+        for item in ("a", "b"):
+            months = np.sort(rng.choice(np.arange(24000, 24060), rng.integers(1, 40), replace=False))
+            rows.extend((item, node, period // 12, period % 12 + 1, rng.gamma(2, 500)) for period in months)
+    return pd.DataFrame(rows, columns=["item", "node", "Year", "Month", "demand"])
+
+
+def test_update_matches_pandas(monthly):
+    stats = DemandStats(["item", "node"], window=3, alpha=0.3)
+    shuffled = monthly.sample(frac=1, random_state=0)
+    result = stats.update(shuffled, "demand").set_index(shuffled.index).loc[monthly.index]
+    grouped = monthly.groupby(["item", "node"])["demand"]
+    expected = {
+        "window_mean": grouped.rolling(3, min_periods=1).mean().droplevel([0, 1]),
+        "window_std": grouped.rolling(3, min_periods=1).std().droplevel([0, 1]),
+        "mean": grouped.expanding().mean().droplevel([0, 1]),
+        "std": grouped.expanding().std().droplevel([0, 1]),
+        "ewm_mean": grouped.transform(lambda x: x.ewm(alpha=0.3).mean()),
+        "ewm_std": grouped.transform(lambda x: x.ewm(alpha=0.3).std()),
+    }
+    for col, values in expected.items():
+        np.testing.assert_allclose(result[col], values.loc[monthly.index], rtol=1e-9, equal_nan=True, err_msg=col)
+
+
+def test_merge_matches_single_pass(monthly):
+    single = DemandStats(["item", "node"])
+    single.update(monthly, "demand")
+    # earlier months in one state, later months split by item over two more
+    early = monthly["Year"] * 12 + monthly["Month"] - 1 < 24030
+    merged = DemandStats(["item", "node"])
+    merged.update(monthly[early], "demand")
+    late_a, late_b = DemandStats(["item", "node"]), DemandStats(["item", "node"])
+    late_a.update(monthly[~early & (monthly["item"] == "a")], "demand")
+    late_b.update(monthly[~early & (monthly["item"] == "b")], "demand")
+    merged.merge(late_a.merge(late_b))
+    np.testing.assert_allclose(merged.stats(merged.keys.get_indexer(single.keys)).to_numpy(dtype=float),
+                               single.stats().to_numpy(dtype=float), rtol=1e-9, equal_nan=True)
+
+
+def test_merge_rejects_other_settings():
+    with pytest.raises(ValueError):
+        DemandStats(["node"], window=3).merge(DemandStats(["node"], window=4))
+
+
+def test_weeks_match_monthly_update():
+    rng = np.random.default_rng(2)
+    weeks = pd.date_range("2022-01-03", periods=150, freq="7D")
+    weekly = pd.DataFrame({"node": np.repeat([1, 2, 3], len(weeks)), "week": np.tile(weeks, 3),
+                           "demand": rng.gamma(2, 100, 3 * len(weeks))})
+    stats = DemandStats(["node"])
+    for chunk in np.array_split(np.arange(len(weeks)), 7):
+        stats.add_weeks(weekly[weekly["week"].isin(weeks[chunk])], "week", "demand")
+    stats.close()
+    expected = DemandStats(["node"])
+    expected.update(week_to_month(weekly, "week", "demand", key_cols=["node"], sort=True), "demand")
+    np.testing.assert_allclose(stats.stats().to_numpy(dtype=float), expected.stats().to_numpy(dtype=float), rtol=1e-9)
+    with pytest.raises(ValueError):
+        stats.add_weeks(weekly.iloc[:3], "week", "demand")
+
+
+def test_save_load_round_trip(monthly, tmp_path):
+    stats = DemandStats(["item", "node"], window=4, alpha=0.2)
+    stats.update(monthly, "demand")
+    loaded = DemandStats.load(stats.save(tmp_path / "stats.parquet"))
+    assert (loaded.key_cols, loaded.window, loaded.alpha) == (stats.key_cols, stats.window, stats.alpha)
+    pd.testing.assert_frame_equal(loaded.stats(), stats.stats())
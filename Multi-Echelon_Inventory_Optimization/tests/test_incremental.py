@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+from incremental import run_incremental,SORT_COLUMNS
+from sku_pipeline import run_multi_sku
+
+
+def normalised(results):
+    frames = {}
+    for name, frame in results.items():
+        sort_cols = ["ItemStat_Item"] + SORT_COLUMNS[name] + (["Date_Time"] if "Date_Time" in frame.columns else [])
+        frames[name] = frame.sort_values(sort_cols, kind="stable", ignore_index=True)
+    return frames
+
+
+def assert_same(left, right):
+    left, right = normalised(left), normalised(right)
+    assert left.keys() == right.keys()
+    for name in left:
+        pd.testing.assert_frame_equal(left[name], right[name], check_dtype=False, check_categorical=False, rtol=1e-9,
+                                      obj=name)
+
+
+@pytest.fixture(scope="module")
+def two_items(weekly):
+    second = weekly.assign(ItemStat_Item="X", Actual=weekly["Actual"] * 2)
+    df = pd.concat([weekly, second], ignore_index=True)
+    df["ItemStat_Item"] = df["ItemStat_Item"].astype(str).astype("category")
+    return df
+
+
+def test_first_run_matches_full_pipeline(two_items, tmp_path):
+    old = two_items[two_items["TimeWeek"] <= two_items["TimeWeek"].max() - pd.Timedelta(days=60)]
+    assert_same(run_incremental(old, tmp_path / "store", max_workers=1), run_multi_sku(old, max_workers=1))
+
+
+def test_delta_run_matches_rebuild(two_items, tmp_path):
+    old = two_items[two_items["TimeWeek"] <= two_items["TimeWeek"].max() - pd.Timedelta(days=60)]
+    run_incremental(old, tmp_path / "store", max_workers=1)
+    # new weeks at the end plus a revised week at the start of one item
+    new = two_items.copy()
+    revised = (new["ItemStat_Item"] == "X") & (new["TimeWeek"] == new["TimeWeek"].min())
+    new.loc[revised, "Actual"] += 1
+    delta = run_incremental(new, tmp_path / "store", max_workers=1)
+    assert_same(delta, run_incremental(new, tmp_path / "rebuild", max_workers=1))
+    assert_same(delta, run_multi_sku(new, max_workers=1))
+
+
+def test_unchanged_run_is_identical(two_items, tmp_path):
+    first = run_incremental(two_items, tmp_path / "store", max_workers=1)
+    assert_same(first, run_incremental(two_items, tmp_path / "store", max_workers=1))
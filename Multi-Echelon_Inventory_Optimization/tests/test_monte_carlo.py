@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from simulation.monte_carlo import simulate_echelon
+
+CODE_MAP = {1: "S1", 2: "S2"}
+
+
+def inputs(quantity):
+    months = pd.DataFrame({"Year": 2024, "Month": [1, 2, 3]})
+    metrics_df = pd.concat([months.assign(Store=code) for code in CODE_MAP], ignore_index=True)
+    metrics_df["Store_Monthly_Demand"] = 300.0
+    metrics_df["std_demand"] = 0.0
+    metrics_df["reorder_point"] = 0.0
+    # each month's demand lands on its first day
+    schedule_df = pd.DataFrame({
+        "Echelon": metrics_df["Store"],
+        "Date_Time": pd.to_datetime(pd.DataFrame({"year": metrics_df["Year"], "month": metrics_df["Month"], "day": 1})),
+        "Quantity": quantity,
+    })
+    return metrics_df, schedule_df
+
+
+def test_covered_deterministic_demand_is_always_filled():
+    # a little more than the month needs, so rounding in the daily split never leaves a day short
+    metrics_df, schedule_df = inputs(310.0)
+    summary = simulate_echelon(metrics_df, "Store", schedule_df, replications=50, seed=0,
+                               lead_time={"S1": 0, "S2": 0}, code_map=CODE_MAP)
+    assert summary["node"].tolist() == [1, 2]
+    assert (summary["fill_rate"] == 1).all()
+    assert (summary["stockout_probability"] == 0).all()
+
+
+def test_short_receipts_and_seeded_runs():
+    metrics_df, schedule_df = inputs(150.0)
+    first, second = (simulate_echelon(metrics_df.assign(std_demand=30.0), "Store", schedule_df, replications=50, seed=7,
+                                      lead_time={"S1": 0, "S2": 0}, code_map=CODE_MAP) for _ in range(2))
+    pd.testing.assert_frame_equal(first, second)
+    # half of each month's demand arrives, so about half of it is served
+    np.testing.assert_allclose(first["fill_rate"], 0.5, atol=0.05)
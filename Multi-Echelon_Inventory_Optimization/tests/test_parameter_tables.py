@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+import parameter_tables
+from parameter_tables import ParameterSet,load_parameters
+
+
+@pytest.fixture
+def tables_dir(tmp_path):
+    directory = tmp_path / "v1"
+    directory.mkdir()
+    pd.DataFrame({"code": [1, 2, 3, 4], "name": ["D", "W", "S1", "S2"], "echelon": ["DC", "Warehouse", "Store", "Store"],
+                  "ordering_cost": [np.nan, np.nan, 11, np.nan], "lead_time": [1, 3, np.nan, np.nan]}).to_csv(directory / "nodes.csv", index=False)
+    pd.DataFrame({"scope": ["*", "Store"], "ordering_cost": [5, 7], "holding_cost": [0.5, np.nan],
+                  "lead_time": [9, np.nan]}).to_csv(directory / "defaults.csv", index=False)
+    pd.DataFrame({"item": ["007", "007"], "node": ["S2", "S1"], "ordering_cost": [13, np.nan], "holding_cost": [np.nan, 0.9],
+                  "lead_time": [5, np.nan]}).to_csv(directory / "sku.csv", index=False)
+    pd.DataFrame({"parent": ["W", "W", "W"], "child": ["S1", "S2", "S2"], "item": [np.nan, np.nan, "007"],
+                  "lead_time": [4, 6, 8]}).to_csv(directory / "lanes.csv", index=False)
+    return tmp_path
+
+
+def test_most_specific_value_wins(tables_dir):
+    parameters = load_parameters(tables_dir, "latest")
+    code_map, ordering_cost, holding_cost, lead_time, *_ = parameters.node_tables()
+    assert code_map == {1: "D", 2: "W", 3: "S1", 4: "S2"}
+    # node > echelon default > "*" default
+    assert ordering_cost == {"D": 5, "W": 5, "S1": 11, "S2": 7}
+    assert holding_cost == {"D": 0.5, "W": 0.5, "S1": 0.5, "S2": 0.5}
+    # lane > node > default
+    assert lead_time == {"D": 1, "W": 3, "S1": 4, "S2": 6}
+
+    # sku lane > sku node > lane; items without rows (and "7", which lost its leading zeros) keep the node values
+    ordering_cost, holding_cost, lead_time, _ = parameters.item_tables("007")
+    assert ordering_cost["S2"] == 13 and lead_time["S2"] == 8
+    assert holding_cost["S1"] == 0.9 and lead_time["S1"] == 4
+    assert parameters.item_tables("7")[2] == {"D": 1, "W": 3, "S1": 4, "S2": 6}
+
+
+def test_snapshot_round_trip(tables_dir, monkeypatch):
+    cache_dir = tables_dir / "cache"
+    compiled = load_parameters(tables_dir, "v1", cache_dir)
+    snapshots = list(cache_dir.glob("parameters_*.npz"))
+    assert len(snapshots) == 1 and not list(cache_dir.glob("*.tmp"))
+
+    # unchanged tables are never compiled again
+    monkeypatch.setattr(parameter_tables, "compile_tables", None)
+    loaded = load_parameters(tables_dir, "v1", cache_dir)
+    assert loaded.version == compiled.version and loaded.z_score == compiled.z_score
+    assert loaded.node_tables() == compiled.node_tables()
+    assert loaded.item_tables("007") == compiled.item_tables("007")
+    np.testing.assert_array_equal(ParameterSet.load(snapshots[0]).sku_keys, compiled.sku_keys)
@@ -0,0 +1,79 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import pytest
+from query_service import PolicyService,make_server
+from sku_pipeline import run_multi_sku
+
+
+@pytest.fixture(scope="module")
+def results(weekly):
+    return run_multi_sku(weekly, max_workers=1)
+
+
+@pytest.fixture
+def server(results):
+    # a fresh service per test: posted parameters change its tables
+    frames = {"Store": results["store_demand_df"], "Warehouse": results["warehouse_demand_df"], "DC": results["dc_demand_df"]}
+    server = make_server(PolicyService({echelon: frame.copy() for echelon, frame in frames.items()}), "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def request(server, path, body=None):
+    host, port = server.server_address[:2]
+    data = None if body is None else json.dumps(body).encode()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(f"http://{host}:{port}{path}", data=data), timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def test_policy_matches_batch_schedule(server, results):
+    status, body = request(server, "/policy?node=ST1&as_of=2022-06-10")
+    assert status == 200 and body["node"] == 40101
+    schedule = results["store_schedule_df"]
+    expected = schedule[(schedule["Echelon"] == 40101) & (schedule["Date_Time"] >= "2022-06-10")].sort_values("Date_Time", kind="stable").head(3)
+    assert [order["date"] for order in body["next_orders"]] == [str(day.date()) for day in expected["Date_Time"]]
+    assert [order["quantity"] for order in body["next_orders"]] == expected["Quantity"].tolist()
+    # a node code answers the same as its name
+    assert request(server, "/policy?node=40101&as_of=2022-06-10") == (status, body)
+
+
+def test_batch_and_errors(server):
+    status, body = request(server, "/policy", {"queries": [{"node": "WH1", "as_of": "2022-07-01"}, {"node": "XX"}, 5]})
+    assert status == 200
+    first, unknown, malformed = body["results"]
+    assert first["echelon"] == "Warehouse"
+    assert "error" in unknown and "error" in malformed
+    assert request(server, "/policy?node=XX")[0] == 404
+    assert request(server, "/nope")[0] == 404
+    assert request(server, "/parameters", {"node": "ST1", "bogus": 1})[0] == 400
+
+
+def test_posted_parameters_recompute_the_node(server):
+    before = request(server, "/policy?node=ST1&as_of=2022-06-10")[1]
+    status, _ = request(server, "/parameters", {"node": "ST1", "ordering_cost": 40})
+    assert status == 200
+    after = request(server, "/policy?node=ST1&as_of=2022-06-10")[1]
+    # the EOQ grows with the square root of the ordering cost, 10 -> 40 for ST1
+    assert after["order_quantity"] == pytest.approx(2 * before["order_quantity"])
+    assert request(server, "/policy?node=ST2&as_of=2022-06-10")[0] == 200
+
+
+def test_unexpected_errors_answer_500_and_are_timed(server):
+    server.service.health = lambda: 1 / 0
+    status, body = request(server, "/health")
+    assert status == 500 and "ZeroDivisionError" in body["error"]
+    # the handler records the latency after the response is written
+    deadline = time.monotonic() + 5
+    while "GET /health" not in server.service.latency.snapshot() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.service.latency.snapshot()["GET /health"]["errors"] == 1
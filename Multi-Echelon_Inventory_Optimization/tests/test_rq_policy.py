@@ -0,0 +1,91 @@
+import functools
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import minimize
+from scipy.stats import norm
+import rq_policy
+from parameter_tables import compile_tables,install
+
+
+@pytest.fixture
+def nodes():
+    rng = np.random.default_rng(0)
+    n = 5000
+    demand = rng.uniform(50, 5000, n)
+    std = demand * rng.uniform(0, 0.5, n)
+    std[:50] = 0
+    demand[50:60] = 0
+    return {"demand": demand, "ordering_cost": rng.choice([10.0, 50.0, 200.0], n), "holding_cost": rng.choice([0.5, 0.7, 1.0], n),
+            "sigma": np.sqrt(rng.choice([2.0, 3.0, 4.0], n)) * std, "shortage_cost": rng.choice([20.0, 25.0, 40.0], n)}
+
+
+@pytest.mark.parametrize("objective", rq_policy.OBJECTIVES)
+def test_solve_rq_converges(nodes, objective):
+    q, z, iterations, converged = rq_policy.solve_rq(**nodes, fill_rate=0.98, objective=objective)
+    assert converged.all()
+    assert iterations.max() < rq_policy.MAX_ITERATIONS
+    assert np.isfinite(q[nodes["demand"] > 0]).all() and (z >= 0).all()
+    # no safety stock without demand variability
+    assert (z[:50] == 0).all() and (iterations[:50] == 0).all()
+
+
+def test_fill_rate_target_is_met(nodes):
+    q, z, _, _ = rq_policy.solve_rq(**nodes, fill_rate=0.98)
+    varied = (nodes["sigma"] > 0) & (nodes["demand"] > 0)
+    fill_rate = 1 - nodes["sigma"][varied] * rq_policy.normal_loss(z[varied]) / q[varied]
+    # z stops at 0 where the order quantity alone already beats the target
+    assert (fill_rate >= 0.98 - 1e-6).all()
+    np.testing.assert_allclose(fill_rate[z[varied] > 0], 0.98, atol=1e-6)
+
+
+def test_shortage_cost_solution_is_optimal(nodes):
+    q, z, _, _ = rq_policy.solve_rq(**nodes, objective="shortage_cost")
+    for i in (100, 1234, 4321):
+        d, k, h, s, p = (nodes[name][i] for name in ("demand", "ordering_cost", "holding_cost", "sigma", "shortage_cost"))
+
+        def cost(x):
+            order, r = x
+            return k * d / order + h * (order / 2 + r) + p * d / order * s * (norm.pdf(r / s) - r / s * norm.sf(r / s))
+        best = minimize(cost, [q[i] * 1.2, z[i] * s * 0.8 + 1], method="Nelder-Mead",
+                        options={"xatol": 1e-8, "fatol": 1e-10, "maxiter": 5000})
+        np.testing.assert_allclose([q[i], z[i] * s], best.x, rtol=1e-3)
+
+
+def test_non_convergence_is_reported(nodes):
+    _, _, _, converged = rq_policy.solve_rq(**nodes, fill_rate=0.98, max_iterations=1)
+    assert not converged.all()
+
+
+def test_invalid_inputs():
+    with pytest.raises(ValueError):
+        rq_policy.solve_rq(100.0, 10.0, 1.0, 5.0, objective="cost")
+    with pytest.raises(ValueError):
+        rq_policy.solve_rq(100.0, 10.0, 1.0, 5.0, fill_rate=1.0)
+    with pytest.raises(ValueError):
+        rq_policy.solve_rq(100.0, 10.0, 1.0, 5.0, shortage_cost=0.0, objective="shortage_cost")
+
+
+def test_rq_metrics_warns_on_non_convergence(nodes, monkeypatch):
+    monkeypatch.setattr(rq_policy, "solve_rq", functools.partial(rq_policy.solve_rq, max_iterations=1))
+    lead_time = np.full(len(nodes["demand"]), 4.0)
+    with pytest.warns(RuntimeWarning, match="did not converge"):
+        rq_policy.rq_metrics(nodes["demand"], nodes["ordering_cost"], nodes["holding_cost"], lead_time, nodes["sigma"] / 2)
+
+
+def test_shortage_cost_is_loaded_from_parameter_tables():
+    tables = {
+        "nodes": pd.DataFrame({"code": [1, 2, 3], "name": ["D", "W", "S"], "echelon": ["DC", "Warehouse", "Store"],
+                               "ordering_cost": 10.0, "holding_cost": 1.0, "lead_time": 2.0, "shortage_cost": [30.0, np.nan, np.nan]}),
+        "defaults": pd.DataFrame({"scope": ["Store"], "shortage_cost": [50.0]}),
+        "sku": pd.DataFrame({"item": ["A"], "node": ["S"], "shortage_cost": [80.0]}),
+    }
+    parameters = compile_tables(tables, "test", 1.65)
+    namespace = {name: {"old": 1.0} for name in ("CODE_MAP", "ORDERING_COST", "HOLDING_COST", "LEAD_TIME", "SHORTAGE_COST",
+                                               "DOCK_CAPACITY")}
+    install(parameters, namespace)
+    # the warehouse has neither a value nor a default, so it is left out rather than set to NaN
+    assert namespace["SHORTAGE_COST"] == {"D": 30.0, "S": 50.0}
+    assert parameters.item_tables("A")[3] == {"D": 30.0, "S": 80.0}
+    with pytest.raises(ValueError, match="shortage_cost"):
+        compile_tables({"nodes": tables["nodes"].assign(shortage_cost=0.0)}, "test", 1.65)
@@ -0,0 +1,36 @@
+import itertools
+import numpy as np
+import pytest
+from network.safety_stock_placement import ServiceTree,solve_service_times
+
+
+def brute_force(parents, lead_time, max_service_time, sigma, holding_cost, size):
+    # every combination of outbound service times on the integer grid, keeping the feasible ones
+    best = np.inf
+    for service in itertools.product(range(size), repeat=len(parents)):
+        cost = 0.0
+        for node, parent in enumerate(parents):
+            inbound = service[parent] if parent >= 0 else 0
+            net_time = inbound + lead_time[node] - service[node]
+            if net_time < 0 or service[node] > max_service_time[node]:
+                cost = np.inf
+                break
+            cost += holding_cost[node] * sigma[node] * np.sqrt(net_time)
+        best = min(best, cost)
+    return best
+
+
+@pytest.mark.parametrize("parents", [[-1, 0, 1], [-1, 0, 0]])
+def test_service_times_match_brute_force(parents):
+    lead_time = [2.0, 1.0, 3.0]
+    max_service_time = [np.inf, np.inf, 0.0] if parents == [-1, 0, 1] else [np.inf, 0.0, 1.0]
+    rng = np.random.default_rng(1)
+    sigma = rng.uniform(0, 100, (40, 3))
+    holding_cost = rng.uniform(0.1, 2.0, (40, 3))
+
+    tree = ServiceTree(["A", "B", "C"], parents, lead_time, max_service_time)
+    solution = solve_service_times(tree, sigma, holding_cost, z_score=1.0, step=1.0)
+    expected = [brute_force(parents, lead_time, max_service_time, sigma[i], holding_cost[i], size=7) for i in range(len(sigma))]
+    np.testing.assert_allclose(solution["safety_stock_cost"].sum(axis=1), expected, rtol=1e-12)
+    assert (solution["net_replenishment_time"] >= 0).all()
+    assert (solution["service_time"] <= np.array(max_service_time)).all()
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scenarios
+from app_function_call import aggregate,calculate_metrics
+from cost_comparison.eoq_cost import eoq_cost_function
+from schedules import store_schedule,warehouse_schedule
+from Preassumptions import CODE_MAP,Z_SCORE
+
+
+@pytest.fixture(scope="module")
+def monthly(weekly):
+    return aggregate(weekly)
+
+
+def test_base_scenario_matches_eoq_cost_function(monthly):
+    store_df, warehouse_df, dc_df = monthly
+    store_demand_df, warehouse_demand_df, _ = calculate_metrics(store_df.copy(), warehouse_df.copy(), dc_df.copy())
+    result = scenarios.evaluate_scenarios(store_df, warehouse_df, dc_df, scenarios.scenario_grid({"z_score": [Z_SCORE]}))
+    for echelon, demand_df, schedule in (("Store", store_demand_df, store_schedule.stores_schedule),
+                                         ("Warehouse", warehouse_demand_df, warehouse_schedule.warehouses_schedule)):
+        costs = eoq_cost_function(schedule(demand_df), demand_df, echelon=echelon).groupby("Echelon")["total_cost"].sum()
+        swept = result[result["echelon"] == echelon].set_index("node")["eoq_cost"]
+        np.testing.assert_allclose(swept.loc[costs.index].to_numpy(), costs.to_numpy(), rtol=1e-9)
+
+
+def test_custom_code_map_names_and_parameters_agree(monthly, monkeypatch):
+    grid = scenarios.scenario_grid({"lead_time.ST2": [3, 5]})
+    by_name = {name: code for code, name in CODE_MAP.items()}
+    swapped = {**CODE_MAP, by_name["ST1"]: "ST2", by_name["ST2"]: "ST1"}
+    result = scenarios.evaluate_scenarios(*monthly, grid, code_map=swapped)
+
+    # the default map with ST1's and ST2's parameters swapped prices every node the same way
+    for parameter, table in scenarios.PARAMETERS.items():
+        monkeypatch.setitem(scenarios.PARAMETERS, parameter, {**table, "ST1": table["ST2"], "ST2": table["ST1"]})
+    expected = scenarios.evaluate_scenarios(*monthly, scenarios.scenario_grid({"lead_time.ST1": [3, 5]}))
+    assert (result.loc[result["node"] == by_name["ST1"], "name"] == "ST2").all()
+    pd.testing.assert_frame_equal(result.drop(columns="name"), expected.drop(columns="name"))
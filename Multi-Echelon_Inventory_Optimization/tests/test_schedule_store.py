@@ -0,0 +1,49 @@
+import logging
+import numpy as np
+import pandas as pd
+from app_function_call import aggregate,calculate_metrics,schedule
+from parameter_tables import compile_tables,install
+from schedules.schedule_store import ScheduleStore
+
+
+def orders():
+    return pd.DataFrame({
+        "From": [np.nan, 1, 1, 2, 2],
+        "Echelon": [1, 2, 2, 3, 3],
+        "Date_Time": pd.to_datetime(["2024-01-01", "2024-01-01", "2024-01-01", "2024-01-02", "2024-01-03"]),
+        "Quantity": [500.0, 300.0, 250.0, 80.0, 40.0],
+    })
+
+
+def test_dock_capacity_is_loaded_from_parameter_tables():
+    nodes = pd.DataFrame({"code": [1, 2, 3], "name": ["D", "W", "S"], "echelon": ["DC", "Warehouse", "Store"],
+                          "ordering_cost": 10.0, "holding_cost": 1.0, "lead_time": 1.0, "dock_capacity": [500.0, np.nan, np.nan]})
+    defaults = pd.DataFrame({"scope": ["Warehouse"], "dock_capacity": [100.0]})
+    namespace = {name: {} for name in ("CODE_MAP", "ORDERING_COST", "HOLDING_COST", "LEAD_TIME", "SHORTAGE_COST", "DOCK_CAPACITY")}
+    install(compile_tables({"nodes": nodes, "defaults": defaults}, "test", 1.65), namespace)
+    assert namespace["DOCK_CAPACITY"] == {"D": 500.0, "W": 100.0}
+
+    store = ScheduleStore(orders(), namespace["LEAD_TIME"], namespace["CODE_MAP"])
+    breaches = store.capacity_flags(namespace["DOCK_CAPACITY"])
+    assert breaches["node"].tolist() == [1]
+    assert breaches["quantity"].tolist() == [550.0]
+
+
+def test_missing_dock_capacity_is_logged(caplog):
+    store = ScheduleStore(orders(), {}, {1: "D", 2: "W", 3: "S"})
+    with caplog.at_level(logging.WARNING, logger="schedules.schedule_store"):
+        assert store.capacity_flags({"DC": 1.0}).empty
+    assert "dock capacity" in caplog.text
+
+
+def test_loads_match_a_groupby_on_ship_and_arrival_dates(weekly):
+    store_demand_df, warehouse_demand_df, _ = calculate_metrics(*aggregate(weekly))
+    store = ScheduleStore.from_frames(schedule(store_demand_df, warehouse_demand_df))
+    orders = store.orders.assign(ship_day=store.orders["Date_Time"].dt.floor("D"))
+    for direction, node_col, date_col in (("outbound", "From", "ship_day"), ("inbound", "Echelon", "Arrival_Date")):
+        expected = (orders.dropna(subset=[node_col]).groupby([node_col, date_col])["Quantity"].agg(["sum", "count"])
+                    .reset_index().set_axis(["node", "date", "quantity", "orders"], axis=1))
+        # loads keep the nodes in the order they first appear in the schedules
+        loads = store.loads(direction).astype({"node": "int64"}).sort_values(["node", "date"], ignore_index=True)
+        expected = expected.astype({"node": "int64", "date": "datetime64[us]"})
+        pd.testing.assert_frame_equal(loads, expected, check_dtype=False)
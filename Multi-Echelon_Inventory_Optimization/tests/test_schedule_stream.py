@@ -0,0 +1,23 @@
+import pandas as pd
+from app_function_call import aggregate,calculate_metrics
+from cost_comparison.cost_engine import COST_COLUMNS,eoq_cost_table,stack_cost_tables
+from schedules import dc_schedule,store_schedule,warehouse_schedule
+from schedules.schedule_stream import read_stream,stream_schedule
+
+
+def test_streamed_costs_match_the_in_memory_table(weekly, tmp_path):
+    store_demand_df, warehouse_demand_df, dc_demand_df = calculate_metrics(*aggregate(weekly))
+    schedules = (store_schedule.stores_schedule(store_demand_df), warehouse_schedule.warehouses_schedule(warehouse_demand_df),
+                 dc_schedule.dcs_schedule(dc_demand_df))
+    expected = eoq_cost_table(*schedules, store_demand_df, warehouse_demand_df, dc_demand_df)
+
+    # batches far smaller than a month's orders, so node-months are split across batches
+    streamed = [stream_schedule(demand_df, echelon=echelon, directory=tmp_path, batch_rows=50)
+                for echelon, demand_df in (("Store", store_demand_df), ("Warehouse", warehouse_demand_df), ("DC", dc_demand_df))]
+    result = stack_cost_tables(*[costs for _, costs in streamed])
+
+    keys = COST_COLUMNS[:-1]
+    pd.testing.assert_frame_equal(result.sort_values(keys, ignore_index=True), expected.sort_values(keys, ignore_index=True),
+                                  check_dtype=False)
+    for (manifest, _), schedule in zip(streamed, schedules):
+        assert sum(len(batch) for batch in read_stream(manifest)) == len(schedule)
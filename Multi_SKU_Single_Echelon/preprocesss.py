@@ -1,39 +1,63 @@
-import streamlit as st
+import hashlib
+import io
+import numpy as np
 import pandas as pd
-from operations import operations
-
-# Instantiate operations class once
-ops = operations()
-
-def daily_to_weekly(df):
-    daily_rows = []
-    for i in range(len(df)):
-        demand = df.loc[i, 'Demand Plan']
-        date = pd.to_datetime(df.loc[i, 'Week'])
-        for j in range(7):
-            daily_rows.append({
-                'day': date + pd.Timedelta(days=j),
-                'daily_demand': demand / 7
-            })
-    daily_df = pd.DataFrame(daily_rows)
+import streamlit as st
+from inventory_common import eoq,resampling
+
+# columns that identify one SKU when present in the upload; a file without them is a single SKU
+SKU_COLUMNS = ["Customer Group", "Item"]
+WEEK_FORMAT = "%d-%b-%y"
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_weekly(file_hash, _data):
+    # keyed on the content hash only; the raw bytes are not hashed again by streamlit
+    weekly_df = pd.read_csv(io.BytesIO(_data))
+    if {'Week', 'Demand Plan'}.issubset(weekly_df.columns):
+        # planning exports use 21-Apr-25; anything else goes through the general parser
+        weeks = pd.to_datetime(weekly_df['Week'], format=WEEK_FORMAT, errors='coerce')
+        # fall back when the format fails on weeks that are present
+        if weeks.isna().sum() > weekly_df['Week'].isna().sum():
+            weeks = pd.to_datetime(weekly_df['Week'])
+        weekly_df['Week'] = weeks
+    return weekly_df
+
+
+def daily_to_weekly(df, sku_cols=()):
+    # every week becomes seven rows in one repeat, demand split evenly across the days
+    sku_cols = list(sku_cols)
+    daily_df = resampling.week_to_day(df, 'Week', {'Demand Plan': 'daily_demand'}, carry_cols=sku_cols)
+    if sku_cols:
+        daily_df = daily_df.sort_values(sku_cols + ['day'], kind="stable", ignore_index=True)
     return daily_df
 
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def daily_expansion(file_hash, _weekly_df, sku_cols):
+    return daily_to_weekly(_weekly_df, sku_cols)
+
+
 def daily_data(df, ordering_cost, holding_cost, lead_time):
-    df = df.copy()
-    for i in range(len(df)):
-        daily_demand = df.loc[i, 'daily_demand']
-        if pd.isna(daily_demand) or daily_demand == 0:
-            continue
-
-        df.loc[i, "daily_eoq"], _ = ops.EOQ(ordering_cost, holding_cost, daily_demand)
-        df.loc[i, 'cycle_time'] = ops.cycle_time(df.loc[i, 'daily_eoq'], daily_demand)
-        df.loc[i, "cycle_time_in_hr"] = ops.cycle_time_in_hr(df.loc[i, "cycle_time"])
-        df.loc[i, "full_cycles_in_lead_time"] = ops.full_cycle_in_lead_time(lead_time, df.loc[i, "cycle_time"])
-        df.loc[i, "effective_lead_time"] = ops.effective_lead_time(
-            lead_time, df.loc[i, "full_cycles_in_lead_time"], df.loc[i, "cycle_time"]
-        )
-        df.loc[i, "reorder_point"] = ops.reorder_point(daily_demand, df.loc[i, "effective_lead_time"])
-    return df
+    # one batched pass over every SKU-day; cheap enough to rerun on each parameter change
+    metrics = eoq.daily_metrics(df['daily_demand'].to_numpy(), ordering_cost, holding_cost, lead_time)
+    return df.assign(**metrics)
+
+
+def sku_summary(result_df, sku_cols):
+    return result_df.groupby(sku_cols, sort=False).agg(
+        days=('day', 'size'),
+        total_demand=('daily_demand', 'sum'),
+        avg_daily_eoq=('daily_eoq', 'mean'),
+        avg_cycle_time_in_hr=('cycle_time_in_hr', 'mean'),
+        avg_reorder_point=('reorder_point', 'mean'),
+        max_reorder_point=('reorder_point', 'max'),
+    ).reset_index()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def to_csv_bytes(file_hash, params, _df):
+    return _df.to_csv(index=False).encode('utf-8')
 
 # -------------------------
 # Streamlit UI
@@ -46,23 +70,42 @@ ordering_cost = st.sidebar.number_input("Ordering Cost", min_value=0.01, value=1
 holding_cost = st.sidebar.number_input("Holding Cost", min_value=0.01, value=5.0, step=0.1)
 lead_time = st.sidebar.number_input("Lead Time (days)", min_value=1, value=5, step=1)
 
-uploaded_file = st.file_uploader("Upload Weekly Demand CSV (must have 'Week' and 'Demand Plan' columns)", type=["csv"])
+uploaded_file = st.file_uploader(
+    "Upload Weekly Demand CSV (must have 'Week' and 'Demand Plan' columns; 'Customer Group'/'Item' split SKUs)", type=["csv"])
 
 if uploaded_file:
-    weekly_df = pd.read_csv(uploaded_file)
+    data = uploaded_file.getvalue()
+    file_hash = hashlib.sha256(data).hexdigest()
+    weekly_df = load_weekly(file_hash, data)
 
     # Validate columns
     if not {'Week', 'Demand Plan'}.issubset(weekly_df.columns):
         st.error("CSV must contain 'Week' and 'Demand Plan' columns.")
     else:
-        st.info("Converting weekly demand to daily demand...")
-        daily_df = daily_to_weekly(weekly_df)
-
-        st.info("Calculating EOQ and inventory metrics...")
+        sku_cols = tuple(col for col in SKU_COLUMNS if col in weekly_df.columns)
+        daily_df = daily_expansion(file_hash, weekly_df, sku_cols)
         result_df = daily_data(daily_df, ordering_cost, holding_cost, lead_time)
 
-        st.success("Calculation complete!")
-        st.dataframe(result_df)
+        if sku_cols:
+            summary_df = sku_summary(result_df, list(sku_cols))
+            st.success(f"Calculation complete for {len(summary_df)} SKU(s), {len(result_df)} daily rows.")
+            st.subheader("Per-SKU summary")
+            st.dataframe(summary_df)
+
+            # only one SKU's daily rows are rendered; the table for thousands of SKUs stays in the download
+            sku_labels = summary_df[list(sku_cols)].astype(str).agg(" / ".join, axis=1)
+            selected = st.selectbox("SKU", range(len(summary_df)), format_func=lambda i: sku_labels.iloc[i])
+            key = summary_df.loc[selected, list(sku_cols)]
+            mask = np.logical_and.reduce([result_df[col].to_numpy() == key[col] for col in sku_cols])
+            st.subheader("Daily detail")
+            st.dataframe(result_df[mask])
+
+            st.download_button("Download SKU Summary CSV", summary_df.to_csv(index=False).encode('utf-8'),
+                               "sku_inventory_summary.csv", "text/csv")
+        else:
+            st.success("Calculation complete!")
+            st.dataframe(result_df)
 
-        csv = result_df.to_csv(index=False).encode('utf-8')
-        st.download_button("Download Result CSV", csv, "daily_inventory_output.csv", "text/csv")
+        if st.checkbox("Prepare full daily result CSV", value=not sku_cols):
+            csv = to_csv_bytes(file_hash, (ordering_cost, holding_cost, lead_time), result_df)
+            st.download_button("Download Result CSV", csv, "daily_inventory_output.csv", "text/csv")
@@ -0,0 +1,70 @@
+import numpy as np
+
+# Array-in/array-out EOQ formulas shared by the single- and multi-echelon pipelines, counterparts of the
+# scalar ones in each app's operations.py. Every argument may be a scalar or a NumPy array; arrays are
+# broadcast together. Cycle times are in the demand's period (days for daily demand, months for monthly).
+
+DAILY_METRIC_COLUMNS = [
+    "daily_eoq",
+    "cycle_time",
+    "cycle_time_in_hr",
+    "full_cycles_in_lead_time",
+    "effective_lead_time",
+    "reorder_point",
+]
+
+
+def EOQ(ordering_cost, holding_cost, demand):
+    ordering_cost = np.asarray(ordering_cost, dtype=float)
+    holding_cost = np.asarray(holding_cost, dtype=float)
+    demand = np.asarray(demand, dtype=float)
+    # same parameter checks as stockpyl.eoq.economic_order_quantity; written negated so NaN fails them too
+    if np.any(~(ordering_cost >= 0)):
+        raise ValueError("fixed_cost must be non-negative.")
+    if np.any(~(holding_cost > 0)):
+        raise ValueError("holding_cost must be positive.")
+    if np.any(~(demand >= 0)):
+        raise ValueError("demand_rate must be non-negative.")
+    return np.sqrt(2 * ordering_cost * demand / holding_cost)
+
+
+def cycle_time(eoq, demand):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.asarray(eoq, dtype=float) / demand
+
+
+def cycle_time_in_hr(cycle_time_in_days):
+    return np.asarray(cycle_time_in_days, dtype=float) * 24
+
+
+def full_cycle_in_lead_time(lead_time, cycle_time):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.floor(np.asarray(lead_time, dtype=float) / cycle_time)
+
+
+def effective_lead_time(lead_time, full_cycle_in_lead_time, cycle_time):
+    return np.asarray(lead_time, dtype=float) - (full_cycle_in_lead_time * cycle_time)
+
+
+def reorder_point(demand, effective_lead_time):
+    return np.asarray(demand, dtype=float) * effective_lead_time
+
+
+def daily_metrics(daily_demand, ordering_cost, holding_cost, lead_time):
+    # DAILY_METRIC_COLUMNS for daily demand and a lead time in days; days without demand are left empty,
+    # as the row-by-row versions skipped them
+    daily_demand = np.asarray(daily_demand, dtype=float)
+    demand = np.where(daily_demand == 0, np.nan, daily_demand)
+    with np.errstate(invalid="ignore"):
+        eoq = np.where(np.isnan(demand), np.nan, EOQ(ordering_cost, holding_cost, np.nan_to_num(demand)))
+    ct = cycle_time(eoq, demand)
+    full_cycles = full_cycle_in_lead_time(lead_time, ct)
+    elt = effective_lead_time(lead_time, full_cycles, ct)
+    return {
+        "daily_eoq": eoq,
+        "cycle_time": ct,
+        "cycle_time_in_hr": cycle_time_in_hr(ct),
+        "full_cycles_in_lead_time": full_cycles,
+        "effective_lead_time": elt,
+        "reorder_point": reorder_point(demand, elt),
+    }
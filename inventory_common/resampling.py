@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+# Week <-> day <-> month demand conversions shared by the single- and multi-echelon pipelines.
+# A week covers seven days from its dated day; months use their real length.
+
+DAYS_PER_WEEK = 7
+
+
+def _value_map(value_cols):
+    # "Actual", ["Actual", ...] or {"Demand Plan": "daily_demand"} -> {source: output}
+    if isinstance(value_cols, str):
+        return {value_cols: value_cols}
+    if isinstance(value_cols, dict):
+        return dict(value_cols)
+    return {col: col for col in value_cols}
+
+
+def _days(dates):
+    return pd.to_datetime(np.asarray(dates)).to_numpy().astype("datetime64[D]")
+
+
+def _months(year, month):
+    return ((np.asarray(year, dtype="int64") - 1970) * 12 + np.asarray(month, dtype="int64") - 1).astype("datetime64[M]")
+
+
+def _month_length(months):
+    return ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype("int64")
+
+
+def month_start(year, month):
+    return _months(year, month).astype("datetime64[D]")
+
+
+def days_in_month(year, month):
+    return _month_length(_months(year, month))
+
+
+def add_months(dates, months):
+    # calendar month arithmetic: whole months keep the day (clipped to the month end), a fractional
+    # remainder is that share of the landing month's length
+    days = _days(dates)
+    months = np.asarray(months, dtype=float)
+    whole = np.floor(months).astype("int64")
+    landing = days.astype("datetime64[M]") + whole
+    length = _month_length(landing)
+    day = np.minimum((days - days.astype("datetime64[M]").astype("datetime64[D]")).astype("int64"), length - 1)
+    return landing.astype("datetime64[D]") + day + np.round((months - whole) * length).astype("int64")
+
+
+def week_to_day(df, date_col, value_cols, carry_cols=(), day_col="day", days_per_week=DAYS_PER_WEEK):
+    # one repeat per column: every week becomes days_per_week rows with an even share of its value
+    n = len(df)
+    out = {col: np.repeat(df[col].to_numpy(), days_per_week) for col in carry_cols}
+    out[day_col] = (np.repeat(_days(df[date_col]), days_per_week)
+                    + np.tile(np.arange(days_per_week), n).astype("timedelta64[D]"))
+    for source, target in _value_map(value_cols).items():
+        out[target] = np.repeat(df[source].to_numpy(dtype=float) / days_per_week, days_per_week)
+    return pd.DataFrame(out)
+
+
+def split_weeks_by_month(dates, days_per_week=DAYS_PER_WEEK):
+    # a week crossing a month end is split by the number of its days in each month
+    # -> (row index into dates, year, month, share of the week)
+    days = _days(dates)
+    start = days.astype("datetime64[M]")
+    to_month_end = ((start + 1).astype("datetime64[D]") - days).astype("int64")
+    first = np.minimum(days_per_week, to_month_end)
+    spill = days_per_week - first
+
+    rows = np.arange(len(days))
+    spilled = np.flatnonzero(spill > 0)
+    months = np.concatenate([start, start[spilled] + 1]).astype("int64")
+    index = np.concatenate([rows, rows[spilled]])
+    share = np.concatenate([first, spill[spilled]]) / days_per_week
+    return index, months // 12 + 1970, months % 12 + 1, share
+
+
+def week_to_month(df, date_col, value_cols, key_cols=(), days_per_week=DAYS_PER_WEEK, sort=False):
+    key_cols = list(key_cols)
+    index, year, month, share = split_weeks_by_month(df[date_col], days_per_week)
+    parts = {col: df[col].to_numpy()[index] for col in key_cols}
+    parts["Year"] = year
+    parts["Month"] = month
+    for source, target in _value_map(value_cols).items():
+        parts[target] = df[source].to_numpy(dtype=float)[index] * share
+    parts = pd.DataFrame(parts)
+    return parts.groupby(key_cols + ["Year", "Month"], sort=sort, observed=True).sum().reset_index()
+
+
+def day_to_month(df, day_col, value_cols, key_cols=(), sort=False):
+    key_cols = list(key_cols)
+    days = _days(df[day_col]).astype("datetime64[M]").astype("int64")
+    parts = {col: df[col].to_numpy() for col in key_cols}
+    parts["Year"] = days // 12 + 1970
+    parts["Month"] = days % 12 + 1
+    for source, target in _value_map(value_cols).items():
+        parts[target] = df[source].to_numpy(dtype=float)
+    return pd.DataFrame(parts).groupby(key_cols + ["Year", "Month"], sort=sort, observed=True).sum().reset_index()
+
+
+def day_to_week(df, day_col, value_cols, key_cols=(), week_col="Week", week_start=0, sort=False):
+    # week_start is the weekday a week begins on, Monday = 0
+    key_cols = list(key_cols)
+    days = _days(df[day_col])
+    # 1970-01-01 was a Thursday (weekday 3)
+    offset = (days.astype("int64") + 3 - week_start) % 7
+    parts = {col: df[col].to_numpy() for col in key_cols}
+    parts[week_col] = days - offset.astype("timedelta64[D]")
+    for source, target in _value_map(value_cols).items():
+        parts[target] = df[source].to_numpy(dtype=float)
+    return pd.DataFrame(parts).groupby(key_cols + [week_col], sort=sort, observed=True).sum().reset_index()
+
+
+def month_to_day(df, value_cols, key_cols=(), year_col="Year", month_col="Month", day_col="day"):
+    # each month's value spread evenly over its real number of days, built in one allocation
+    lengths = days_in_month(df[year_col], df[month_col])
+    total = lengths.sum()
+    first_row = np.cumsum(lengths) - lengths
+    within = np.arange(total) - np.repeat(first_row, lengths)
+    out = {col: np.repeat(df[col].to_numpy(), lengths) for col in key_cols}
+    out[day_col] = np.repeat(month_start(df[year_col], df[month_col]), lengths) + within.astype("timedelta64[D]")
+    for source, target in _value_map(value_cols).items():
+        out[target] = np.repeat(df[source].to_numpy(dtype=float) / lengths, lengths)
+    return pd.DataFrame(out)